@@ -8,7 +8,7 @@ import logging
 from dotenv import load_dotenv
 from alembic.operations import ops
 from app.models.base import RLSModel
-from app.models import Base, Item
+from app.models import Base, Item, FileMetadata
 
 # Import models and buckets
 from app.models import Base, Profile, ProfilePicturesBucket, STORAGE_BUCKETS
@@ -60,9 +60,42 @@ def include_object(object, name, type_, reflected, compare_to):
     # Ignorer la table users du schéma auth
     if type_ == "table" and name == "users" and object.schema == "auth":
         return False
+    # Colonnes générées de recherche plein texte (non mappées sur les modèles)
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "index" and name and name.endswith("_search_vector"):
+        return False
     return True
 
 
+def add_search_vector_ops(script, table_name, model):
+    """Ajoute la colonne tsvector générée et son index GIN pour la recherche plein texte"""
+    expression = model.get_search_vector_sql()
+    if not expression:
+        return
+
+    index_name = f"ix_{table_name}_search_vector"
+    script.upgrade_ops.ops.append(
+        ops.ExecuteSQLOp(
+            f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({expression}) STORED;"
+        )
+    )
+    script.upgrade_ops.ops.append(
+        ops.ExecuteSQLOp(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} USING GIN (search_vector);"
+        )
+    )
+    logger.debug(f"Added search_vector for {table_name}")
+
+    script.downgrade_ops.ops.insert(0,
+        ops.ExecuteSQLOp(f"ALTER TABLE {table_name} DROP COLUMN IF EXISTS search_vector;")
+    )
+    script.downgrade_ops.ops.insert(0,
+        ops.ExecuteSQLOp(f"DROP INDEX IF EXISTS {index_name};")
+    )
+
+
 def process_revision_directives(context, revision, directives):
     """Ajoute les directives RLS directement dans les opérations"""
     logger.debug("Processing revision directives...")
@@ -91,7 +124,7 @@ def process_revision_directives(context, revision, directives):
     for table_name in created_tables:
         # Trouver le modèle correspondant
         model = None
-        for m in [Item, Profile]:  # Ajoutez tous vos modèles ici
+        for m in [Item, Profile, FileMetadata]:  # Ajoutez tous vos modèles ici
             if (hasattr(m, '__tablename__') and 
                 getattr(m, '__tablename__', None) == table_name and 
                 issubclass(m, RLSModel) and 
@@ -108,19 +141,9 @@ def process_revision_directives(context, revision, directives):
             )
             
             # Add policies
-            for operation, policy in model.get_policies().items():
-                sql = f"""
-                    CREATE POLICY "{table_name}_{operation}" ON {table_name}
-                    FOR {operation.upper()}
-                """
-                if policy.using:
-                    sql += f"\n    USING ({policy.using})"
-                if policy.check:
-                    sql += f"\n    WITH CHECK ({policy.check})"
-                sql += ";"
-                
+            for sql in model.get_policy_statements(table_name):
                 script.upgrade_ops.ops.append(ops.ExecuteSQLOp(sql))
-                logger.debug(f"Added {operation} policy for {table_name}")
+            logger.debug(f"Added policies for {table_name}")
             
             # Add downgrade operations at the beginning
             # Drop policies first
@@ -135,6 +158,9 @@ def process_revision_directives(context, revision, directives):
             script.downgrade_ops.ops.insert(0,
                 ops.ExecuteSQLOp(f"ALTER TABLE {table_name} DISABLE ROW LEVEL SECURITY;")
             )
+
+            # Recherche plein texte
+            add_search_vector_ops(script, table_name, model)
     
     # 2. Traitement des buckets Storage
     for bucket_class in STORAGE_BUCKETS:  # Utilisez votre liste de buckets
@@ -162,16 +188,9 @@ def process_revision_directives(context, revision, directives):
         )
         
         # Add bucket policies
-        for policy in bucket_class.get_policies():
-            sql = f"""
-                CREATE POLICY "{policy.name}"
-                ON storage.objects
-                FOR {policy.operation.value}
-                {f"USING ({policy.using})" if policy.using else ""}
-                {f"WITH CHECK ({policy.check})" if policy.check else ""};
-            """
+        for sql in bucket_class.get_policy_statements():
             script.upgrade_ops.ops.append(ops.ExecuteSQLOp(sql))
-            logger.debug(f"Added {policy.operation.value} policy for bucket {bucket_class.name}")
+        logger.debug(f"Added policies for bucket {bucket_class.name}")
         
         # Add downgrade operations
         for policy in bucket_class.get_policies():
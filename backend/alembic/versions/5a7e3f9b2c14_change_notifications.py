@@ -0,0 +1,72 @@
+"""change notifications
+
+Revision ID: 5a7e3f9b2c14
+Revises: 8e4d2c61f5b7
+Create Date: 2026-10-19 16:04:52.217394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7e3f9b2c14'
+down_revision: Union[str, None] = '8e4d2c61f5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('item', 'filemetadata')
+
+# Un trigger par instruction, et non par ligne : un import de 10 000 items envoie
+# une notification par propriétaire. Au-delà de 100 lignes, les ids sont omis
+# (une notification est limitée à 8000 octets) : le client relit la liste.
+NOTIFY_CHANGES = """
+CREATE OR REPLACE FUNCTION notify_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    change record;
+BEGIN
+    FOR change IN
+        SELECT owner_id, count(*) AS count, (array_agg(id))[1:100] AS ids
+        FROM changed_rows
+        GROUP BY owner_id
+    LOOP
+        PERFORM pg_notify('changes', json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', lower(TG_OP),
+            'owner_id', change.owner_id,
+            'ids', CASE WHEN change.count <= 100 THEN change.ids END
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+"""
+
+# Les tables de transition n'acceptent qu'un événement par trigger
+TRIGGERS = {
+    'insert': 'AFTER INSERT ON {table} REFERENCING NEW TABLE AS changed_rows',
+    'update': 'AFTER UPDATE ON {table} REFERENCING NEW TABLE AS changed_rows',
+    'delete': 'AFTER DELETE ON {table} REFERENCING OLD TABLE AS changed_rows',
+}
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_CHANGES)
+    for table in TABLES:
+        for event, timing in TRIGGERS.items():
+            op.execute(
+                f'CREATE TRIGGER {table}_notify_{event} {timing.format(table=table)} '
+                'FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();'
+            )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for event in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_notify_{event} ON {table};')
+    op.execute('DROP FUNCTION IF EXISTS notify_changes();')
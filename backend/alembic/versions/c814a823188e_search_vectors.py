@@ -0,0 +1,75 @@
+"""search vectors
+
+Revision ID: c814a823188e
+Revises: 70657e5a9e34
+Create Date: 2026-10-19 09:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c814a823188e'
+down_revision: Union[str, None] = '70657e5a9e34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTORS = {
+    'item': (
+        "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+    ),
+    'filemetadata': (
+        "setweight(to_tsvector('simple'::regconfig, coalesce(filename, '')), 'A') || "
+        "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+    ),
+}
+
+OWNER_POLICY = "auth.uid() = owner_id OR auth.role() = 'service_role'"
+
+
+def upgrade() -> None:
+    # La table filemetadata n'a jamais été migrée : la créer si besoin
+    if not sa.inspect(op.get_bind()).has_table('filemetadata'):
+        op.create_table('filemetadata',
+        sa.Column('filename', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('content_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('bucket_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('path', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=False),
+        sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('owner_id', sa.Uuid(), server_default=sa.text('auth.uid()'), nullable=False),
+        sa.Column('item_id', sa.Uuid(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['item_id'], ['item.id'], ),
+        sa.ForeignKeyConstraint(['owner_id'], ['auth.users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.execute('ALTER TABLE filemetadata ENABLE ROW LEVEL SECURITY;')
+        op.execute(f'CREATE POLICY "filemetadata_select" ON filemetadata FOR SELECT USING ({OWNER_POLICY});')
+        op.execute(f'CREATE POLICY "filemetadata_insert" ON filemetadata FOR INSERT WITH CHECK ({OWNER_POLICY});')
+        op.execute(f'CREATE POLICY "filemetadata_update" ON filemetadata FOR UPDATE USING ({OWNER_POLICY}) WITH CHECK ({OWNER_POLICY});')
+        op.execute(f'CREATE POLICY "filemetadata_delete" ON filemetadata FOR DELETE USING ({OWNER_POLICY});')
+
+    for table_name, expression in SEARCH_VECTORS.items():
+        op.execute(
+            f'ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED;'
+        )
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector '
+            f'ON {table_name} USING GIN (search_vector);'
+        )
+
+
+def downgrade() -> None:
+    for table_name in SEARCH_VECTORS:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table_name}_search_vector;')
+        op.execute(f'ALTER TABLE {table_name} DROP COLUMN IF EXISTS search_vector;')
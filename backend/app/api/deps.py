@@ -1,18 +1,57 @@
+import math
+from collections.abc import Generator
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request
 from sqlmodel import Session
-from supabase._async.client import AsyncClient
 
+from app.core.admission import user_rate_limiter
 from app.core.auth import SuperClient, get_current_user
-from app.core.db import get_db
+from app.core.db import get_db, replicas
 from app.schemas.auth import UserIn
 from app.services import get_storage_service
 from app.services.storage import StorageService
 
-CurrentUser = Annotated[UserIn, Depends(get_current_user)]
+
+async def get_rate_limited_user(
+    user: Annotated[UserIn, Depends(get_current_user)],
+) -> UserIn:
+    """Utilisateur connecté, dans la limite de son débit (RATE_LIMIT_PER_SECOND)"""
+    retry_after = user_rate_limiter.acquire(user.id)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return user
+
+
+CurrentUser = Annotated[UserIn, Depends(get_rate_limited_user)]
 SessionDep = Annotated[Session, Depends(get_db)]
 
+# En-tête d'un client qui doit lire ses propres écritures, que les réplicas
+# n'ont peut-être pas encore reçues (jusqu'à REPLICA_MAX_LAG secondes)
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+
+def get_read_db(request: Request, session: SessionDep) -> Generator[Session, None]:
+    """Session en lecture seule : un réplica sain, à défaut la base principale
+
+    `session` (base principale) ne prend de connexion que si elle sert.
+    """
+    replica = (
+        None if request.headers.get(READ_YOUR_WRITES_HEADER) else replicas.choose()
+    )
+    if replica is None:
+        yield session
+        return
+    with Session(replica) as replica_session:
+        yield replica_session
+
+
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+
 
 async def get_storage_service_dep(supabase_client: SuperClient) -> StorageService:
     """Dépendance pour injecter le service de stockage"""
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, storage, utils
+from app.api.routes import changes, items, storage, utils
 
 api_router = APIRouter()
 api_router.include_router(items.router)
 api_router.include_router(storage.router)
 api_router.include_router(utils.router)
+api_router.include_router(changes.router)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import List, Literal
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketException,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api.deps import CurrentUser, get_rate_limited_user
+from app.core.admission import admission
+from app.core.auth import SuperClient, get_current_user
+from app.core.config import settings
+from app.services.realtime import TABLES, Subscription, change_feed
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+Table = Literal["item", "filemetadata"]
+
+
+def _feed_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many change feed subscribers",
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+
+@router.get("", response_class=StreamingResponse)
+@admission(exempt=True)
+async def stream_changes(
+    user: CurrentUser, tables: List[Table] = Query(list(TABLES))
+) -> StreamingResponse:
+    """Flux Server-Sent Events des changements des items et fichiers de l'utilisateur
+
+    Chaque événement donne la table, l'opération (insert, update, delete) et
+    les ids des lignes modifiées (null au-delà de 100 lignes). Un événement
+    `{"op": "resync"}` signale des changements perdus : relire les listes.
+    La connexion ne compte dans aucun budget d'admission.
+
+    Args:
+        user: L'utilisateur connecté
+        tables: Tables suivies (toutes par défaut)
+
+    Returns:
+        Une réponse text/event-stream, jusqu'à la déconnexion du client
+    """
+    subscription = change_feed.subscribe(str(user.id), tuple(tables))
+    if subscription is None:
+        raise _feed_full()
+
+    async def events() -> AsyncIterator[str]:
+        with subscription:
+            # Premier octet envoyé tout de suite : le client sait que l'abonnement est actif
+            yield ": subscribed\n\n"
+            while True:
+                event = await subscription.get(settings.REALTIME_HEARTBEAT)
+                # Commentaire périodique : garde la connexion ouverte à travers les proxys
+                yield (
+                    ": ping\n\n" if event is None else f"data: {json.dumps(event)}\n\n"
+                )
+
+    # Désabonne aussi si la réponse s'arrête avant d'avoir démarré le flux
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close),
+    )
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        event = await subscription.get(settings.REALTIME_HEARTBEAT)
+        if event is not None:
+            await websocket.send_json(event)
+
+
+@router.websocket("/ws")
+async def websocket_changes(
+    websocket: WebSocket,
+    super_client: SuperClient,
+    access_token: str = Query(...),
+    tables: List[Table] = Query(list(TABLES)),
+) -> None:
+    """Mêmes événements que GET /changes, par WebSocket
+
+    Le jeton est passé en paramètre `access_token` : les navigateurs ne
+    permettent pas d'en-tête Authorization sur une WebSocket.
+    """
+    try:
+        user = await get_rate_limited_user(
+            await get_current_user(access_token, super_client)
+        )
+    except HTTPException as e:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)
+        )
+    except Exception:
+        # Jeton invalide ou expiré (erreur de GoTrue)
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Could not validate credentials",
+        )
+    subscription = change_feed.subscribe(str(user.id), tuple(tables))
+    if subscription is None:
+        raise WebSocketException(
+            code=status.WS_1013_TRY_AGAIN_LATER,
+            reason="Too many change feed subscribers",
+        )
+
+    with subscription:
+        await websocket.accept()
+        sender = asyncio.create_task(_send_events(websocket, subscription))
+        try:
+            # Les messages du client sont ignorés : on attend sa déconnexion
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            # Récupère l'erreur d'envoi éventuelle (client déjà parti)
+            await asyncio.gather(sender, return_exceptions=True)
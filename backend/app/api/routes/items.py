@@ -1,10 +1,35 @@
+import logging
+import tempfile
+from collections.abc import Iterator
+from functools import partial
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import RowMapping
+from sqlmodel import Session
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, ReadSessionDep, SessionDep, StorageServiceDep
+from app.core.admission import admission
+from app.core.compression import compression
+from app.core.config import settings
+from app.core.db import engine
+from app.core.deadline import deadline
 from app.crud import item
-from app.models.item import Item, ItemCreate, ItemUpdate
+from app.models.item import Item, ItemCreate, ItemPublic, ItemSearchResults, ItemUpdate
+from app.services.bulk_import import import_records, iter_records
+from app.services.cleanup import cleanup_item_documents, cleanup_queue
+from app.utils.export import (
+    EXPORT_MEDIA_TYPES,
+    IMPORT_FORMATS,
+    DataFormat,
+    ndjson_stream,
+    stream_export,
+)
+from app.utils.search import decode_search_cursor, encode_search_cursor
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
@@ -17,22 +42,146 @@ async def create_item(
 
 
 @router.get("/get-item/{id}")
-async def read_item_by_id(id: str, session: SessionDep) -> Item | None:
+async def read_item_by_id(id: str, session: ReadSessionDep) -> Item | None:
     return item.get(session, id=UUID(id))
 
 
 @router.get("/get-items")
 async def read_items(
-    session: SessionDep, skip: int = 0, limit: int = 100
+    session: ReadSessionDep, skip: int = 0, limit: int = 100
 ) -> list[Item]:
     return list(item.get_multi(session, skip=skip, limit=limit))
 
 
+@router.get("/search")
+async def search_items(
+    user: CurrentUser,
+    session: ReadSessionDep,
+    q: str = Query(min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+) -> ItemSearchResults:
+    """Full-text search on title and description, best matches first"""
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    results = item.search(
+        session, query=q, owner_id=UUID(user.id), after=after, limit=limit
+    )
+    next_cursor = None
+    if len(results) == limit:
+        last, rank = results[-1]
+        next_cursor = encode_search_cursor(rank, last.id)
+    return ItemSearchResults(
+        data=[ItemPublic.model_validate(obj) for obj, _ in results],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_items(
+    user: CurrentUser, format: DataFormat = "ndjson"
+) -> StreamingResponse:
+    """Stream all of the user's items as NDJSON or CSV"""
+    owner_id = UUID(user.id)
+
+    def rows() -> Iterator[RowMapping]:
+        # The request session is closed before the body is sent: use our own
+        with Session(engine) as session:
+            yield from item.stream(
+                session, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+            )
+
+    return StreamingResponse(
+        stream_export(rows(), list(ItemPublic.model_fields), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="items.{format}"'},
+    )
+
+
+@router.post("/import", response_class=StreamingResponse)
+@admission("upload")
+@deadline(settings.UPLOAD_REQUEST_TIMEOUT)
+# The report is read line by line as progress: small chunks, each flushed
+@compression(enabled=False)
+async def import_items(
+    request: Request,
+    user: CurrentUser,
+    format: DataFormat | None = None,
+    batch_size: int | None = Query(None, ge=1, le=10_000),
+) -> StreamingResponse:
+    """Import items from an NDJSON or CSV request body.
+
+    Each line is validated against ItemCreate, valid lines are inserted and
+    committed in batches, and a per-line NDJSON report is streamed back.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        if content_type not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported content type. Allowed types: {', '.join(IMPORT_FORMATS)}",
+            )
+        format = IMPORT_FORMATS[content_type]
+
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Request body exceeds {settings.IMPORT_MAX_BYTES} bytes",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.IMPORT_MAX_BYTES:
+        raise too_large
+
+    # Spool the body (to disk past 1MB) so memory stays bounded whatever its size;
+    # writes may hit the disk, so they run in the thread pool
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                raise too_large
+            await run_in_threadpool(spool.write, chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+
+    def report() -> Iterator[bytes]:
+        try:
+            records = iter_records(spool, format, settings.IMPORT_MAX_LINE_BYTES)
+            yield from ndjson_stream(
+                import_records(
+                    item,
+                    ItemCreate,
+                    records,
+                    session_factory=partial(Session, engine),
+                    owner_id=UUID(user.id),
+                    batch_size=batch_size or settings.IMPORT_BATCH_SIZE,
+                )
+            )
+        finally:
+            spool.close()
+
+    return StreamingResponse(report(), media_type=EXPORT_MEDIA_TYPES["ndjson"])
+
+
 @router.put("/update-item/{id}")
 async def update_item(id: str, item_in: ItemUpdate, session: SessionDep) -> Item | None:
     return item.update(session, id=UUID(id), obj_in=item_in)
 
 
 @router.delete("/delete/{id}")
-async def delete_item(id: str, session: SessionDep) -> Item | None:
-    return item.remove(session, id=UUID(id))
+async def delete_item(
+    id: str, session: SessionDep, storage_service: StorageServiceDep
+) -> Item | None:
+    """Delete an item; its documents are removed from Storage in the background"""
+    deleted = item.remove(session, id=UUID(id))
+    if deleted and not cleanup_queue.submit(
+        cleanup_item_documents, storage_service, deleted.id
+    ):
+        logger.warning(
+            f"Cleanup queue full, documents of item {deleted.id} left in Storage"
+        )
+    return deleted
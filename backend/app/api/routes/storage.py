@@ -1,19 +1,68 @@
 import uuid
+from collections.abc import Iterator
 from typing import List, Optional
 
 from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import RowMapping
 from sqlmodel import Session, select
 
-from app.api.deps import CurrentUser, SessionDep, StorageServiceDep
+from app.api.deps import CurrentUser, ReadSessionDep, SessionDep, StorageServiceDep
+from app.core.admission import admission
+from app.core.config import settings
+from app.core.db import engine
+from app.core.deadline import deadline
 from app.crud import file_metadata
-from app.models.file import FileMetadata, FileMetadataPublic, FileMetadataUpdate
+from app.models.base import StorageBucket
+from app.models.file import (
+    FileBulkDeleteResult,
+    FileMetadata,
+    FileMetadataPublic,
+    FileMetadataSearchResults,
+    FileMetadataUpdate,
+    FileUploadRequest,
+    FileUploadResult,
+    FileUploadUrl,
+)
 from app.models.storage import ItemDocuments, ProfilePictures
 from app.services.storage import StorageService
+from app.utils.export import EXPORT_MEDIA_TYPES, DataFormat, stream_export
+from app.utils.search import decode_search_cursor, encode_search_cursor
 
 router = APIRouter(prefix="/storage", tags=["storage"])
 
+# Buckets acceptant les uploads directs (URL signée)
+UPLOAD_BUCKETS = {bucket.name: bucket for bucket in (ProfilePictures, ItemDocuments)}
+
+
+def _get_upload_bucket(
+    upload: FileUploadRequest, user_id: uuid.UUID, session: Session
+) -> type[StorageBucket]:
+    """Retourne le bucket visé par un upload direct et vérifie l'enregistrement lié"""
+    bucket_class = UPLOAD_BUCKETS.get(upload.bucket_name)
+    if not bucket_class:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bucket inconnu : {upload.bucket_name}"
+        )
+    if bucket_class.linked_model:
+        if not upload.item_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"item_id est requis pour le bucket {bucket_class.name}"
+            )
+        record = session.get(bucket_class.linked_model, upload.item_id)
+        if not record or record.owner_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Item avec l'id {upload.item_id} non trouvé ou n'appartient pas à l'utilisateur"
+            )
+    return bucket_class
+
 
 @router.post("/upload/profile-picture", response_model=FileMetadataPublic)
+@admission("upload")
+@deadline(settings.UPLOAD_REQUEST_TIMEOUT)
 async def upload_profile_picture(
     file: UploadFile = File(...),
     description: Optional[str] = Form(None),
@@ -59,6 +108,8 @@ async def upload_profile_picture(
 
 
 @router.post("/upload/document/{item_id}", response_model=FileMetadataPublic)
+@admission("upload")
+@deadline(settings.UPLOAD_REQUEST_TIMEOUT)
 async def upload_item_document(
     item_id: uuid.UUID,
     file: UploadFile = File(...),
@@ -111,6 +162,145 @@ async def upload_item_document(
     return file_meta
 
 
+@router.post("/upload/documents/{item_id}", response_model=List[FileUploadResult])
+@admission("upload")
+@deadline(settings.UPLOAD_REQUEST_TIMEOUT)
+async def upload_item_documents(
+    item_id: uuid.UUID,
+    user: CurrentUser,
+    session: SessionDep,
+    storage_service: StorageServiceDep,
+    files: List[UploadFile] = File(...),
+    description: Optional[str] = Form(None),
+) -> List[FileUploadResult]:
+    """Upload plusieurs documents liés à un item en une requête
+    
+    Les fichiers sont envoyés au storage en parallèle (UPLOAD_CONCURRENCY à la fois)
+    et leurs métadonnées enregistrées en une seule insertion. Un fichier refusé
+    n'empêche pas l'enregistrement des autres.
+    
+    Args:
+        item_id: L'ID de l'item auquel associer les documents
+        user: L'utilisateur connecté
+        session: La session de base de données
+        storage_service: Le service de stockage
+        files: Les fichiers à uploader
+        description: Description optionnelle, appliquée à chaque fichier
+        
+    Returns:
+        Le résultat de chaque fichier, dans l'ordre d'envoi
+    """
+    if len(files) > settings.UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Trop de fichiers : {settings.UPLOAD_MAX_FILES} maximum par requête"
+        )
+    
+    # Vérifier une seule fois que l'item existe et appartient à l'utilisateur
+    from app.models.item import Item
+    statement = select(Item).where(Item.id == item_id, Item.owner_id == uuid.UUID(user.id))
+    item = session.exec(statement).first()
+    
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Item avec l'id {item_id} non trouvé ou n'appartient pas à l'utilisateur"
+        )
+    
+    results = await storage_service.upload_files(
+        bucket_class=ItemDocuments,
+        files=files,
+        user_id=uuid.UUID(user.id),
+        session=session,
+        record_id=item_id,
+        description=description,
+        concurrency=settings.UPLOAD_CONCURRENCY,
+    )
+    
+    return [
+        FileUploadResult(filename=filename, status="error", detail=result)
+        if isinstance(result, str)
+        else FileUploadResult(
+            filename=filename, status="created", file=FileMetadataPublic.model_validate(result)
+        )
+        for filename, result in results
+    ]
+
+
+@router.post("/upload-url", response_model=FileUploadUrl)
+async def create_upload_url(
+    upload: FileUploadRequest,
+    user: CurrentUser,
+    session: SessionDep,
+    storage_service: StorageServiceDep,
+) -> FileUploadUrl:
+    """Génère une URL signée pour uploader un fichier directement dans le storage
+    
+    Le client envoie ensuite le fichier à cette URL, puis appelle
+    /storage/upload/finalize avec les mêmes informations.
+    
+    Args:
+        upload: Le bucket, le nom, le type, la taille et l'item du fichier
+        user: L'utilisateur connecté
+        session: La session de base de données
+        storage_service: Le service de stockage
+        
+    Returns:
+        L'URL signée, son jeton et le chemin du fichier dans le bucket
+    """
+    user_id = uuid.UUID(user.id)
+    bucket_class = _get_upload_bucket(upload, user_id, session)
+    
+    signed = await storage_service.create_upload_url(
+        bucket_class=bucket_class,
+        user_id=user_id,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size=upload.size,
+        record_id=upload.item_id,
+    )
+    
+    return FileUploadUrl(
+        upload_url=signed["signed_url"],
+        token=signed["token"],
+        bucket_name=bucket_class.name,
+        path=signed["path"],
+    )
+
+
+@router.post("/upload/finalize", response_model=FileMetadataPublic)
+async def finalize_upload(
+    upload: FileUploadRequest,
+    user: CurrentUser,
+    session: SessionDep,
+    storage_service: StorageServiceDep,
+) -> FileMetadata:
+    """Enregistre les métadonnées d'un fichier uploadé via une URL signée
+    
+    Args:
+        upload: Les informations déclarées lors de la demande d'URL
+        user: L'utilisateur connecté
+        session: La session de base de données
+        storage_service: Le service de stockage
+        
+    Returns:
+        Les métadonnées du fichier uploadé
+    """
+    user_id = uuid.UUID(user.id)
+    bucket_class = _get_upload_bucket(upload, user_id, session)
+    
+    return await storage_service.finalize_upload(
+        bucket_class=bucket_class,
+        user_id=user_id,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size=upload.size,
+        session=session,
+        record_id=upload.item_id,
+        description=upload.description,
+    )
+
+
 @router.get("/files", response_model=List[FileMetadataPublic])
 async def list_user_files(
     bucket_name: Optional[str] = Query(None),
@@ -118,7 +308,7 @@ async def list_user_files(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     user: CurrentUser = None,
-    session: SessionDep = None,
+    session: ReadSessionDep = None,
 ) -> List[FileMetadata]:
     """Liste les fichiers de l'utilisateur
     
@@ -147,11 +337,141 @@ async def list_user_files(
         return file_metadata.get_by_user_id(session, user_id=user_id, skip=skip, limit=limit)
 
 
+@router.delete("/files", response_model=FileBulkDeleteResult)
+async def delete_user_files(
+    user: CurrentUser,
+    session: SessionDep,
+    storage_service: StorageServiceDep,
+    ids: Optional[List[uuid.UUID]] = Query(None, max_length=1000),
+    item_id: Optional[uuid.UUID] = Query(None),
+    bucket_name: Optional[str] = Query(None),
+) -> FileBulkDeleteResult:
+    """Supprime plusieurs fichiers de l'utilisateur
+    
+    Seuls les fichiers de l'utilisateur sont supprimés : les ids d'autres
+    utilisateurs sont ignorés. Au moins un filtre est requis.
+    
+    Args:
+        user: L'utilisateur connecté
+        session: La session de base de données
+        storage_service: Le service de stockage
+        ids: Les IDs des fichiers à supprimer (optionnel)
+        item_id: Supprime les fichiers de cet item (optionnel)
+        bucket_name: Supprime les fichiers de ce bucket (optionnel)
+        
+    Returns:
+        Le nombre de fichiers supprimés et les chemins qui n'ont pas pu être supprimés du storage
+    """
+    if not ids and not item_id and not bucket_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Au moins un filtre est requis : ids, item_id ou bucket_name"
+        )
+    
+    deleted, removed, failed = await storage_service.delete_files(
+        session,
+        user_id=uuid.UUID(user.id),
+        ids=ids,
+        item_id=item_id,
+        bucket_name=bucket_name,
+    )
+    
+    return FileBulkDeleteResult(deleted=deleted, removed_objects=removed, failed_paths=failed)
+
+
+@router.get("/files/export", response_class=StreamingResponse)
+async def export_user_files(
+    user: CurrentUser,
+    format: DataFormat = Query("ndjson"),
+    bucket_name: Optional[str] = Query(None),
+    item_id: Optional[uuid.UUID] = Query(None),
+) -> StreamingResponse:
+    """Exporte les métadonnées des fichiers de l'utilisateur en NDJSON ou CSV
+    
+    Les lignes sont lues par un curseur côté serveur et envoyées au fil de l'eau :
+    la mémoire reste constante quel que soit le nombre de fichiers.
+    
+    Args:
+        user: L'utilisateur connecté
+        format: Format de sortie (ndjson ou csv)
+        bucket_name: Filtre par nom de bucket (optionnel)
+        item_id: Filtre par item_id (optionnel)
+        
+    Returns:
+        Une réponse streamée contenant une ligne par fichier
+    """
+    owner_id = uuid.UUID(user.id)
+    
+    def rows() -> Iterator[RowMapping]:
+        # La session de la requête est fermée avant l'envoi du corps : on ouvre la nôtre
+        with Session(engine) as session:
+            yield from file_metadata.stream(
+                session,
+                owner_id=owner_id,
+                batch_size=settings.EXPORT_BATCH_SIZE,
+                bucket_name=bucket_name,
+                item_id=item_id,
+            )
+    
+    return StreamingResponse(
+        stream_export(rows(), list(FileMetadataPublic.model_fields), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="files.{format}"'},
+    )
+
+
+@router.get("/files/search", response_model=FileMetadataSearchResults)
+async def search_user_files(
+    user: CurrentUser,
+    session: ReadSessionDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    bucket_name: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+) -> FileMetadataSearchResults:
+    """Recherche plein texte dans les fichiers de l'utilisateur
+    
+    Args:
+        user: L'utilisateur connecté
+        session: La session de base de données
+        q: Les termes recherchés (correspondance par préfixe)
+        bucket_name: Filtre par nom de bucket (optionnel)
+        cursor: Curseur renvoyé par la page précédente (optionnel)
+        limit: Nombre maximum de résultats à retourner
+        
+    Returns:
+        Les fichiers classés par pertinence et le curseur de la page suivante
+    """
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    results = file_metadata.search(
+        session,
+        query=q,
+        owner_id=uuid.UUID(user.id),
+        after=after,
+        limit=limit,
+        bucket_name=bucket_name,
+    )
+    
+    next_cursor = None
+    if len(results) == limit:
+        last, rank = results[-1]
+        next_cursor = encode_search_cursor(rank, last.id)
+    
+    return FileMetadataSearchResults(
+        data=[FileMetadataPublic.model_validate(f) for f, _ in results],
+        next_cursor=next_cursor,
+    )
+
+
 @router.get("/file/{file_id}", response_model=FileMetadataPublic)
 async def get_file_metadata(
     file_id: uuid.UUID,
     user: CurrentUser = None,
-    session: SessionDep = None,
+    session: ReadSessionDep = None,
 ) -> FileMetadata:
     """Récupère les métadonnées d'un fichier
     
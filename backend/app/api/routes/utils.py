@@ -1,8 +1,29 @@
+from typing import Any
+
 from fastapi import APIRouter
 
+from app.core.admission import admission
+from app.core.resilience import upstreams
+from app.core.singleflight import flights
+
 router = APIRouter(prefix="/utils", tags=["utils"])
 
 
 @router.get("/health-check/")
+@admission(exempt=True)
 async def health_check() -> bool:
     return True
+
+
+@router.get("/upstreams/")
+@admission(exempt=True)
+async def upstream_metrics() -> dict[str, dict[str, Any]]:
+    """Circuit breaker state and counters of each Supabase service"""
+    return {name: upstream.breaker.metrics() for name, upstream in upstreams.items()}
+
+
+@router.get("/coalescing/")
+@admission(exempt=True)
+async def coalescing_metrics() -> dict[str, dict[str, int]]:
+    """Calls made through each single flight, and how many joined one in flight"""
+    return {name: flight.metrics() for name, flight in flights.items()}
@@ -0,0 +1,143 @@
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from starlette.responses import JSONResponse
+from starlette.routing import Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.routing import RouteSettings, route_setting
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass(frozen=True)
+class AdmissionOptions:
+    budget: str | None = None
+    exempt: bool = False
+
+
+def admission(budget: str | None = None, exempt: bool = False) -> Callable[[F], F]:
+    """Per-route admission settings, placed under the route decorator
+
+    `budget` charges the route to another in-flight budget than its method's
+    ("read" or "write"), e.g. "upload" for expensive request bodies. `exempt`
+    routes (health checks) are never shed.
+    """
+    return route_setting("__admission__", AdmissionOptions(budget, exempt))
+
+
+class AdmissionMiddleware:
+    """Fails fast with 503 and Retry-After instead of queueing past the worker's limits
+
+    Each request is charged to a budget ("read", "write" or the route's own) whose
+    in-flight count is capped by `limits` (0 or missing: unlimited). Every request is
+    also refused while some caller has been waiting more than `max_pool_wait` seconds
+    for a database connection. Counts are per worker: a single event loop, no lock.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        router: Router,
+        limits: dict[str, int],
+        max_pool_wait: float = 0,
+        pool_wait: Callable[[], float] | None = None,
+        retry_after: int = 1,
+    ) -> None:
+        self.app = app
+        self.options = RouteSettings(router, "__admission__")
+        self.limits = limits
+        self.max_pool_wait = max_pool_wait
+        self.pool_wait = pool_wait
+        self.retry_after = retry_after
+        self.in_flight: dict[str, int] = {}
+        self.rejected: dict[str, int] = {}
+
+    def _reject(self, budget: str, reason: str) -> JSONResponse:
+        self.rejected[budget] = self.rejected.get(budget, 0) + 1
+        logger.debug(f"Request shed ({budget}): {reason}")
+        return JSONResponse(
+            {"detail": f"Service overloaded: {reason}"},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        options = self.options.lookup(scope, AdmissionOptions())
+        if options.exempt:
+            await self.app(scope, receive, send)
+            return
+        budget = options.budget or (
+            "read" if scope["method"] in READ_METHODS else "write"
+        )
+
+        if self.max_pool_wait and self.pool_wait is not None:
+            wait = self.pool_wait()
+            if wait > self.max_pool_wait:
+                response = self._reject(
+                    budget, f"database connections waited for {wait:.1f}s"
+                )
+                await response(scope, receive, send)
+                return
+        in_flight = self.in_flight.get(budget, 0)
+        limit = self.limits.get(budget, 0)
+        if limit and in_flight >= limit:
+            response = self._reject(
+                budget, f"{in_flight} {budget} requests in progress"
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight[budget] = in_flight + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[budget] -= 1
+
+
+class RateLimiter:
+    """Token buckets: `rate` requests per second per key, bursts of up to `burst`
+
+    Only the `max_keys` most recently seen keys are remembered; a forgotten key
+    starts again with a full bucket. Per worker, like the admission budgets.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10_000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take a token, or return the seconds until one is available (nothing taken)"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        tokens, last = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+user_rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST
+)
@@ -1,17 +1,24 @@
 import logging
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from supabase import AsyncClientOptions
-from supabase._async.client import AsyncClient, create_client
 
 from app.core.config import settings
+from app.core.resilience import auth_upstream
+from app.core.singleflight import single_flight
 from app.schemas.auth import UserIn
 
+if TYPE_CHECKING:
+    from supabase._async.client import AsyncClient
 
-async def get_super_client() -> AsyncClient:
+
+async def get_super_client() -> "AsyncClient":
     """for validation access_token init at life span event"""
+    # supabase (postgrest, realtime, storage3...) is loaded on first use, not at startup
+    from supabase import AsyncClientOptions
+    from supabase._async.client import create_client
+
     super_client = await create_client(
         settings.SUPABASE_URL,
         settings.SUPABASE_KEY,
@@ -24,7 +31,7 @@ async def get_super_client() -> AsyncClient:
     return super_client
 
 
-SuperClient = Annotated[AsyncClient, Depends(get_super_client)]
+SuperClient = Annotated["AsyncClient", Depends(get_super_client)]
 
 
 # auto get token from header
@@ -33,10 +40,19 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
+# Concurrent requests with the same token (a page loading) validate it once
+_get_user_flight = single_flight("auth.get_user")
+
 
 async def get_current_user(token: TokenDep, super_client: SuperClient) -> UserIn:
     """get current user from token and  validate same time"""
-    user_rsp = await super_client.auth.get_user(jwt=token)
+    user_rsp = await _get_user_flight.do(
+        token,
+        auth_upstream.call,
+        super_client.auth.get_user,
+        jwt=token,
+        idempotent=True,
+    )
     if not user_rsp:
         logging.error("User not found")
         raise HTTPException(status_code=404, detail="User not found")
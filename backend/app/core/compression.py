@@ -0,0 +1,253 @@
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # extra "compression"
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # extra "compression"
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Payloads that are already compressed, or must reach the client unbuffered
+UNCOMPRESSIBLE_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/x-bzip2",
+    "application/x-7z-compressed",
+    "application/pdf",
+    "text/event-stream",
+)
+COMPRESSIBLE_IMAGES = ("image/svg+xml",)
+
+
+def parse_accept_encoding(header: str) -> set[str]:
+    """Content codings accepted by the client, those with q=0 excluded"""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+# Codecs: one instance per response, `chunk` keeps the stream open, `finish` ends it
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        # quality 4: the usual trade-off for dynamic responses (11 is for static files)
+        self._compressor = brotli.Compressor(quality=4)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()  # type: ignore[no-any-return]
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()  # type: ignore[no-any-return]
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(  # type: ignore[no-any-return]
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()  # type: ignore[no-any-return]
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Codings this server can produce, preferred first"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+CODECS: dict[str, Callable[[], Any]] = {"zstd": _Zstd, "br": _Brotli, "gzip": _Gzip}
+
+
+@dataclass(frozen=True)
+class CompressionOptions:
+    enabled: bool = True
+    minimum_size: int | None = None
+
+
+def compression(
+    enabled: bool = True, minimum_size: int | None = None
+) -> Callable[[F], F]:
+    """Per-route compression settings, placed under the route decorator
+
+    `enabled=False` for payloads that are already compressed or must not be
+    buffered, `minimum_size` to override the middleware's threshold.
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.__compression__ = CompressionOptions(enabled, minimum_size)  # type: ignore[attr-defined]
+        return endpoint
+
+    return decorator
+
+
+class CompressionMiddleware:
+    """zstd/brotli/gzip negotiation for responses of at least `minimum_size` bytes
+
+    Bodies of `threadpool_size` bytes or more are compressed in the thread pool so the
+    event loop keeps serving other requests. Streamed responses are compressed chunk by
+    chunk, each chunk flushed so the client still receives it immediately.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        threadpool_size: int = 64 * 1024,
+        encodings: tuple[str, ...] | None = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.threadpool_size = threadpool_size
+        self.encodings = encodings if encodings is not None else available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = parse_accept_encoding(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        coding = next((c for c in self.encodings if c in accepted), None)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(self, scope, send, coding))
+
+
+class _CompressingSend:
+    def __init__(
+        self, middleware: CompressionMiddleware, scope: Scope, send: Send, coding: str
+    ) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.coding = coding
+        self.start: Message | None = None
+        self.codec: Any = None
+        self.passthrough = False
+
+    def _should_compress(
+        self, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        # The route is only known once the router has run, i.e. now
+        options = getattr(
+            self.scope.get("endpoint"), "__compression__", CompressionOptions()
+        )
+        if not options.enabled or "content-encoding" in headers:
+            return False
+        assert self.start is not None
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(
+            UNCOMPRESSIBLE_TYPES
+        ) and not content_type.startswith(COMPRESSIBLE_IMAGES):
+            return False
+        minimum_size = (
+            options.minimum_size
+            if options.minimum_size is not None
+            else self.middleware.minimum_size
+        )
+        # A streamed body's size is unknown: it is compressed whatever its first chunk
+        return more_body or len(body) >= minimum_size
+
+    async def _compress(self, method: Callable[[bytes], bytes], data: bytes) -> bytes:
+        if len(data) >= self.middleware.threadpool_size:
+            return await run_in_threadpool(method, data)
+        return method(data)
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            # Server extensions (pathsend...): sent as is
+            self.passthrough = True
+            if self.start is not None:
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.codec is None:
+            assert self.start is not None
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not self._should_compress(headers, body, more_body):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.codec = CODECS[self.coding]()
+            headers["Content-Encoding"] = self.coding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Not the same bytes as the identity representation anymore
+                headers["ETag"] = f"W/{etag}"
+            if not more_body:
+                body = await self._compress(self.codec.finish, body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self.send(self.start)
+
+        method = self.codec.chunk if more_body else self.codec.finish
+        await self.send(
+            {
+                "type": "http.response.body",
+                "body": await self._compress(method, body),
+                "more_body": more_body,
+            }
+        )
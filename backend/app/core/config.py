@@ -5,6 +5,7 @@ from typing import Annotated, Any, Literal, Self
 from pydantic import (
     AnyUrl,
     BeforeValidator,
+    HttpUrl,
     PostgresDsn,
     computed_field,
     model_validator,
@@ -53,10 +54,14 @@ class Settings(BaseSettings):
     PROJECT_NAME: str
 
     ## DB
-    SUPABASE_URL: str
+    # in-memory Auth and Storage stand-ins (app.fake_supabase) instead of a
+    # Supabase project, for tests and benchmarks (ENVIRONMENT=local only); their
+    # entry points start it and fill in the three settings below
+    SUPABASE_FAKE: bool = False
+    SUPABASE_URL: str = ""
     # NOTE: super user key is service_role key instead of the anon key
-    SUPABASE_KEY: str
-    SUPABASE_SERVICE_KEY: str
+    SUPABASE_KEY: str = ""
+    SUPABASE_SERVICE_KEY: str = ""
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
@@ -75,9 +80,128 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    ## Read replicas: comma-separated URLs of streaming replicas of the database
+    # above, read by the GET routes using ReadSessionDep
+    POSTGRES_REPLICA_URLS: Annotated[
+        list[PostgresDsn] | str, BeforeValidator(parse_cors)
+    ] = []
+    # a replica further behind (s), or unreachable, is skipped until the next check
+    REPLICA_MAX_LAG: float = 5
+    # seconds between two health and lag checks of the replicas
+    REPLICA_CHECK_INTERVAL: float = 5
+
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_PASSWORD: str
 
+    ## Server (python -m app.launcher)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # worker processes, one per CPU when unset
+    WEB_CONCURRENCY: int | None = None
+    # pending connections the kernel queues before refusing new ones
+    SERVER_BACKLOG: int = 2048
+    # seconds an idle keep-alive connection stays open (behind a proxy: above its own)
+    SERVER_KEEP_ALIVE: int = 5
+    # a worker is replaced after this many requests (0: never), plus a random jitter
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    # seconds given to in-flight requests on shutdown
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+
+    ## Request deadlines (s, 0: none), until the response starts
+    # past it the request is cancelled (504) and its queries stopped (statement_timeout)
+    REQUEST_TIMEOUT: float = 30
+    # routes receiving files (@deadline(settings.UPLOAD_REQUEST_TIMEOUT))
+    UPLOAD_REQUEST_TIMEOUT: float = 300
+
+    ## Admission control (per worker, 0: no limit)
+    # requests in progress per budget: reads (GET/HEAD/OPTIONS), writes, and
+    # uploads (routes marked @admission("upload"))
+    ADMISSION_MAX_READS: int = 0
+    ADMISSION_MAX_WRITES: int = 0
+    ADMISSION_MAX_UPLOADS: int = 0
+    # new requests are refused while a caller has waited longer (s) for a DB connection
+    ADMISSION_MAX_POOL_WAIT: float = 0
+    # Retry-After (s) of the 503 answered to shed requests
+    ADMISSION_RETRY_AFTER: int = 1
+    # per-user token bucket: sustained requests per second and burst size
+    RATE_LIMIT_PER_SECOND: float = 0
+    RATE_LIMIT_BURST: int = 20
+
+    ## Supabase calls (Storage, Auth)
+    # attempts of idempotent calls failing with a transient error (5xx, 429, network)
+    UPSTREAM_RETRY_ATTEMPTS: int = 3
+    # random wait before a retry (s): up to INITIAL_WAIT * 2^attempt, at most MAX_WAIT
+    UPSTREAM_RETRY_INITIAL_WAIT: float = 0.1
+    UPSTREAM_RETRY_MAX_WAIT: float = 2
+    # consecutive transient failures opening the circuit of a service, whose calls
+    # then fail fast (503) for CIRCUIT_RESET_TIMEOUT seconds before a trial call
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30
+
+    ## Change feed (GET /changes, WebSocket /changes/ws)
+    # subscribers per worker, beyond which new ones are refused (503)
+    REALTIME_MAX_SUBSCRIBERS: int = 1000
+    # events waiting for a slow subscriber; past it they are replaced by a resync
+    REALTIME_QUEUE_SIZE: int = 100
+    # seconds between two keep-alive messages of an idle feed
+    REALTIME_HEARTBEAT: float = 15
+
+    ## Webhooks (transactional outbox)
+    # endpoint receiving item and file changes; none: changes are not recorded
+    OUTBOX_WEBHOOK_URL: HttpUrl | None = None
+    # key of the HMAC-SHA256 signature sent in X-Outbox-Signature
+    OUTBOX_WEBHOOK_SECRET: str | None = None
+    # events claimed together, and delivered at most CONCURRENCY at a time
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 10
+    # seconds between two polls of an empty outbox
+    OUTBOX_POLL_INTERVAL: float = 1
+    # failed deliveries are retried after a growing delay, up to MAX_ATTEMPTS times
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    # seconds delivered events are kept before being pruned
+    OUTBOX_RETENTION: int = 24 * 3600
+
+    ## OpenAPI
+    # directory written by `python -m app.utils.openapi`, served instead of generating
+    # the schema at startup
+    OPENAPI_ARTIFACT_DIR: str | None = None
+
+    ## Response compression (zstd/brotli with the "compression" extra, gzip otherwise)
+    # smaller bodies are sent as is
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # larger bodies are compressed in the thread pool, off the event loop
+    COMPRESSION_THREADPOOL_SIZE: int = 64 * 1024
+
+    ## Export / import
+    # rows fetched per round trip by the server-side cursor
+    EXPORT_BATCH_SIZE: int = 1000
+    # rows inserted (and committed) together by bulk imports
+    IMPORT_BATCH_SIZE: int = 500
+    # longest accepted input line, longer lines are reported as errors
+    IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+    # largest accepted request body, larger imports are refused with 413
+    IMPORT_MAX_BYTES: int = 100 * 1024 * 1024
+
+    ## Multi-file upload
+    # files accepted in one request
+    UPLOAD_MAX_FILES: int = 20
+    # files read and sent to Storage at the same time
+    UPLOAD_CONCURRENCY: int = 4
+
+    ## Background cleanup (Storage objects of deleted items)
+    # pending cleanup jobs, beyond that objects are left to the reconciler
+    CLEANUP_QUEUE_SIZE: int = 1000
+    # objects younger than this may still be waiting for their metadata
+    RECONCILE_MIN_AGE_HOURS: int = 24
+
+    ## Post-upload processing (MIME sniffing, thumbnails)
+    POST_UPLOAD_PROCESSING: bool = True
+    # uploads waiting for processing, beyond that they are stored unprocessed
+    POST_UPLOAD_QUEUE_SIZE: int = 32
+    # processes used for image resizing
+    POST_UPLOAD_PROCESS_WORKERS: int = 2
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
@@ -98,5 +222,18 @@ class Settings(BaseSettings):
         )
         return self
 
+    @model_validator(mode="after")
+    def _require_supabase_project(self) -> Self:
+        if self.SUPABASE_FAKE and self.ENVIRONMENT != "local":
+            # The fake trusts any token signed with SECRET_KEY and keeps files in memory
+            raise ValueError("SUPABASE_FAKE is only allowed with ENVIRONMENT=local")
+        if not self.SUPABASE_FAKE:
+            for var_name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY"):
+                if not getattr(self, var_name):
+                    raise ValueError(
+                        f"{var_name} is required unless SUPABASE_FAKE is set"
+                    )
+        return self
+
 
 settings = Settings()  # type: ignore[call-arg] # load args from env
@@ -1,16 +1,138 @@
-from collections.abc import Generator
+import itertools
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Generator, Sequence
+from typing import Any
 
+from sqlalchemy import Engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
 from sqlmodel import Session, create_engine, select
-from supabase import create_client
 
 from app.core.config import settings
+from app.core.deadline import set_statement_timeout
 from app.models import User
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that knows how long its callers have been waiting for a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._wait_ids = itertools.count()
+        self._waiting: dict[int, float] = {}
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        wait_id = next(self._wait_ids)
+        self._waiting[wait_id] = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            del self._waiting[wait_id]
+
+    def longest_wait(self) -> float:
+        """Seconds the oldest caller still waiting has been waiting, 0 if none"""
+        starts = list(self._waiting.values())
+        return time.monotonic() - min(starts) if starts else 0.0
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=TimedQueuePool)
+# Within a request, transactions inherit what is left of its deadline
+event.listen(Session, "after_begin", set_statement_timeout)
+
+
+# Seconds since the last replayed transaction, 0 once the replica has replayed
+# all the WAL it received (an idle primary writes none)
+REPLICATION_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replication_lag(replica: Engine) -> float:
+    with replica.connect() as connection:
+        return float(connection.execute(REPLICATION_LAG).scalar_one())
+
+
+class ReplicaSet:
+    """Read replicas, used in turn while reachable and less than `max_lag` behind
+
+    The checks run at most every `check_interval` seconds, in the request that
+    finds the last one outdated; the others keep the last result meanwhile.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        max_lag: float,
+        check_interval: float,
+        probe: Callable[[Engine], float] = replication_lag,
+    ) -> None:
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe = probe
+        self.healthy: list[Engine] = []
+        self._checked_at = -math.inf
+        self._checking = threading.Lock()
+        self._turn = itertools.count()
+
+    def check(self) -> None:
+        healthy = []
+        for replica in self.engines:
+            try:
+                lag = self.probe(replica)
+            except SQLAlchemyError as e:
+                logger.warning(f"Replica {replica.url!r} unreachable: {e}")
+                continue
+            if lag > self.max_lag:
+                logger.warning(f"Replica {replica.url!r} is {lag:.1f}s behind, skipped")
+                continue
+            healthy.append(replica)
+        self.healthy = healthy
+
+    def choose(self) -> Engine | None:
+        """A replica to read from, None to read from the primary"""
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._checking.acquire(
+            blocking=False
+        ):
+            try:
+                self._checked_at = now
+                self.check()
+            finally:
+                self._checking.release()
+        healthy = self.healthy
+        return healthy[next(self._turn) % len(healthy)] if healthy else None
+
+
+replicas = ReplicaSet(
+    [
+        # A replica that is down must not hold the check (or a request) for long
+        create_engine(
+            str(url), poolclass=TimedQueuePool, connect_args={"connect_timeout": 2}
+        )
+        for url in settings.POSTGRES_REPLICA_URLS
+    ],
+    max_lag=settings.REPLICA_MAX_LAG,
+    check_interval=settings.REPLICA_CHECK_INTERVAL,
+)
+
+
+def pool_wait() -> float:
+    # engine.dispose() replaces the pool: look it up on every call
+    pool = engine.pool
+    return pool.longest_wait() if isinstance(pool, TimedQueuePool) else 0.0
 
 
 def get_db() -> Generator[Session, None]:
@@ -29,6 +151,8 @@ def init_db(session: Session) -> None:
     result = session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER))
     user = result.first()
     if not user:
+        from supabase import create_client
+
         super_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
         response = super_client.auth.sign_up(
             {
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+import anyio
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.routing import RouteSettings, route_setting
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _RequestDeadline:
+    # Mutable: cleared once the response starts, which the copies of the context
+    # made for the thread pool and the streaming tasks must see too
+    __slots__ = ("at",)
+
+    def __init__(self, at: float | None) -> None:
+        self.at = at
+
+
+_deadline: ContextVar[_RequestDeadline | None] = ContextVar(
+    "request_deadline", default=None
+)
+
+# SQLSTATE of query_canceled, raised by Postgres when statement_timeout expires
+QUERY_CANCELED = "57014"
+
+
+def remaining() -> float | None:
+    """Seconds left before the current request's deadline, None without deadline"""
+    deadline = _deadline.get()
+    if deadline is None or deadline.at is None:
+        return None
+    return deadline.at - time.monotonic()
+
+
+def deadline(seconds: float | None) -> Callable[[F], F]:
+    """Per-route deadline, placed under the route decorator (None: no deadline)"""
+    return route_setting("__deadline__", seconds)
+
+
+def set_statement_timeout(
+    session: Session,
+    transaction: SessionTransaction,
+    connection: Connection,  # noqa: ARG001
+) -> None:
+    """`after_begin` listener: Postgres gives up on queries past the request deadline"""
+    left = remaining()
+    if left is None or connection.dialect.name != "postgresql":
+        return
+    # SET LOCAL: reset at the end of the transaction, before the connection is pooled again
+    connection.exec_driver_sql(
+        f"SET LOCAL statement_timeout = {max(math.ceil(left * 1000), 1)}"
+    )
+
+
+def _is_query_canceled(exc: BaseException) -> bool:
+    orig = getattr(exc, "orig", None)
+    # psycopg 3: sqlstate, psycopg2: pgcode
+    return QUERY_CANCELED in (
+        getattr(orig, "sqlstate", None),
+        getattr(orig, "pgcode", None),
+    )
+
+
+class _DisconnectWatcher:
+    """Shares `receive` between the app and a task waiting for the client to leave
+
+    The app reads the body as usual; once it is complete the watcher owns `receive`
+    and a later call from the app waits for the disconnect the watcher sees. A
+    request without body is read by the watcher itself and handed to the app.
+    """
+
+    def __init__(self, scope: Scope, receive: Receive) -> None:
+        headers = Headers(scope=scope)
+        self._receive = receive
+        self._watcher_reads_body = (
+            headers.get("content-length", "0") == "0"
+            and "transfer-encoding" not in headers
+        )
+        self._pending: Message | None = None
+        self._body_complete = anyio.Event()
+        self._disconnected = anyio.Event()
+
+    @property
+    def disconnected(self) -> bool:
+        return self._disconnected.is_set()
+
+    async def receive(self) -> Message:
+        if self._watcher_reads_body:
+            await self._body_complete.wait()
+        if self._pending is not None:
+            message, self._pending = self._pending, None
+            return message
+        if self._body_complete.is_set() or self.disconnected:
+            await self._disconnected.wait()
+            return {"type": "http.disconnect"}
+        message = await self._receive()
+        if message["type"] == "http.disconnect":
+            self._disconnected.set()
+        elif not message.get("more_body", False):
+            self._body_complete.set()
+        return message
+
+    async def run(self, on_disconnect: Callable[[], None]) -> None:
+        if self._watcher_reads_body:
+            message = await self._receive()
+            if message["type"] != "http.disconnect":
+                self._pending = message
+                self._body_complete.set()
+                message = await self._receive()
+        else:
+            await self._body_complete.wait()
+            message = await self._receive()
+        while message["type"] != "http.disconnect":
+            message = await self._receive()
+        self._disconnected.set()
+        self._body_complete.set()
+        on_disconnect()
+
+
+class DeadlineMiddleware:
+    """Bounds each request by a deadline and cancels it when the client disconnects
+
+    The deadline (the route's `@deadline(...)`, `default` otherwise) covers everything
+    the request awaits, Storage calls included, until the response starts: past it
+    the handler is cancelled and a 504 is sent. The remaining time is also given to
+    Postgres as `statement_timeout` (see `set_statement_timeout`), which stops
+    queries that the cancellation cannot reach, in the thread pool.
+    """
+
+    def __init__(
+        self, app: ASGIApp, router: Router, default: float | None = None
+    ) -> None:
+        self.app = app
+        self.timeouts = RouteSettings(router, "__deadline__")
+        self.default = default or None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout = self.timeouts.lookup(scope, self.default)
+        watcher = _DisconnectWatcher(scope, receive)
+        response_started = response_complete = False
+        error: Exception | None = None
+
+        request_deadline = _RequestDeadline(
+            time.monotonic() + timeout if timeout else None
+        )
+        with anyio.CancelScope() as deadline_scope:
+            if timeout:
+                deadline_scope.deadline = anyio.current_time() + timeout
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal response_started, response_complete
+                if message["type"] == "http.response.start":
+                    response_started = True
+                    # Bounds the time to respond, not how long the client reads a stream
+                    deadline_scope.deadline = math.inf
+                    request_deadline.at = None
+                elif message["type"] == "http.response.body" and not message.get(
+                    "more_body"
+                ):
+                    response_complete = True
+                await send(message)
+
+            token = _deadline.set(request_deadline)
+            # A bare task rather than a task group, several times cheaper per request
+            watcher_task = asyncio.create_task(watcher.run(deadline_scope.cancel))
+            try:
+                await self.app(scope, watcher.receive, send_wrapper)
+            except Exception as e:
+                error = e
+            finally:
+                watcher_task.cancel()
+                _deadline.reset(token)
+
+        # Servers also report a disconnect once the response is complete
+        if watcher.disconnected and not response_complete:
+            logger.info(
+                f"Client disconnected, cancelled {scope['method']} {scope['path']}"
+            )
+            return
+        timed_out = deadline_scope.cancelled_caught or (
+            error is not None and _is_query_canceled(error)
+        )
+        if timed_out and not response_started:
+            logger.warning(
+                f"Deadline of {timeout}s exceeded: {scope['method']} {scope['path']}"
+            )
+            response = JSONResponse(
+                {"detail": "Request deadline exceeded"}, status_code=504
+            )
+            await response(scope, receive, send)
+            return
+        if error is not None:
+            raise error
@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.compression import parse_accept_encoding
+
+try:  # extra "compression"
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = "openapi.json"
+
+
+def serialize_schema(schema: dict[str, Any]) -> bytes:
+    """Same bytes as FastAPI's own openapi.json route (JSONResponse)"""
+    return json.dumps(
+        schema, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Proxies that compress on their own may weaken the ETag (W/"...")
+    return any(
+        tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(",")
+    )
+
+
+class OpenAPIDocument:
+    """openapi.json serialized once, with its gzip/brotli variants and ETag"""
+
+    def __init__(self, body: bytes, encoded: dict[str, bytes] | None = None) -> None:
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.encoded = dict(encoded or {})
+        if "gzip" not in self.encoded:
+            # mtime=0: identical bytes for identical schemas, on every worker
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if "br" not in self.encoded and brotli is not None:
+            self.encoded["br"] = brotli.compress(body, quality=11)
+        # Response headers are built here, not per request
+        common = {
+            "etag": self.etag,
+            "vary": "Accept-Encoding",
+            "cache-control": "no-cache",
+        }
+        self._headers: dict[str | None, dict[str, str]] = {None: common}
+        for coding in self.encoded:
+            self._headers[coding] = {**common, "content-encoding": coding}
+
+    @classmethod
+    def from_app(cls, app: FastAPI) -> "OpenAPIDocument":
+        return cls(serialize_schema(app.openapi()))
+
+    # Static artifact
+
+    def write(self, directory: str | Path) -> list[Path]:
+        """Write openapi.json and its .gz/.br variants (servable as is by a proxy)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = [directory / ARTIFACT_NAME]
+        paths[0].write_bytes(self.body)
+        for coding, data in self.encoded.items():
+            suffix = ".gz" if coding == "gzip" else f".{coding}"
+            path = directory / f"{ARTIFACT_NAME}{suffix}"
+            path.write_bytes(data)
+            paths.append(path)
+        return paths
+
+    @classmethod
+    def read(cls, directory: str | Path) -> "OpenAPIDocument":
+        directory = Path(directory)
+        encoded = {}
+        for coding, suffix in (("gzip", ".gz"), ("br", ".br")):
+            path = directory / f"{ARTIFACT_NAME}{suffix}"
+            if path.exists():
+                encoded[coding] = path.read_bytes()
+        return cls((directory / ARTIFACT_NAME).read_bytes(), encoded)
+
+    # Serving
+
+    def response(self, request: Request) -> Response:
+        if _etag_matches(request.headers.get("if-none-match", ""), self.etag):
+            return Response(status_code=304, headers=self._headers[None])
+        accepted = parse_accept_encoding(request.headers.get("accept-encoding", ""))
+        for coding in ("br", "gzip"):
+            if coding in accepted and coding in self.encoded:
+                return Response(
+                    self.encoded[coding],
+                    media_type="application/json",
+                    headers=self._headers[coding],
+                )
+        return Response(
+            self.body, media_type="application/json", headers=self._headers[None]
+        )
+
+
+class OpenAPICache:
+    """Replaces FastAPI's openapi.json route with a precomputed document
+
+    The document is read from `artifact_dir` when given (see `python -m app.utils.openapi`),
+    otherwise generated from the app by `prepare()` at startup, or on the first request
+    if the app was not started.
+    """
+
+    def __init__(self, artifact_dir: str | None = None) -> None:
+        self.artifact_dir = artifact_dir
+        self.document: OpenAPIDocument | None = None
+        self.app: FastAPI | None = None
+
+    def install(self, app: FastAPI) -> None:
+        if not app.openapi_url:
+            return
+        self.app = app
+        app.router.routes = [
+            route
+            for route in app.router.routes
+            if getattr(route, "path", None) != app.openapi_url
+        ]
+        app.add_route(app.openapi_url, self.endpoint, include_in_schema=False)
+
+    def prepare(self) -> OpenAPIDocument:
+        if self.document is None:
+            if self.artifact_dir:
+                self.document = OpenAPIDocument.read(self.artifact_dir)
+                logger.info(f"OpenAPI schema loaded from {self.artifact_dir}")
+            else:
+                assert self.app is not None, "install() the cache on an app first"
+                self.document = OpenAPIDocument.from_app(self.app)
+        return self.document
+
+    async def endpoint(self, request: Request) -> Response:
+        return self.prepare().response(request)
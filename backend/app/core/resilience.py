@@ -0,0 +1,196 @@
+import json
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal, TypeVar
+
+from fastapi import HTTPException
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether the upstream may well succeed if called again: 5xx, 429, network errors"""
+    # storage3 and gotrue errors carry the HTTP status (gotrue uses 0 without response)
+    status = getattr(exc, "status", None)
+    if status is not None:
+        try:
+            status = int(status)
+        except (TypeError, ValueError):
+            return False
+        return status == 0 or status == 429 or status >= 500
+    # httpx is loaded along with the supabase client whose call failed
+    import httpx
+
+    # storage3 decodes error bodies as JSON: the HTML error page of a proxy fails
+    return isinstance(exc, httpx.TransportError | json.JSONDecodeError | TimeoutError)
+
+
+class CircuitOpenError(HTTPException):
+    def __init__(self, upstream: str, retry_after: float) -> None:
+        super().__init__(
+            status_code=503,
+            detail=f"{upstream} is unavailable, retry later",
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+        )
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive transient failures
+
+    Open, it rejects every call for `reset_timeout` seconds, then lets a single
+    trial call through (half open): its success closes the circuit, its failure
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def before_call(self) -> None:
+        if self.state == "closed":
+            return
+        retry_after = self._opened_at + self.reset_timeout - time.monotonic()
+        if self.state == "open" and retry_after <= 0:
+            self.state = "half_open"
+            logger.info(f"Circuit of {self.name} half open, trying a call")
+        if self.state == "open" or self._trial_running:
+            self.rejected += 1
+            raise CircuitOpenError(
+                self.name, retry_after if self.state == "open" else 1
+            )
+        self._trial_running = True
+
+    def record_success(self) -> None:
+        self._trial_running = False
+        self.failures = 0
+        if self.state != "closed":
+            logger.info(f"Circuit of {self.name} closed")
+            self.state = "closed"
+
+    def record_cancelled(self) -> None:
+        # The trial call, if any, did not conclude: let the next one through
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._trial_running = False
+        self.failures += 1
+        if self.state == "half_open" or (
+            self.state == "closed" and self.failures >= self.failure_threshold
+        ):
+            logger.warning(
+                f"Circuit of {self.name} open for {self.reset_timeout}s "
+                f"after {self.failures} failures"
+            )
+            self.state = "open"
+            self.opened += 1
+            self._opened_at = time.monotonic()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class Upstream:
+    """Calls to an external service, through its circuit breaker
+
+    Idempotent calls failing with a transient error are retried, up to `attempts`
+    times, after a random wait growing exponentially up to `max_wait` (full
+    jitter: clients failing together do not retry together). Other calls are
+    made once, since the first attempt may have been applied.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int,
+        initial_wait: float,
+        max_wait: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ) -> None:
+        self.name = name
+        self.attempts = attempts
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+    async def _attempt(
+        self, operation: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        self.breaker.before_call()
+        try:
+            result = await operation(*args, **kwargs)
+        except Exception as e:
+            if is_transient(e):
+                self.breaker.record_failure()
+            else:
+                # A 4xx is the caller's problem, the upstream answered fine
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled (deadline, disconnect)
+            self.breaker.record_cancelled()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def call(
+        self,
+        operation: Callable[..., Awaitable[T]],
+        *args: Any,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> T:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.attempts if idempotent else 1),
+            wait=wait_random_exponential(
+                multiplier=self.initial_wait, max=self.max_wait
+            ),
+            retry=retry_if_exception(is_transient),
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+            reraise=True,
+        )
+        return await retrying(self._attempt, operation, *args, **kwargs)
+
+
+def _upstream(name: str) -> Upstream:
+    return Upstream(
+        name,
+        attempts=settings.UPSTREAM_RETRY_ATTEMPTS,
+        initial_wait=settings.UPSTREAM_RETRY_INITIAL_WAIT,
+        max_wait=settings.UPSTREAM_RETRY_MAX_WAIT,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+    )
+
+
+storage_upstream = _upstream("Storage")
+auth_upstream = _upstream("Auth")
+upstreams = {"storage": storage_upstream, "auth": auth_upstream}
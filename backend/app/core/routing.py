@@ -0,0 +1,48 @@
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from starlette.routing import BaseRoute, Match, Router
+from starlette.types import Scope
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def route_setting(attribute: str, value: Any) -> Callable[[F], F]:
+    """Decorator storing `value` on the endpoint, for a middleware to find"""
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, attribute, value)
+        return endpoint
+
+    return decorator
+
+
+class RouteSettings:
+    """Endpoint settings looked up by a middleware, i.e. before the router runs
+
+    Only the routes carrying the attribute are matched (their method first): a
+    request to any other route costs a few comparisons, not a full routing pass.
+    """
+
+    def __init__(self, router: Router, attribute: str) -> None:
+        self.router = router
+        self.attribute = attribute
+        self._routes: list[tuple[BaseRoute, set[str] | None, Any]] | None = None
+
+    def lookup(self, scope: Scope, default: Any = None) -> Any:
+        if self._routes is None:
+            # Collected on first use: the routes are all added by then
+            self._routes = []
+            for route in self.router.routes:
+                endpoint = getattr(route, "endpoint", None)
+                if hasattr(endpoint, self.attribute):
+                    methods = getattr(route, "methods", None)
+                    self._routes.append(
+                        (route, methods, getattr(endpoint, self.attribute))
+                    )
+        for route, methods, value in self._routes:
+            if methods and scope["method"] not in methods:
+                continue
+            if route.matches(scope)[0] == Match.FULL:
+                return value
+        return default
@@ -0,0 +1,100 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class _Counters:
+    _flights: dict[Hashable, Any]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.collapsed = 0
+
+    def metrics(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._flights),
+        }
+
+
+class _Abandoned(Exception):
+    pass
+
+
+class _AsyncFlight:
+    __slots__ = ("result",)
+
+    def __init__(self) -> None:
+        # Created when a second caller joins: a lone call needs no event loop object
+        self.result: asyncio.Future[Any] | None = None
+
+
+class SingleFlight(_Counters):
+    """Identical concurrent calls (same key) share one call and its result
+
+    The first caller makes the call. If it is cancelled (its deadline, its
+    client leaving), the callers waiting for it are not: one of them makes the
+    call again for the others.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._flights: dict[Hashable, _AsyncFlight] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        operation: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        self.calls += 1
+        while (flight := self._flights.get(key)) is not None:
+            if flight.result is None:
+                flight.result = asyncio.get_running_loop().create_future()
+            self.collapsed += 1
+            try:
+                return await asyncio.shield(flight.result)
+            except _Abandoned:
+                self.collapsed -= 1
+        flight = self._flights[key] = _AsyncFlight()
+        try:
+            result = await operation(*args, **kwargs)
+        except Exception as e:
+            self._land(key, flight, exception=e)
+            raise
+        except BaseException:
+            self._land(key, flight, exception=_Abandoned())
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    def _land(
+        self,
+        key: Hashable,
+        flight: _AsyncFlight,
+        result: Any = None,
+        exception: BaseException | None = None,
+    ) -> None:
+        del self._flights[key]
+        if flight.result is None:
+            return
+        if exception is None:
+            flight.result.set_result(result)
+        else:
+            flight.result.set_exception(exception)
+            # Marked as retrieved: the callers may all have been cancelled meanwhile
+            flight.result.exception()
+
+
+# Counters of every flight, served by GET /utils/coalescing/
+flights: dict[str, _Counters] = {}
+
+
+def single_flight(name: str) -> SingleFlight:
+    flights[name] = flight = SingleFlight(name)
+    return flight
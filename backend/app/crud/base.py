@@ -1,10 +1,29 @@
 import uuid
-from collections.abc import Sequence
-from typing import Generic, TypeVar
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from datetime import datetime
+from typing import Any, Generic, TypeVar
 
-from sqlmodel import Session, SQLModel, select
+from pydantic_core import to_jsonable_python
+from sqlalchemy import (
+    ColumnClause,
+    Float,
+    RowMapping,
+    Table,
+    cast,
+    func,
+    insert,
+    literal,
+    literal_column,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.sql import Select
+from sqlmodel import Session, SQLModel, col, select
 
+from app.core.config import settings
 from app.models.base import RLSModel
+from app.models.outbox import OutboxEvent, OutboxOperation
+from app.utils.search import build_prefix_tsquery
 
 ModelType = TypeVar("ModelType", bound=RLSModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
@@ -22,6 +41,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    @property
+    def table(self) -> Table:
+        """The model's table, for statements over plain columns"""
+        table: Table = self.model.__table__  # type: ignore[attr-defined]
+        return table
+
     def get(self, session: Session, *, id: uuid.UUID) -> ModelType | None:
         """Get a single record by id"""
         statement = select(self.model).where(self.model.id == id)
@@ -36,16 +61,132 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = session.exec(statement)
         return result.all()
 
+    def _stream_statement(self, *, owner_id: uuid.UUID) -> Select[Any]:
+        """Build the statement used by stream, over plain table columns"""
+        table = self.table
+        return table.select().where(table.c.owner_id == owner_id).order_by(table.c.id)
+
+    def stream(
+        self, session: Session, *, owner_id: uuid.UUID, batch_size: int = 1000
+    ) -> Iterator[RowMapping]:
+        """Stream all of the owner's rows through a server-side cursor.
+
+        Rows are plain mappings (not ORM instances) so the identity map does
+        not grow and memory stays constant whatever the number of rows.
+        """
+        statement = self._stream_statement(owner_id=owner_id)
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        yield from result.mappings()
+
+    def _search_statement(
+        self,
+        *,
+        query: str,
+        owner_id: uuid.UUID,
+        after: tuple[float, uuid.UUID] | None,
+        limit: int,
+    ) -> Select[Any] | None:
+        """Build the ranked full-text statement on the generated search_vector column"""
+        tsquery_text = build_prefix_tsquery(query)
+        if not self.model.__search_fields__ or tsquery_text is None:
+            return None
+        vector: ColumnClause[Any] = literal_column(
+            f"{self.model.__tablename__}.search_vector"
+        )
+        tsquery = func.to_tsquery(
+            cast(self.model.__search_config__, REGCONFIG), tsquery_text
+        )
+        # ts_rank is real (float4) and comes back rounded to its text form: the
+        # cursor must compare in float8, or the page's last row would repeat
+        rank = cast(func.ts_rank(vector, tsquery), Float(53))
+        statement = (
+            select(self.model, rank.label("rank"))
+            .where(vector.op("@@")(tsquery), col(self.model.owner_id) == owner_id)
+            .order_by(rank.desc(), col(self.model.id).desc())
+            .limit(limit)
+        )
+        if after is not None:
+            statement = statement.where(
+                tuple_(rank, col(self.model.id)) < tuple_(*map(literal, after))
+            )
+        return statement
+
+    def search(
+        self,
+        session: Session,
+        *,
+        query: str,
+        owner_id: uuid.UUID,
+        after: tuple[float, uuid.UUID] | None = None,
+        limit: int = 20,
+    ) -> list[tuple[ModelType, float]]:
+        """Full-text search over the owner's records, ranked, with keyset pagination"""
+        statement = self._search_statement(
+            query=query, owner_id=owner_id, after=after, limit=limit
+        )
+        if statement is None:
+            return []
+        return [(obj, rank) for obj, rank in session.execute(statement)]
+
+    def _record_changes(
+        self, session: Session, op: OutboxOperation, rows: Iterable[Mapping[Any, Any]]
+    ) -> None:
+        """Add outbox events for changed rows, committed along with the change
+
+        Rows need at least id and owner_id. Nothing is recorded when no webhook
+        is configured, so that undelivered events do not pile up.
+        """
+        if settings.OUTBOX_WEBHOOK_URL is None:
+            return
+        now = datetime.utcnow()
+        values = [
+            {
+                "table_name": self.model.__tablename__,
+                "op": op,
+                "record_id": row["id"],
+                "owner_id": row["owner_id"],
+                "payload": to_jsonable_python(dict(row)),
+                "created_at": now,
+                "available_at": now,
+                "attempts": 0,
+            }
+            for row in rows
+        ]
+        if values:
+            session.execute(insert(OutboxEvent), values)
+
     def create(
         self, session: Session, *, owner_id: uuid.UUID, obj_in: CreateSchemaType
     ) -> ModelType:
         """Create new record"""
         db_obj = self.model(**dict(owner_id=owner_id, **obj_in.model_dump()))
         session.add(db_obj)
+        self._record_changes(session, "insert", [db_obj.model_dump()])
         session.commit()
         session.refresh(db_obj)
         return db_obj
 
+    def create_multi(
+        self,
+        session: Session,
+        *,
+        owner_id: uuid.UUID,
+        objs_in: Sequence[CreateSchemaType],
+        commit: bool = True,
+    ) -> list[uuid.UUID]:
+        """Insert many records with a single executemany, return their ids"""
+        if not objs_in:
+            return []
+        values = [
+            self.model(**dict(owner_id=owner_id, **obj_in.model_dump())).model_dump()
+            for obj_in in objs_in
+        ]
+        session.execute(insert(self.model), values)
+        self._record_changes(session, "insert", values)
+        if commit:
+            session.commit()
+        return [value["id"] for value in values]
+
     def update(
         self, session: Session, *, id: uuid.UUID, obj_in: UpdateSchemaType
     ) -> ModelType | None:
@@ -56,6 +197,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db_obj.sqlmodel_update(update_data)
 
             session.add(db_obj)
+            self._record_changes(session, "update", [db_obj.model_dump()])
             session.commit()
             session.refresh(db_obj)
         return db_obj
@@ -64,6 +206,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Remove a record"""
         obj = self.get(session, id=id)
         if obj:
+            self._record_changes(session, "delete", [obj.model_dump()])
             session.delete(obj)
             session.commit()
         return obj
@@ -3,6 +3,7 @@ import uuid
 from sqlmodel import Session
 
 from app.crud.base import CRUDBase
+from app.crud.file import file_metadata
 from app.models.item import Item, ItemCreate, ItemUpdate
 
 
@@ -17,5 +18,10 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
     ) -> Item | None:
         return super().update(session, id=id, obj_in=obj_in)
 
+    def remove(self, session: Session, *, id: uuid.UUID) -> Item | None:
+        """Remove an item; its files are deleted along with it (ON DELETE CASCADE)"""
+        file_metadata.record_item_removal(session, item_id=id)
+        return super().remove(session, id=id)
+
 
 item = CRUDItem(Item)
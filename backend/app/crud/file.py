@@ -1,8 +1,13 @@
 import uuid
+from collections.abc import Iterator
 from datetime import datetime
+from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import ColumnElement, RowMapping, delete, update
+from sqlalchemy.sql import Select
+from sqlmodel import Session, col, func, select
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.file import FileMetadata, FileMetadataCreate, FileMetadataUpdate
 
@@ -25,6 +30,7 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
             # Mettre à jour l'objet
             db_obj.sqlmodel_update(update_data)
             session.add(db_obj)
+            self._record_changes(session, "update", [db_obj.model_dump()])
             session.commit()
             session.refresh(db_obj)
         return db_obj
@@ -56,5 +62,193 @@ class CRUDFileMetadata(CRUDBase[FileMetadata, FileMetadataCreate, FileMetadataUp
             .offset(skip).limit(limit)
         return list(session.exec(statement))
 
+    def get_multi_by_ids(
+        self, session: Session, *, ids: list[uuid.UUID]
+    ) -> list[FileMetadata]:
+        """Récupérer plusieurs fichiers en une requête"""
+        statement = select(self.model).where(col(self.model.id).in_(ids))
+        return list(session.exec(statement))
+
+    def set_processing_status(
+        self, session: Session, *, ids: list[uuid.UUID], status: str
+    ) -> None:
+        """Mettre à jour le statut de traitement de plusieurs fichiers en une requête"""
+        statement = update(self.model)\
+            .where(col(self.model.id).in_(ids))\
+            .values(processing_status=status, updated_at=datetime.utcnow())
+        session.execute(statement)
+        session.commit()
+
+    def get_by_content_hash(
+        self,
+        session: Session,
+        *,
+        owner_id: uuid.UUID,
+        bucket_name: str,
+        content_hash: str,
+    ) -> list[FileMetadata]:
+        """Récupérer les fichiers d'un utilisateur ayant le même contenu dans un bucket"""
+        statement = select(self.model)\
+            .where(
+                self.model.bucket_name == bucket_name,
+                self.model.owner_id == owner_id,
+                self.model.content_hash == content_hash,
+            )\
+            .order_by(col(self.model.created_at))
+        return list(session.exec(statement))
+
+    def get_by_path(
+        self, session: Session, *, owner_id: uuid.UUID, bucket_name: str, path: str
+    ) -> FileMetadata | None:
+        """Récupérer les métadonnées d'un utilisateur pour un objet du storage"""
+        statement = select(self.model)\
+            .where(
+                self.model.bucket_name == bucket_name,
+                self.model.owner_id == owner_id,
+                self.model.path == path,
+            )\
+            .order_by(col(self.model.created_at))
+        return session.exec(statement).first()
+
+    def count_references(
+        self, session: Session, *, bucket_name: str, path: str
+    ) -> int:
+        """Nombre de métadonnées pointant vers un même objet du storage"""
+        statement = select(func.count())\
+            .select_from(self.model)\
+            .where(self.model.bucket_name == bucket_name, self.model.path == path)
+        return session.exec(statement).one()
+
+    def remove_multi(
+        self,
+        session: Session,
+        *,
+        owner_id: uuid.UUID,
+        ids: list[uuid.UUID] | None = None,
+        item_id: uuid.UUID | None = None,
+        bucket_name: str | None = None,
+    ) -> list[RowMapping]:
+        """Supprimer en une requête les fichiers d'un utilisateur correspondant aux filtres
+        
+        Retourne bucket, chemin et dérivés des lignes supprimées (DELETE ... RETURNING).
+        """
+        table = self.table
+        statement = delete(table).where(table.c.owner_id == owner_id)
+        if ids is not None:
+            statement = statement.where(table.c.id.in_(ids))
+        if item_id:
+            statement = statement.where(table.c.item_id == item_id)
+        if bucket_name:
+            statement = statement.where(table.c.bucket_name == bucket_name)
+        returning = statement.returning(
+            table.c.id, table.c.bucket_name, table.c.path, table.c.derivatives
+        )
+        rows = list(session.execute(returning).mappings())
+        self._record_changes(
+            session, "delete", [{**row, "owner_id": owner_id} for row in rows]
+        )
+        session.commit()
+        return rows
+
+    def record_item_removal(self, session: Session, *, item_id: uuid.UUID) -> None:
+        """Enregistre la suppression des fichiers d'un item, avant de supprimer l'item
+        
+        La base les supprime en cascade (ON DELETE CASCADE), sans passer par ce CRUD :
+        leurs événements sont ajoutés ici, dans la transaction de la suppression.
+        """
+        if settings.OUTBOX_WEBHOOK_URL is None:
+            return
+        table = self.table
+        rows = session.execute(table.select().where(table.c.item_id == item_id)).mappings()
+        self._record_changes(session, "delete", rows)
+
+    def get_referenced_paths(
+        self, session: Session, *, bucket_name: str, paths: list[str]
+    ) -> set[str]:
+        """Parmi ces chemins, ceux encore référencés par des métadonnées"""
+        if not paths:
+            return set()
+        statement = select(self.model.path)\
+            .where(self.model.bucket_name == bucket_name, col(self.model.path).in_(paths))\
+            .distinct()
+        return set(session.exec(statement))
+
+    def _stream_statement(
+        self,
+        *,
+        owner_id: uuid.UUID,
+        bucket_name: str | None = None,
+        item_id: uuid.UUID | None = None,
+    ) -> Select[Any]:
+        statement = super()._stream_statement(owner_id=owner_id)
+        if bucket_name:
+            statement = statement.where(col(self.model.bucket_name) == bucket_name)
+        if item_id:
+            statement = statement.where(col(self.model.item_id) == item_id)
+        return statement
+
+    def stream(
+        self,
+        session: Session,
+        *,
+        owner_id: uuid.UUID,
+        batch_size: int = 1000,
+        bucket_name: str | None = None,
+        item_id: uuid.UUID | None = None,
+    ) -> Iterator[RowMapping]:
+        """Parcourt les métadonnées de l'utilisateur via un curseur côté serveur"""
+        statement = self._stream_statement(
+            owner_id=owner_id, bucket_name=bucket_name, item_id=item_id
+        )
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        yield from result.mappings()
+
+    def stream_paths(
+        self, session: Session, *, bucket_name: str, batch_size: int = 1000
+    ) -> Iterator[RowMapping]:
+        """Parcourt id, chemin et date de création des fichiers d'un bucket, triés par chemin (ordre binaire)"""
+        table = self.table
+        path: ColumnElement[str] = table.c.path
+        if session.get_bind().dialect.name == "postgresql":
+            # Ordre binaire, comme le listing du storage (COLLATE "C")
+            path = path.collate("C")
+        statement = select(table.c.id, table.c.path, table.c.created_at)\
+            .where(table.c.bucket_name == bucket_name)\
+            .order_by(path, table.c.id)
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        yield from result.mappings()
+
+    def remove_by_ids(self, session: Session, *, ids: list[uuid.UUID]) -> int:
+        """Supprimer plusieurs fichiers en une requête, retourne le nombre de lignes supprimées"""
+        if not ids:
+            return 0
+        statement = delete(self.model)\
+            .where(col(self.model.id).in_(ids))\
+            .returning(col(self.model.id), col(self.model.owner_id))
+        rows = list(session.execute(statement).mappings())
+        self._record_changes(session, "delete", rows)
+        session.commit()
+        return len(rows)
+
+    def search(
+        self,
+        session: Session,
+        *,
+        query: str,
+        owner_id: uuid.UUID,
+        after: tuple[float, uuid.UUID] | None = None,
+        limit: int = 20,
+        bucket_name: str | None = None,
+    ) -> list[tuple[FileMetadata, float]]:
+        """Recherche plein texte sur le nom et la description des fichiers"""
+        statement = self._search_statement(
+            query=query, owner_id=owner_id, after=after, limit=limit
+        )
+        if statement is None:
+            return []
+        if bucket_name:
+            statement = statement.where(col(self.model.bucket_name) == bucket_name)
+        return [(obj, rank) for obj, rank in session.execute(statement)]
+
 
 file_metadata = CRUDFileMetadata(FileMetadata)
@@ -0,0 +1,42 @@
+"""In-memory stand-ins for Supabase Auth (GoTrue) and Storage
+
+Enabled with `SUPABASE_FAKE=true` (ENVIRONMENT=local only): the test and benchmark
+entry points call `enable()` and then run without a Supabase project. Only the
+endpoints used by `app.core.auth`, `StorageService` and the tests are implemented.
+"""
+
+from typing import TYPE_CHECKING
+
+from app.fake_supabase.mirror import mirror_user, unmirror_user
+from app.fake_supabase.server import FakeSupabase, FakeSupabaseServer
+
+if TYPE_CHECKING:
+    from app.core.config import Settings
+
+__all__ = [
+    "FakeSupabase",
+    "FakeSupabaseServer",
+    "enable",
+    "mirror_user",
+    "unmirror_user",
+]
+
+_server: FakeSupabaseServer | None = None
+
+
+def enable(settings: "Settings") -> FakeSupabaseServer:
+    """Start the in-process fake (once) and point the Supabase settings at it"""
+    global _server
+    if _server is None:
+        fake = FakeSupabase(
+            settings.SECRET_KEY,
+            on_user_created=mirror_user,
+            on_user_deleted=unmirror_user,
+        )
+        _server = FakeSupabaseServer(fake)
+        _server.start()
+    settings.SUPABASE_URL = _server.url
+    # SUPABASE_KEY is the service_role key as well (see Settings)
+    settings.SUPABASE_KEY = _server.fake.service_key
+    settings.SUPABASE_SERVICE_KEY = _server.fake.service_key
+    return _server
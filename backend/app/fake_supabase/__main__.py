@@ -0,0 +1,34 @@
+import argparse
+
+import uvicorn
+
+from app.core.config import settings
+from app.fake_supabase import FakeSupabase, mirror_user, unmirror_user
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.fake_supabase",
+        description="Serve the fake Supabase Auth and Storage APIs, e.g. for load tests",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--secret", default=settings.SECRET_KEY, help="JWT secret")
+    parser.add_argument(
+        "--mirror-users", action="store_true", help="copy created users into auth.users"
+    )
+    args = parser.parse_args()
+
+    fake = FakeSupabase(
+        args.secret,
+        on_user_created=mirror_user if args.mirror_users else None,
+        on_user_deleted=unmirror_user if args.mirror_users else None,
+    )
+    print(f"SUPABASE_URL=http://{args.host}:{args.port}")
+    print(f"SUPABASE_KEY={fake.service_key}")
+    print(f"SUPABASE_SERVICE_KEY={fake.service_key}")
+    uvicorn.run(fake.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
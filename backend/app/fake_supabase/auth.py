@@ -0,0 +1,276 @@
+import hashlib
+import logging
+import secrets
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import Body, FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+from app.fake_supabase import tokens
+
+logger = logging.getLogger(__name__)
+
+UserHook = Callable[[dict[str, Any]], None]
+
+
+class AuthError(Exception):
+    def __init__(self, status_code: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _hash_password(password: str, salt: str) -> str:
+    return hashlib.sha256(f"{salt}:{password}".encode()).hexdigest()
+
+
+class FakeAuth:
+    """The GoTrue endpoints used by the app and the tests, users kept in memory
+
+    Sign-ups are confirmed immediately and always return a session. `on_user_created`
+    and `on_user_deleted` let the caller mirror users elsewhere (e.g. `auth.users`).
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str,
+        token_ttl: int = 3600,
+        on_user_created: UserHook | None = None,
+        on_user_deleted: UserHook | None = None,
+    ) -> None:
+        self.jwt_secret = jwt_secret
+        self.token_ttl = token_ttl
+        self.on_user_created = on_user_created
+        self.on_user_deleted = on_user_deleted
+        self.users: dict[str, dict[str, Any]] = {}
+        self._passwords: dict[str, tuple[str, str]] = {}
+        self._refresh_tokens: dict[str, str] = {}
+        self.app = self._build_app()
+
+    # Users
+
+    def _find_by_email(self, email: str) -> dict[str, Any] | None:
+        email = email.lower()
+        return next((u for u in self.users.values() if u["email"] == email), None)
+
+    def create_user(
+        self,
+        email: str,
+        password: str | None,
+        user_metadata: dict[str, Any] | None = None,
+        app_metadata: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        if not email:
+            raise AuthError(400, "validation_failed", "An email address is required")
+        if self._find_by_email(email):
+            raise AuthError(
+                422,
+                "email_exists",
+                "A user with this email address has already been registered",
+            )
+        now = _now()
+        user_id = str(uuid.uuid4())
+        user: dict[str, Any] = {
+            "id": user_id,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email.lower(),
+            "phone": "",
+            "email_confirmed_at": now,
+            "confirmed_at": now,
+            "last_sign_in_at": None,
+            "app_metadata": {
+                "provider": "email",
+                "providers": ["email"],
+                **(app_metadata or {}),
+            },
+            "user_metadata": user_metadata or {},
+            "identities": [],
+            "created_at": now,
+            "updated_at": now,
+            "is_anonymous": False,
+        }
+        self.users[user_id] = user
+        if password is not None:
+            salt = secrets.token_hex(8)
+            self._passwords[user_id] = (salt, _hash_password(password, salt))
+        if self.on_user_created:
+            self.on_user_created(user)
+        return user
+
+    def delete_user(self, id: str) -> None:
+        user = self.users.pop(id, None)
+        if user is None:
+            raise AuthError(404, "user_not_found", "User not found")
+        self._passwords.pop(id, None)
+        self._refresh_tokens = {
+            token: user_id
+            for token, user_id in self._refresh_tokens.items()
+            if user_id != id
+        }
+        if self.on_user_deleted:
+            self.on_user_deleted(user)
+
+    # Tokens
+
+    def issue_session(self, user: dict[str, Any]) -> dict[str, Any]:
+        now = int(time.time())
+        user["last_sign_in_at"] = _now()
+        access_token = tokens.encode(
+            {
+                "sub": user["id"],
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": user["email"],
+                "app_metadata": user["app_metadata"],
+                "user_metadata": user["user_metadata"],
+                "session_id": str(uuid.uuid4()),
+                "iat": now,
+                "exp": now + self.token_ttl,
+            },
+            self.jwt_secret,
+        )
+        refresh_token = secrets.token_urlsafe(16)
+        self._refresh_tokens[refresh_token] = user["id"]
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": self.token_ttl,
+            "expires_at": now + self.token_ttl,
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    def _claims(self, authorization: str | None) -> dict[str, Any]:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            raise AuthError(
+                401, "no_authorization", "This endpoint requires a Bearer token"
+            )
+        try:
+            return tokens.decode(authorization[7:], self.jwt_secret)
+        except tokens.InvalidToken as e:
+            raise AuthError(403, "bad_jwt", f"invalid JWT: {e}") from e
+
+    def _require_service_role(self, authorization: str | None) -> None:
+        if self._claims(authorization).get("role") != "service_role":
+            raise AuthError(403, "not_admin", "User not allowed")
+
+    # ASGI app
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(openapi_url=None)
+
+        @app.exception_handler(AuthError)
+        async def auth_error_handler(request: Request, exc: AuthError) -> JSONResponse:  # noqa: ARG001
+            return JSONResponse(
+                status_code=exc.status_code,
+                content={
+                    "code": exc.status_code,
+                    "error_code": exc.code,
+                    "msg": exc.message,
+                },
+            )
+
+        @app.post("/signup")
+        async def signup(body: dict[str, Any] = Body(...)) -> dict[str, Any]:
+            options = body.get("options") or {}
+            user = self.create_user(
+                body.get("email", ""),
+                body.get("password"),
+                user_metadata=body.get("data") or options.get("data"),
+            )
+            return self.issue_session(user)
+
+        @app.post("/token")
+        async def token(
+            grant_type: str, body: dict[str, Any] = Body(...)
+        ) -> dict[str, Any]:
+            if grant_type == "password":
+                user = self._find_by_email(body.get("email", ""))
+                stored = self._passwords.get(user["id"]) if user else None
+                if (
+                    user is None
+                    or not stored
+                    or _hash_password(body.get("password", ""), stored[0]) != stored[1]
+                ):
+                    raise AuthError(
+                        400, "invalid_credentials", "Invalid login credentials"
+                    )
+                return self.issue_session(user)
+            if grant_type == "refresh_token":
+                user_id = self._refresh_tokens.pop(body.get("refresh_token", ""), None)
+                if user_id is None or user_id not in self.users:
+                    raise AuthError(
+                        400, "refresh_token_not_found", "Invalid Refresh Token"
+                    )
+                return self.issue_session(self.users[user_id])
+            raise AuthError(
+                400, "unsupported_grant_type", f"Unsupported grant type {grant_type}"
+            )
+
+        @app.get("/user")
+        async def get_user(authorization: str | None = Header(None)) -> dict[str, Any]:
+            claims = self._claims(authorization)
+            user = self.users.get(claims.get("sub", ""))
+            if user is None:
+                raise AuthError(
+                    403, "user_not_found", "User from sub claim in JWT does not exist"
+                )
+            return user
+
+        @app.post("/logout", status_code=204)
+        async def logout(authorization: str | None = Header(None)) -> None:
+            self._claims(authorization)
+
+        @app.get("/admin/users")
+        async def list_users(
+            # sent empty by the client when not given
+            page: str = "",
+            per_page: str = "",
+            authorization: str | None = Header(None),
+        ) -> dict[str, Any]:
+            self._require_service_role(authorization)
+            users = list(self.users.values())
+            size = int(per_page or 50)
+            start = (max(int(page or 1), 1) - 1) * size
+            return {"users": users[start : start + size], "aud": "authenticated"}
+
+        @app.post("/admin/users")
+        async def admin_create_user(
+            body: dict[str, Any] = Body(...), authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._require_service_role(authorization)
+            return self.create_user(
+                body.get("email", ""),
+                body.get("password"),
+                user_metadata=body.get("user_metadata"),
+                app_metadata=body.get("app_metadata"),
+            )
+
+        @app.get("/admin/users/{id}")
+        async def admin_get_user(
+            id: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._require_service_role(authorization)
+            if id not in self.users:
+                raise AuthError(404, "user_not_found", "User not found")
+            return self.users[id]
+
+        @app.delete("/admin/users/{id}")
+        async def admin_delete_user(
+            id: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._require_service_role(authorization)
+            self.delete_user(id)
+            return {}
+
+        return app
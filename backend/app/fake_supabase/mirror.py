@@ -0,0 +1,35 @@
+import logging
+import uuid
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+
+def mirror_user(user: dict[str, Any]) -> None:
+    """Copy a fake auth user into `auth.users` so foreign keys to it hold"""
+    from app.core.db import engine
+    from app.models import User
+
+    try:
+        with Session(engine) as session:
+            session.merge(User(id=uuid.UUID(user["id"]), email=user["email"]))
+            session.commit()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not mirror user {user['email']} into auth.users: {e!r}")
+
+
+def unmirror_user(user: dict[str, Any]) -> None:
+    from app.core.db import engine
+    from app.models import User
+
+    try:
+        with Session(engine) as session:
+            db_user = session.get(User, uuid.UUID(user["id"]))
+            if db_user is not None:
+                session.delete(db_user)
+                session.commit()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not remove user {user['email']} from auth.users: {e!r}")
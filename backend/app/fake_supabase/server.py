@@ -0,0 +1,93 @@
+import logging
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.fake_supabase import tokens
+from app.fake_supabase.auth import FakeAuth, UserHook
+from app.fake_supabase.storage import FakeStorage
+
+logger = logging.getLogger(__name__)
+
+
+class FakeSupabase:
+    """Auth and Storage stand-ins mounted where a Supabase project serves them"""
+
+    def __init__(
+        self,
+        jwt_secret: str,
+        on_user_created: UserHook | None = None,
+        on_user_deleted: UserHook | None = None,
+    ) -> None:
+        self.jwt_secret = jwt_secret
+        self.auth = FakeAuth(
+            jwt_secret, on_user_created=on_user_created, on_user_deleted=on_user_deleted
+        )
+        self.storage = FakeStorage(jwt_secret)
+        self.app = FastAPI(openapi_url=None)
+        self.app.mount("/auth/v1", self.auth.app)
+        self.app.mount("/storage/v1", self.storage.app)
+
+    @property
+    def anon_key(self) -> str:
+        return tokens.api_key("anon", self.jwt_secret)
+
+    @property
+    def service_key(self) -> str:
+        return tokens.api_key("service_role", self.jwt_secret)
+
+
+class FakeSupabaseServer:
+    """Serves a `FakeSupabase` over HTTP from a daemon thread
+
+    The Supabase clients build their own httpx clients, so the stand-ins are reached
+    through a real socket rather than an in-memory transport.
+    """
+
+    def __init__(
+        self, fake: FakeSupabase, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.fake = fake
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self.host, self.port = self._socket.getsockname()[:2]
+        self._server = uvicorn.Server(
+            uvicorn.Config(fake.app, log_level="warning", lifespan="off")
+        )
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> None:
+        self._thread = threading.Thread(
+            target=self._server.run,
+            kwargs={"sockets": [self._socket]},
+            name="fake-supabase",
+            daemon=True,
+        )
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Fake Supabase server did not start")
+            time.sleep(0.01)
+        logger.info(f"Fake Supabase listening on {self.url}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "FakeSupabaseServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
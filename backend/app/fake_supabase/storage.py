@@ -0,0 +1,392 @@
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import Body, FastAPI, File, Header, Request, Response, UploadFile
+from fastapi.responses import JSONResponse
+
+from app.fake_supabase import tokens
+
+
+class StorageError(Exception):
+    def __init__(self, status_code: int, error: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.error = error
+        self.message = message
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class StoredObject:
+    data: bytes
+    content_type: str
+    cache_control: str = "max-age=3600"
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+
+    def metadata(self) -> dict[str, Any]:
+        return {
+            "eTag": f'"{hashlib.md5(self.data).hexdigest()}"',
+            "size": len(self.data),
+            "mimetype": self.content_type,
+            "cacheControl": self.cache_control,
+            "lastModified": self.updated_at,
+            "contentLength": len(self.data),
+            "httpStatusCode": 200,
+        }
+
+
+@dataclass
+class Bucket:
+    id: str
+    public: bool = False
+    file_size_limit: int | None = None
+    allowed_mime_types: list[str] | None = None
+    created_at: str = field(default_factory=_now)
+    objects: dict[str, StoredObject] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.id,
+            "owner": "",
+            "public": self.public,
+            "file_size_limit": self.file_size_limit,
+            "allowed_mime_types": self.allowed_mime_types,
+            "created_at": self.created_at,
+            "updated_at": self.created_at,
+        }
+
+
+class FakeStorage:
+    """The Storage endpoints used by `StorageService`, objects kept in memory
+
+    Requests must carry a JWT signed with `jwt_secret` (any role); RLS policies on
+    `storage.objects` are not emulated. Signed URLs carry their own token.
+    """
+
+    def __init__(self, jwt_secret: str) -> None:
+        self.jwt_secret = jwt_secret
+        self.buckets: dict[str, Bucket] = {}
+        self.app = self._build_app()
+
+    def _bucket(self, id: str) -> Bucket:
+        if id not in self.buckets:
+            raise StorageError(404, "Bucket not found", "Bucket not found")
+        return self.buckets[id]
+
+    def _object(self, bucket_id: str, path: str) -> StoredObject:
+        obj = self._bucket(bucket_id).objects.get(path)
+        if obj is None:
+            raise StorageError(404, "not_found", "Object not found")
+        return obj
+
+    def _authorize(self, authorization: str | None) -> None:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            raise StorageError(
+                400, "Error", "headers must have required property 'authorization'"
+            )
+        try:
+            tokens.decode(authorization[7:], self.jwt_secret)
+        except tokens.InvalidToken as e:
+            raise StorageError(400, "Unauthorized", f"invalid JWT: {e}") from e
+
+    def _sign(self, url: str, expires_in: int) -> str:
+        return tokens.encode(
+            {"url": url, "exp": int(time.time()) + expires_in}, self.jwt_secret
+        )
+
+    def _check_signature(self, url: str, token: str) -> None:
+        try:
+            claims = tokens.decode(token, self.jwt_secret)
+        except tokens.InvalidToken as e:
+            raise StorageError(
+                400, "InvalidSignature", f"invalid signature: {e}"
+            ) from e
+        if claims.get("url") != url:
+            raise StorageError(
+                400, "InvalidSignature", "The url do not match the signature"
+            )
+
+    def put_object(
+        self,
+        bucket_id: str,
+        path: str,
+        data: bytes,
+        content_type: str | None,
+        upsert: bool = False,
+        cache_control: str | None = None,
+    ) -> dict[str, Any]:
+        bucket = self._bucket(bucket_id)
+        content_type = (content_type or "application/octet-stream").split(";")[0]
+        if bucket.file_size_limit is not None and len(data) > bucket.file_size_limit:
+            raise StorageError(
+                413, "Payload too large", "The object exceeded the maximum allowed size"
+            )
+        if bucket.allowed_mime_types and content_type not in bucket.allowed_mime_types:
+            raise StorageError(
+                415, "invalid_mime_type", f"mime type {content_type} is not supported"
+            )
+        existing = bucket.objects.get(path)
+        if existing is not None and not upsert:
+            raise StorageError(409, "Duplicate", "The resource already exists")
+        obj = StoredObject(data, content_type)
+        if cache_control:
+            obj.cache_control = f"max-age={cache_control}"
+        if existing is not None:
+            obj.id, obj.created_at = existing.id, existing.created_at
+        bucket.objects[path] = obj
+        return {"Key": f"{bucket_id}/{path}", "Id": obj.id}
+
+    def list_objects(
+        self, bucket_id: str, options: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """One level of the hierarchy under `prefix`, sub-folders as entries without id"""
+        bucket = self._bucket(bucket_id)
+        prefix = options.get("prefix") or ""
+        folder = f"{prefix.rstrip('/')}/" if prefix else ""
+        search = (options.get("search") or "").lower()
+        entries: dict[str, dict[str, Any]] = {}
+        for path, obj in bucket.objects.items():
+            if not path.startswith(folder):
+                continue
+            name, sep, _ = path[len(folder) :].partition("/")
+            if not name.lower().startswith(search) or name in entries:
+                continue
+            if sep:
+                entries[name] = {
+                    "name": name,
+                    "id": None,
+                    "updated_at": None,
+                    "created_at": None,
+                    "last_accessed_at": None,
+                    "metadata": None,
+                }
+            else:
+                entries[name] = {
+                    "name": name,
+                    "id": obj.id,
+                    "updated_at": obj.updated_at,
+                    "created_at": obj.created_at,
+                    "last_accessed_at": obj.updated_at,
+                    "metadata": obj.metadata(),
+                }
+        sort_by = options.get("sortBy") or {}
+        column = sort_by.get("column", "name")
+        result = sorted(
+            entries.values(),
+            key=lambda entry: (entry.get(column) is None, entry.get(column) or ""),
+            reverse=sort_by.get("order", "asc") == "desc",
+        )
+        offset = int(options.get("offset") or 0)
+        limit = int(options.get("limit") or 100)
+        return result[offset : offset + limit]
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(openapi_url=None)
+
+        @app.exception_handler(StorageError)
+        async def storage_error_handler(
+            request: Request, exc: StorageError
+        ) -> JSONResponse:  # noqa: ARG001
+            return JSONResponse(
+                # like the real API: HTTP 400, the actual status is in the body
+                status_code=400 if exc.status_code in (404, 409) else exc.status_code,
+                content={
+                    "statusCode": str(exc.status_code),
+                    "error": exc.error,
+                    "message": exc.message,
+                },
+            )
+
+        # Buckets
+
+        @app.get("/bucket")
+        async def list_buckets(
+            authorization: str | None = Header(None),
+        ) -> list[dict[str, Any]]:
+            self._authorize(authorization)
+            return [bucket.as_dict() for bucket in self.buckets.values()]
+
+        @app.get("/bucket/{id}")
+        async def get_bucket(
+            id: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            return self._bucket(id).as_dict()
+
+        @app.post("/bucket")
+        async def create_bucket(
+            body: dict[str, Any] = Body(...), authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            if body["id"] in self.buckets:
+                raise StorageError(409, "Duplicate", "The resource already exists")
+            self.buckets[body["id"]] = Bucket(
+                id=body["id"],
+                public=bool(body.get("public", False)),
+                file_size_limit=body.get("file_size_limit"),
+                allowed_mime_types=body.get("allowed_mime_types"),
+            )
+            return {"name": body["id"]}
+
+        @app.post("/bucket/{id}/empty")
+        async def empty_bucket(
+            id: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            self._bucket(id).objects.clear()
+            return {"message": "Successfully emptied"}
+
+        @app.delete("/bucket/{id}")
+        async def delete_bucket(
+            id: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            if self._bucket(id).objects:
+                raise StorageError(
+                    409, "InvalidRequest", "The bucket you tried to delete is not empty"
+                )
+            del self.buckets[id]
+            return {"message": "Successfully deleted"}
+
+        # Routes with a fixed prefix first, `/object/{bucket}/{path}` would swallow them
+
+        @app.post("/object/list/{bucket_id}")
+        async def list_objects(
+            bucket_id: str,
+            body: dict[str, Any] = Body(...),
+            authorization: str | None = Header(None),
+        ) -> list[dict[str, Any]]:
+            self._authorize(authorization)
+            return self.list_objects(bucket_id, body)
+
+        @app.post("/object/sign/{bucket_id}/{path:path}")
+        async def create_signed_url(
+            bucket_id: str,
+            path: str,
+            body: dict[str, Any] = Body(...),
+            authorization: str | None = Header(None),
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            self._object(bucket_id, path)
+            token = self._sign(f"{bucket_id}/{path}", int(body.get("expiresIn", 60)))
+            return {"signedURL": f"/object/sign/{bucket_id}/{path}?token={token}"}
+
+        @app.post("/object/sign/{bucket_id}")
+        async def create_signed_urls(
+            bucket_id: str,
+            body: dict[str, Any] = Body(...),
+            authorization: str | None = Header(None),
+        ) -> list[dict[str, Any]]:
+            self._authorize(authorization)
+            bucket = self._bucket(bucket_id)
+            expires_in = int(body.get("expiresIn", 60))
+            return [
+                {
+                    "path": path,
+                    "error": None
+                    if path in bucket.objects
+                    else "Either the object does not exist or you do not have access to it",
+                    "signedURL": (
+                        f"/object/sign/{bucket_id}/{path}?token={self._sign(f'{bucket_id}/{path}', expires_in)}"
+                        if path in bucket.objects
+                        else None
+                    ),
+                }
+                for path in body.get("paths", [])
+            ]
+
+        @app.get("/object/sign/{bucket_id}/{path:path}")
+        async def download_signed(bucket_id: str, path: str, token: str) -> Response:
+            self._check_signature(f"{bucket_id}/{path}", token)
+            obj = self._object(bucket_id, path)
+            return Response(obj.data, media_type=obj.content_type)
+
+        @app.post("/object/upload/sign/{bucket_id}/{path:path}")
+        async def create_signed_upload_url(
+            bucket_id: str, path: str, authorization: str | None = Header(None)
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            self._bucket(bucket_id)
+            token = self._sign(f"{bucket_id}/{path}", 2 * 3600)
+            return {"url": f"/object/upload/sign/{bucket_id}/{path}?token={token}"}
+
+        @app.put("/object/upload/sign/{bucket_id}/{path:path}")
+        async def upload_to_signed_url(
+            bucket_id: str, path: str, token: str, file: UploadFile = File(...)
+        ) -> dict[str, Any]:
+            self._check_signature(f"{bucket_id}/{path}", token)
+            return self.put_object(
+                bucket_id, path, await file.read(), file.content_type
+            )
+
+        @app.post("/object/{bucket_id}/{path:path}")
+        async def upload(
+            bucket_id: str,
+            path: str,
+            file: UploadFile = File(...),
+            x_upsert: str | None = Header(None),
+            authorization: str | None = Header(None),
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            return self.put_object(
+                bucket_id,
+                path,
+                await file.read(),
+                file.content_type,
+                upsert=x_upsert == "true",
+            )
+
+        @app.put("/object/{bucket_id}/{path:path}")
+        async def update(
+            bucket_id: str,
+            path: str,
+            file: UploadFile = File(...),
+            authorization: str | None = Header(None),
+        ) -> dict[str, Any]:
+            self._authorize(authorization)
+            self._object(bucket_id, path)
+            return self.put_object(
+                bucket_id, path, await file.read(), file.content_type, upsert=True
+            )
+
+        @app.get("/object/{bucket_id}/{path:path}")
+        async def download(
+            bucket_id: str, path: str, authorization: str | None = Header(None)
+        ) -> Response:
+            self._authorize(authorization)
+            obj = self._object(bucket_id, path)
+            return Response(obj.data, media_type=obj.content_type)
+
+        @app.delete("/object/{bucket_id}")
+        async def remove(
+            bucket_id: str,
+            body: dict[str, Any] = Body(...),
+            authorization: str | None = Header(None),
+        ) -> list[dict[str, Any]]:
+            self._authorize(authorization)
+            objects = self._bucket(bucket_id).objects
+            removed = []
+            for path in body.get("prefixes", []):
+                obj = objects.pop(path, None)
+                if obj is not None:
+                    removed.append(
+                        {
+                            "bucket_id": bucket_id,
+                            "name": path,
+                            "id": obj.id,
+                            "metadata": obj.metadata(),
+                        }
+                    )
+            return removed
+
+        return app
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any
+
+
+class InvalidToken(Exception):
+    """Malformed, badly signed or expired token"""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode(claims: dict[str, Any], secret: str) -> str:
+    """HS256 JWT, the format GoTrue issues and the Supabase clients expect"""
+    header = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signature = hmac.new(
+        secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256
+    ).digest()
+    return f"{header}.{payload}.{_b64encode(signature)}"
+
+
+def decode(token: str, secret: str) -> dict[str, Any]:
+    """Verify the signature and expiry, return the claims"""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(
+            secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256
+        ).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise InvalidToken("invalid signature")
+        claims: dict[str, Any] = json.loads(_b64decode(payload))
+    except (ValueError, json.JSONDecodeError) as e:
+        raise InvalidToken("malformed token") from e
+    if "exp" in claims and claims["exp"] < time.time():
+        raise InvalidToken("token is expired")
+    return claims
+
+
+def api_key(role: str, secret: str) -> str:
+    """Long-lived project key (`anon` or `service_role`), like the dashboard ones"""
+    now = int(time.time())
+    return encode(
+        {"iss": "supabase", "role": role, "iat": now, "exp": now + 10 * 365 * 86400},
+        secret,
+    )
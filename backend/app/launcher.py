@@ -0,0 +1,217 @@
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from types import FrameType
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+from app.core.config import settings
+from app.core.db import engine, replicas
+from app.main import app, openapi_cache, timestamp_log_config
+
+logger = logging.getLogger("uvicorn.error")
+
+# Exit code of a uvicorn server that could not start (uvicorn.server.STARTUP_FAILURE)
+STARTUP_FAILURE = 3
+
+
+def default_workers() -> int:
+    """CPUs this process may run on (cgroup/affinity aware where the OS allows)"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+class Launcher:
+    """Forked uvicorn workers sharing one listening socket
+
+    The app is imported (and its OpenAPI schema built) once, in the supervisor, then
+    `gc.freeze()` keeps the collector from touching those objects so the workers share
+    their pages copy-on-write. Workers that exit (e.g. recycled after `max_requests`)
+    are replaced; on SIGTERM/SIGINT they get `graceful_timeout` to finish in-flight
+    requests before being killed.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30.0,
+    ) -> None:
+        self.config = config
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.children: set[int] = set()
+        self.should_exit = False
+
+    # Supervisor
+
+    def run(self) -> int:
+        self.config.load()
+        # Shared by every worker instead of being built once per process
+        openapi_cache.prepare()
+        sock = self.config.bind_socket()
+        sock.set_inheritable(True)
+        gc.collect()
+        gc.freeze()
+        logger.info(
+            f"Preloaded app, {self.workers} workers, "
+            f"loop={'uvloop' if importlib.util.find_spec('uvloop') else 'asyncio'}, "
+            f"http={'httptools' if importlib.util.find_spec('httptools') else 'h11'}"
+        )
+
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        try:
+            for _ in range(self.workers):
+                self.spawn(sock)
+            while not self.should_exit:
+                self._reap(respawn_on=sock)
+                time.sleep(0.1)
+            return self._drain()
+        finally:
+            sock.close()
+
+    def _handle_exit(self, signum: int, frame: FrameType | None) -> None:  # noqa: ARG002
+        self.should_exit = True
+
+    def _reap(self, respawn_on: socket.socket | None = None) -> None:
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            self.children.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if respawn_on is None:
+                continue
+            if code == STARTUP_FAILURE:
+                # Every replacement would fail the same way (config, database...)
+                logger.error(f"Worker {pid} failed to start, shutting down")
+                self.should_exit = True
+                return
+            logger.info(f"Worker {pid} exited ({code}), starting a new one")
+            self.spawn(respawn_on)
+
+    def _drain(self) -> int:
+        """Ask workers to finish in-flight requests, kill those still running after the timeout"""
+        logger.info(f"Stopping {len(self.children)} workers")
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in self.children:
+            logger.warning(f"Worker {pid} did not stop in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+        while self.children:
+            self._reap()
+            time.sleep(0.05)
+        return 0
+
+    # Workers
+
+    def spawn(self, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+        code = 1
+        try:
+            code = self._worker(sock)
+        finally:
+            os._exit(code)
+
+    def _worker(self, sock: socket.socket) -> int:
+        # uvicorn installs its own handlers, the supervisor's must not run here
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()
+        # Connections inherited from the supervisor belong to it, not to this process
+        for owned in (engine, *replicas.engines):
+            owned.dispose(close=False)
+        if self.max_requests:
+            # Jitter: workers started together are not all recycled together
+            self.config.limit_max_requests = self.max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+        server = uvicorn.Server(self.config)
+        try:
+            server.run(sockets=[sock])
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve the app with preloaded, forked workers"
+    )
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.WEB_CONCURRENCY,
+        help="default: one per CPU",
+    )
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=settings.SERVER_KEEP_ALIVE)
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS,
+        help="0: never recycle",
+    )
+    parser.add_argument(
+        "--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT
+    )
+    parser.add_argument("--proxy-headers", action="store_true")
+    args = parser.parse_args()
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        # uvloop and httptools when installed (uvicorn[standard]), asyncio and h11 otherwise
+        loop="auto",
+        http="auto",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=args.proxy_headers,
+        log_config=timestamp_log_config(LOGGING_CONFIG),
+    )
+    workers = args.workers or default_workers()
+    if not hasattr(os, "fork"):
+        logger.warning("os.fork is not available, serving from a single process")
+        uvicorn.Server(config).run()
+        return
+    sys.exit(
+        Launcher(
+            config,
+            workers,
+            max_requests=args.max_requests,
+            max_requests_jitter=args.max_requests_jitter,
+            graceful_timeout=args.graceful_timeout,
+        ).run()
+    )
+
+
+if __name__ == "__main__":
+    main()
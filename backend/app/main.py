@@ -2,14 +2,21 @@ import logging
 from collections.abc import AsyncGenerator
 from typing import Any
 
-import uvicorn
 from fastapi import FastAPI
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from uvicorn.config import LOGGING_CONFIG
 
 from app.api.main import api_router
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.db import pool_wait
+from app.core.deadline import DeadlineMiddleware
+from app.core.openapi import OpenAPICache
+from app.services.cleanup import cleanup_queue
+from app.services.outbox import outbox_dispatcher
+from app.services.post_upload import post_upload_pipeline
+from app.services.realtime import change_feed
 from app.utils import custom_generate_unique_id
 
 logger = logging.getLogger("uvicorn")
@@ -20,8 +27,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:  # noqa ARG001
     """life span events"""
     try:
         logger.info("lifespan start")
+        openapi_cache.prepare()
+        await post_upload_pipeline.start()
+        await cleanup_queue.start()
+        await outbox_dispatcher.start()
         yield
     finally:
+        await change_feed.stop()
+        await outbox_dispatcher.stop()
+        await cleanup_queue.stop()
+        await post_upload_pipeline.stop()
         logger.info("lifespan exit")
 
 
@@ -34,6 +49,27 @@ app = FastAPI(
 )
 
 
+# Cancel requests past their deadline (504) or when the client disconnects
+app.add_middleware(
+    DeadlineMiddleware, router=app.router, default=settings.REQUEST_TIMEOUT
+)
+
+
+# Shed load (503) past the worker's limits, inside CORS so browsers can read the 503
+app.add_middleware(
+    AdmissionMiddleware,
+    router=app.router,
+    limits={
+        "read": settings.ADMISSION_MAX_READS,
+        "write": settings.ADMISSION_MAX_WRITES,
+        "upload": settings.ADMISSION_MAX_UPLOADS,
+    },
+    max_pool_wait=settings.ADMISSION_MAX_POOL_WAIT,
+    pool_wait=pool_wait,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+)
+
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -45,9 +81,21 @@ if settings.all_cors_origins:
     )
 
 
+# Compress large responses (item lists, file metadata, exports)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    threadpool_size=settings.COMPRESSION_THREADPOOL_SIZE,
+)
+
+
 # Include the routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# openapi.json generated (or loaded) once, then served precompressed
+openapi_cache = OpenAPICache(settings.OPENAPI_ARTIFACT_DIR)
+openapi_cache.install(app)
+
 
 @app.get("/", tags=["root"])
 async def read_root() -> dict[str, str]:
@@ -69,6 +117,10 @@ def timestamp_log_config(uvicorn_log_config: dict[str, Any]) -> dict[str, Any]:
 
 
 if __name__ == "__main__":
+    # Only needed when run directly: the server imports the app, not the reverse
+    import uvicorn
+    from uvicorn.config import LOGGING_CONFIG
+
     uvicorn.run(
         app, host="0.0.0.0", port=8000, log_config=timestamp_log_config(LOGGING_CONFIG)
     )
@@ -3,6 +3,7 @@ from .item import Item
 from .user import User
 from .profile import Profile, ProfilePicturesBucket
 from .file import FileMetadata
+from .outbox import OutboxEvent
 from .storage import ProfilePictures, ItemDocuments
 
 # Pour Alembic
@@ -10,7 +11,7 @@ Base = SQLModel
 
 __all__ = [
     "User", "Item", "Base", "Profile", 
-    "ProfilePicturesBucket", "FileMetadata",
+    "ProfilePicturesBucket", "FileMetadata", "OutboxEvent",
     "ProfilePictures", "ItemDocuments"
 ]
 
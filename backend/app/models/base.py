@@ -26,6 +26,21 @@ class RLSModel(SQLModel):
     # Flag pour activer/désactiver RLS
     __rls_enabled__: ClassVar[bool] = True
 
+    # Recherche plein texte : colonne -> poids ('A' à 'D')
+    __search_fields__: ClassVar[Dict[str, str]] = {}
+    __search_config__: ClassVar[str] = "simple"
+
+    @classmethod
+    def get_search_vector_sql(cls) -> Optional[str]:
+        """Expression de la colonne générée search_vector (None si pas de recherche)"""
+        if not cls.__search_fields__:
+            return None
+        return " || ".join(
+            f"setweight(to_tsvector('{cls.__search_config__}'::regconfig, "
+            f"coalesce({column}, '')), '{weight}')"
+            for column, weight in cls.__search_fields__.items()
+        )
+
     @classmethod
     def get_select_policy(cls) -> PolicyDefinition:
         """SELECT - besoin uniquement de USING"""
@@ -89,6 +104,23 @@ class RLSModel(SQLModel):
 
         return policies
 
+    @classmethod
+    def get_policy_statements(cls, table_name: str) -> List[str]:
+        """Instructions CREATE POLICY ajoutées aux migrations (alembic/env.py)"""
+        statements = []
+        for operation, policy in cls.get_policies().items():
+            sql = f"""
+                    CREATE POLICY "{table_name}_{operation}" ON {table_name}
+                    FOR {operation.upper()}
+                """
+            if policy.using:
+                sql += f"\n    USING ({policy.using})"
+            if policy.check:
+                sql += f"\n    WITH CHECK ({policy.check})"
+            sql += ";"
+            statements.append(sql)
+        return statements
+
 
 class StorageOperation(str, Enum):
     SELECT = "SELECT"
@@ -112,6 +144,8 @@ class StorageBucket:
     allowed_mime_types: ClassVar[List[str]] = ["*/*"]
     max_file_size: ClassVar[int] = 50 * 1024 * 1024
     linked_model: ClassVar[Optional[Type[RLSModel]]] = None  # Modèle lié
+    # Miniatures générées après upload : (largeur, hauteur) maximales
+    thumbnail_sizes: ClassVar[List[Tuple[int, int]]] = []
 
     @classmethod
     def get_path_pattern(cls) -> str:
@@ -151,3 +185,17 @@ class StorageBucket:
                 check=base_policy,
             )
         ]
+
+    @classmethod
+    def get_policy_statements(cls) -> List[str]:
+        """Instructions CREATE POLICY sur storage.objects ajoutées aux migrations"""
+        return [
+            f"""
+                CREATE POLICY "{policy.name}"
+                ON storage.objects
+                FOR {policy.operation.value}
+                {f"USING ({policy.using})" if policy.using else ""}
+                {f"WITH CHECK ({policy.check})" if policy.check else ""};
+            """
+            for policy in cls.get_policies()
+        ]
@@ -1,11 +1,16 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Dict, Literal, Optional
 
+from pydantic import field_validator
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import Field, SQLModel
 
 from app.models.base import RLSModel
 
+# Statut des traitements post-upload (None : aucun traitement demandé)
+ProcessingStatus = Literal["pending", "processing", "done", "failed", "skipped"]
+
 
 class FileMetadataBase(SQLModel):
     """Modèle de base pour les métadonnées de fichier"""
@@ -15,11 +20,40 @@ class FileMetadataBase(SQLModel):
     bucket_name: str = Field(min_length=1, max_length=100)
     path: str = Field(min_length=1, max_length=512)
     description: Optional[str] = Field(default=None, max_length=255)
+    content_hash: Optional[str] = Field(default=None, max_length=64)  # SHA-256 hex
 
 
 class FileMetadataCreate(FileMetadataBase):
     """Schéma pour la création de métadonnées de fichier"""
     item_id: Optional[uuid.UUID] = None
+    processing_status: Optional[ProcessingStatus] = None
+    derivatives: Optional[Dict[str, str]] = None
+
+
+class FileUploadRequest(SQLModel):
+    """Schéma d'un upload direct vers le storage (URL signée puis finalisation)"""
+    bucket_name: str = Field(min_length=1, max_length=100)
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str = Field(min_length=1, max_length=100)
+    size: int = Field(gt=0)
+    item_id: Optional[uuid.UUID] = None
+    description: Optional[str] = Field(default=None, max_length=255)
+
+    @field_validator("filename")
+    @classmethod
+    def _check_filename(cls, value: str) -> str:
+        # Le nom de fichier est inséré dans le chemin : pas de sous-dossier
+        if "/" in value or "\\" in value or value in (".", ".."):
+            raise ValueError("filename must not contain a path")
+        return value
+
+
+class FileUploadUrl(SQLModel):
+    """URL signée pour uploader un fichier directement dans le storage"""
+    upload_url: str
+    token: str
+    bucket_name: str
+    path: str
 
 
 class FileMetadataUpdate(SQLModel):
@@ -30,7 +64,19 @@ class FileMetadataUpdate(SQLModel):
 
 class FileMetadata(RLSModel, FileMetadataBase, table=True):
     """Modèle de table pour les métadonnées de fichier"""
-    item_id: Optional[uuid.UUID] = Field(default=None, foreign_key="item.id")
+    __search_fields__: ClassVar[Dict[str, str]] = {"filename": "A", "description": "B"}
+    __table_args__ = (
+        # Déduplication : même contenu pour un propriétaire dans un bucket
+        Index("ix_filemetadata_content_hash", "bucket_name", "owner_id", "content_hash"),
+        # Comptage des références à un objet du storage
+        Index("ix_filemetadata_bucket_path", "bucket_name", "path"),
+    )
+
+    # Supprimées avec l'item ; les objets du storage sont nettoyés en arrière-plan
+    item_id: Optional[uuid.UUID] = Field(default=None, foreign_key="item.id", ondelete="CASCADE")
+    processing_status: Optional[str] = Field(default=None, max_length=20)
+    # Fichiers dérivés (miniatures...) : taille -> chemin dans le bucket
+    derivatives: Optional[Dict[str, str]] = Field(default=None, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -40,11 +86,34 @@ class FileMetadataPublic(FileMetadataBase):
     id: uuid.UUID
     owner_id: uuid.UUID
     item_id: Optional[uuid.UUID] = None
+    processing_status: Optional[ProcessingStatus] = None
+    derivatives: Optional[Dict[str, str]] = None
     created_at: datetime
     updated_at: datetime
 
 
+class FileUploadResult(SQLModel):
+    """Résultat de l'upload d'un fichier dans un envoi multiple"""
+    filename: str
+    status: Literal["created", "error"]
+    file: Optional[FileMetadataPublic] = None
+    detail: Optional[str] = None
+
+
+class FileBulkDeleteResult(SQLModel):
+    """Résultat d'une suppression multiple de fichiers"""
+    deleted: int
+    removed_objects: int
+    failed_paths: list[str] = []
+
+
 class FileMetadataListPublic(SQLModel):
     """Schéma pour la liste de métadonnées de fichier à retourner via l'API"""
     data: list[FileMetadataPublic]
     count: int
+
+
+class FileMetadataSearchResults(SQLModel):
+    """Résultats d'une recherche plein texte, paginés par curseur"""
+    data: list[FileMetadataPublic]
+    next_cursor: Optional[str] = None
@@ -1,4 +1,5 @@
 import uuid
+from typing import ClassVar
 
 from sqlmodel import Field, SQLModel
 
@@ -23,7 +24,7 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(RLSModel, ItemBase, table=True):
-    pass
+    __search_fields__: ClassVar[dict[str, str]] = {"title": "A", "description": "B"}
 
 
 # Properties to return via API, id is always required
@@ -35,3 +36,8 @@ class ItemPublic(ItemBase):
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
     count: int
+
+
+class ItemSearchResults(SQLModel):
+    data: list[ItemPublic]
+    next_cursor: str | None = None
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from sqlalchemy import JSON, BigInteger, Column, Index, Integer, text
+from sqlmodel import Field, SQLModel
+
+OutboxOperation = Literal["insert", "update", "delete"]
+
+
+class OutboxEvent(SQLModel, table=True):
+    """Changement d'une ligne à transmettre au webhook
+
+    Écrit dans la transaction du changement : il n'existe que si le changement
+    a été validé. Pas de politique RLS : la table n'est lue que par le backend.
+    """
+
+    __table_args__ = (
+        # Événements à transmettre, dans l'ordre d'écriture
+        Index(
+            "ix_outboxevent_pending",
+            "id",
+            postgresql_where=text("delivered_at IS NULL"),
+        ),
+        # Purge des événements transmis
+        Index("ix_outboxevent_delivered_at", "delivered_at"),
+    )
+
+    # INTEGER pour SQLite : seul INTEGER PRIMARY KEY est auto-incrémenté
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(
+            BigInteger().with_variant(Integer(), "sqlite"),
+            primary_key=True,
+            autoincrement=True,
+        ),
+    )
+    table_name: str = Field(max_length=63)
+    op: str = Field(max_length=10)
+    record_id: uuid.UUID
+    owner_id: uuid.UUID
+    # Ligne après le changement (avant, pour une suppression)
+    payload: Dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Prochaine tentative : repoussée pendant un envoi et après un échec
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    attempts: int = 0
+    delivered_at: Optional[datetime] = None
+    last_error: Optional[str] = Field(default=None, max_length=500)
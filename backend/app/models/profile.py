@@ -1,8 +1,11 @@
 from uuid import UUID, uuid4
 from sqlmodel import Field
 from typing import Optional
+from typing import TYPE_CHECKING
 from .base import RLSModel, PolicyDefinition, StorageBucket
-from fastapi import UploadFile
+
+if TYPE_CHECKING:
+    from fastapi import UploadFile
 
 class Profile(RLSModel, table=True):
     __tablename__ = "profiles"
@@ -19,7 +22,7 @@ class Profile(RLSModel, table=True):
             return f"/storage/v1/object/public/{ProfilePicturesBucket.name}/{self.picture_path}"
         return None
 
-    async def upload_picture(self, file: UploadFile):
+    async def upload_picture(self, file: "UploadFile"):
         """Upload une nouvelle image de profil"""
         path = ProfilePicturesBucket.get_path_pattern().format(
             record_id=self.id,
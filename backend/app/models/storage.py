@@ -1,4 +1,4 @@
-from typing import ClassVar, List, Optional
+from typing import ClassVar, List, Optional, Tuple
 
 from app.models.base import StorageBucket
 from app.models.item import Item
@@ -10,6 +10,7 @@ class ProfilePictures(StorageBucket):
     public: ClassVar[bool] = True
     allowed_mime_types: ClassVar[List[str]] = ["image/jpeg", "image/png", "image/gif"]
     max_file_size: ClassVar[int] = 5 * 1024 * 1024  # 5MB
+    thumbnail_sizes: ClassVar[List[Tuple[int, int]]] = [(64, 64), (256, 256)]
 
     @classmethod
     def get_path_pattern(cls) -> str:
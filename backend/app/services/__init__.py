@@ -1,18 +1,26 @@
-from supabase._async.client import AsyncClient
+from typing import TYPE_CHECKING
 
+from app.core.config import settings
 from app.models import STORAGE_BUCKETS
+from app.services.post_upload import post_upload_pipeline
 from app.services.storage import StorageService
 
+if TYPE_CHECKING:
+    from supabase._async.client import AsyncClient
+
 # Singleton pour le service de stockage
 _storage_service = None
 
 
-async def get_storage_service(supabase_client: AsyncClient) -> StorageService:
+async def get_storage_service(supabase_client: "AsyncClient") -> StorageService:
     """Retourne le service de stockage, l'initialise si nécessaire"""
     global _storage_service
     
     if _storage_service is None:
-        _storage_service = StorageService(supabase_client)
+        _storage_service = StorageService(
+            supabase_client,
+            post_upload=post_upload_pipeline if settings.POST_UPLOAD_PROCESSING else None,
+        )
         # Initialiser les buckets
         await _storage_service.initialize_buckets(STORAGE_BUCKETS)
     
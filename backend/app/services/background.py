@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class BackgroundQueue:
+    """File de tâches asynchrones bornée, consommée par des workers du processus
+
+    Les tâches sont exécutées hors de la requête qui les a soumises. Quand la
+    file est pleine, submit refuse la tâche au lieu de bloquer l'appelant.
+    """
+
+    def __init__(self, name: str, maxsize: int, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=maxsize)
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def pending(self) -> int:
+        """Nombre de tâches en attente"""
+        return self._queue.qsize()
+
+    def full(self) -> bool:
+        """La file a-t-elle atteint sa taille maximale ?"""
+        return self._queue.full()
+
+    def submit(
+        self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any
+    ) -> bool:
+        """Ajoute une tâche à la file, retourne False si la file est pleine"""
+        try:
+            self._queue.put_nowait(lambda: fn(*args, **kwargs))
+        except asyncio.QueueFull:
+            logger.warning(f"{self.name} queue full, job rejected")
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"{self.name} job failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        """Démarre les workers (à appeler depuis le lifespan de l'application)"""
+        if self._tasks:
+            return
+        # Une asyncio.Queue reste liée à sa première boucle : l'application
+        # peut être relancée dans une autre (un TestClient par test)
+        queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=self._queue.maxsize)
+        while not self._queue.empty():
+            queue.put_nowait(self._queue.get_nowait())
+        self._queue = queue
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Laisse les tâches en cours se terminer (dans la limite du délai) puis arrête les workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name}: {self.pending} job(s) dropped at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
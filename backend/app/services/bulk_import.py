@@ -0,0 +1,201 @@
+import csv
+import json
+import logging
+import uuid
+from collections.abc import Callable, Iterator
+from typing import IO, Any
+
+from pydantic import ValidationError
+from sqlmodel import Session, SQLModel
+
+from app.crud.base import CRUDBase
+from app.utils.export import DataFormat
+
+logger = logging.getLogger(__name__)
+
+# Une ligne lue : (numéro de ligne, enregistrement brut ou message d'erreur)
+RawRecord = tuple[int, dict[str, Any] | str]
+
+
+def _iter_ndjson(stream: IO[bytes], max_line_bytes: int) -> Iterator[RawRecord]:
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # Ligne trop longue : on consomme la fin sans la garder en mémoire
+            while (rest := stream.readline(max_line_bytes)) and not rest.endswith(
+                b"\n"
+            ):
+                pass
+            yield line_number, f"Line exceeds {max_line_bytes} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Each line must be a JSON object"
+            continue
+        yield line_number, record
+
+
+class _RejectedLine(Exception):
+    """Ligne écartée avant le parseur CSV, avec son numéro et le message"""
+
+    def __init__(self, line_number: int, message: str):
+        super().__init__(message)
+        self.line_number = line_number
+        self.message = message
+
+
+class _CSVLines:
+    """Lignes décodées d'un flux CSV, chacune bornée à max_line_bytes
+
+    Une ligne trop longue ou mal encodée lève _RejectedLine : le reader CSV
+    abandonne l'enregistrement en cours et repart de la ligne suivante.
+    """
+
+    def __init__(self, stream: IO[bytes], max_line_bytes: int):
+        self.stream = stream
+        self.max_line_bytes = max_line_bytes
+        self.line_number = 0
+
+    def __iter__(self) -> "_CSVLines":
+        return self
+
+    def __next__(self) -> str:
+        line = self.stream.readline(self.max_line_bytes + 1)
+        if not line:
+            raise StopIteration
+        self.line_number += 1
+        if len(line) > self.max_line_bytes and not line.endswith(b"\n"):
+            # Ligne trop longue : on consomme la fin sans la garder en mémoire
+            while (
+                rest := self.stream.readline(self.max_line_bytes)
+            ) and not rest.endswith(b"\n"):
+                pass
+            raise _RejectedLine(
+                self.line_number, f"Line exceeds {self.max_line_bytes} bytes"
+            )
+        try:
+            return line.decode("utf-8-sig" if self.line_number == 1 else "utf-8")
+        except UnicodeDecodeError as e:
+            raise _RejectedLine(self.line_number, f"Invalid UTF-8: {e}") from e
+
+
+def _iter_csv(stream: IO[bytes], max_line_bytes: int) -> Iterator[RawRecord]:
+    lines = _CSVLines(stream, max_line_bytes)
+    reader = csv.reader(lines)
+    fieldnames: list[str] | None = None
+    while True:
+        # Une erreur n'invalide que l'enregistrement en cours : la lecture continue
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except _RejectedLine as e:
+            yield e.line_number, e.message
+            continue
+        except csv.Error as e:
+            yield lines.line_number, f"Invalid CSV: {e}"
+            continue
+        if not row:
+            continue
+        if fieldnames is None:
+            fieldnames = row
+            continue
+        if len(row) > len(fieldnames):
+            yield (
+                lines.line_number,
+                f"Expected {len(fieldnames)} columns, got {len(row)}",
+            )
+            continue
+        # Les cellules vides ou absentes valent NULL
+        cells = row + [""] * (len(fieldnames) - len(row))
+        yield (
+            lines.line_number,
+            {
+                name: value if value != "" else None
+                for name, value in zip(fieldnames, cells, strict=True)
+            },
+        )
+
+
+def iter_records(
+    stream: IO[bytes], format: DataFormat, max_line_bytes: int = 64 * 1024
+) -> Iterator[RawRecord]:
+    """Lit un flux NDJSON ou CSV ligne par ligne, sans le charger en mémoire"""
+    if format == "ndjson":
+        return _iter_ndjson(stream, max_line_bytes)
+    return _iter_csv(stream, max_line_bytes)
+
+
+def import_records(
+    crud: CRUDBase[Any, Any, Any],
+    schema: type[SQLModel],
+    records: Iterator[RawRecord],
+    *,
+    session_factory: Callable[[], Session],
+    owner_id: uuid.UUID,
+    batch_size: int = 500,
+) -> Iterator[dict[str, Any]]:
+    """Valide et insère les enregistrements par lots, un commit par lot.
+
+    Produit une entrée de rapport par ligne lue, au fil des lots, puis un résumé.
+    Seul le lot courant est gardé en mémoire.
+    """
+    created = failed = 0
+
+    with session_factory() as session:
+        batch: list[tuple[int, SQLModel]] = []
+
+        def flush() -> Iterator[dict[str, Any]]:
+            nonlocal created, failed
+            try:
+                ids = crud.create_multi(
+                    session, owner_id=owner_id, objs_in=[obj for _, obj in batch]
+                )
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error importing batch: {str(e)}")
+                failed += len(batch)
+                for line, _ in batch:
+                    yield {
+                        "line": line,
+                        "status": "error",
+                        "errors": [f"Batch insert failed: {e}"],
+                    }
+            else:
+                created += len(ids)
+                for (line, _), id in zip(batch, ids, strict=True):
+                    yield {"line": line, "status": "created", "id": str(id)}
+            batch.clear()
+
+        for line, record in records:
+            if isinstance(record, str):
+                failed += 1
+                yield {"line": line, "status": "error", "errors": [record]}
+                continue
+            try:
+                batch.append((line, schema.model_validate(record)))
+            except ValidationError as e:
+                failed += 1
+                errors = [
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                ]
+                yield {"line": line, "status": "error", "errors": errors}
+                continue
+            if len(batch) >= batch_size:
+                yield from flush()
+
+        if batch:
+            yield from flush()
+
+    yield {"summary": {"created": created, "failed": failed}}
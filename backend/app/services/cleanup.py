@@ -0,0 +1,94 @@
+import logging
+import posixpath
+import uuid
+from collections.abc import Callable
+from functools import partial
+from typing import Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.crud.file import file_metadata
+from app.models.storage import ItemDocuments
+from app.services.background import BackgroundQueue
+from app.services.storage import REMOVE_CHUNK_SIZE, StorageService
+
+logger = logging.getLogger(__name__)
+
+
+def _referenced_paths(
+    session_factory: Callable[[], Session], bucket_name: str, paths: list[str]
+) -> set[str]:
+    with session_factory() as session:
+        return file_metadata.get_referenced_paths(
+            session, bucket_name=bucket_name, paths=paths
+        )
+
+
+async def purge_prefix(
+    storage_service: StorageService,
+    bucket_name: str,
+    prefix: str,
+    session_factory: Callable[[], Session] = partial(Session, engine),
+    page_size: int = REMOVE_CHUNK_SIZE,
+) -> Tuple[int, int]:
+    """Supprime les objets d'un dossier du storage, page par page
+
+    Les objets encore référencés par des métadonnées (uploads dédupliqués)
+    sont conservés. Chaque page est supprimée avant de lire la suivante :
+    l'offset ne compte donc que les entrées conservées. Retourne le nombre
+    d'objets supprimés et conservés.
+    """
+    removed = kept = 0
+    while True:
+        entries = await storage_service.list_files(
+            bucket_name, prefix, limit=page_size, offset=kept
+        )
+        paths = []
+        for entry in entries:
+            path = posixpath.join(prefix, entry["name"])
+            if entry.get("id") is None:
+                # Sous-dossier (miniatures...)
+                folder_removed, folder_kept = await purge_prefix(
+                    storage_service, bucket_name, path, session_factory, page_size
+                )
+                removed += folder_removed
+                kept += 1 if folder_kept else 0
+            else:
+                paths.append(path)
+
+        referenced = await run_in_threadpool(
+            _referenced_paths, session_factory, bucket_name, paths
+        )
+        to_remove = [path for path in paths if path not in referenced]
+        failed = await storage_service.remove_objects(bucket_name, to_remove)
+        removed += len(to_remove) - len(failed)
+        kept += len(referenced) + len(failed)
+
+        if len(entries) < page_size:
+            return removed, kept
+
+
+async def cleanup_item_documents(
+    storage_service: StorageService,
+    item_id: uuid.UUID,
+    session_factory: Callable[[], Session] = partial(Session, engine),
+) -> None:
+    """Supprime du storage les documents d'un item supprimé
+
+    Les métadonnées sont supprimées avec l'item (ON DELETE CASCADE).
+    """
+    prefix = posixpath.dirname(
+        ItemDocuments.get_path_pattern().format(
+            user_id="", record_id=item_id, filename=""
+        )
+    )
+    removed, kept = await purge_prefix(
+        storage_service, ItemDocuments.name, prefix, session_factory
+    )
+    logger.info(f"Item {item_id}: {removed} document(s) removed, {kept} kept")
+
+
+cleanup_queue = BackgroundQueue("cleanup", maxsize=settings.CLEANUP_QUEUE_SIZE)
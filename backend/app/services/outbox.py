@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Optional, cast
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import CursorResult, delete, update
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_ID_HEADER = "X-Outbox-Event-Id"
+SIGNATURE_HEADER = "X-Outbox-Signature"
+
+
+def sign(secret: str, body: bytes) -> str:
+    """Signature HMAC-SHA256 du corps, telle qu'envoyée dans SIGNATURE_HEADER"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class OutboxDispatcher:
+    """Transmet au webhook les événements de l'outbox, par lots
+
+    Un lot est réservé avec FOR UPDATE SKIP LOCKED : plusieurs workers (ou
+    plusieurs instances) se partagent l'outbox sans transmettre deux fois le
+    même événement. La réservation repousse la prochaine tentative de `lease`
+    secondes puis libère les verrous : les appels HTTP se font hors transaction,
+    et un worker arrêté en plein envoi laisse ses événements aux autres.
+
+    La livraison est « au moins une fois », sans ordre garanti entre les
+    événements d'un même lot : le destinataire déduplique et ordonne avec l'id
+    de l'événement, croissant.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        *,
+        secret: Optional[str] = None,
+        session_factory: Callable[[], Session] = partial(Session, engine),
+        batch_size: int = 100,
+        concurrency: int = 10,
+        poll_interval: float = 1,
+        max_attempts: int = 10,
+        retention: float = 24 * 3600,
+        lease: float = 60,
+        timeout: float = 10,
+        retry_delay: float = 1,
+        max_retry_delay: float = 3600,
+        prune_interval: float = 60,
+    ):
+        self.url = url
+        self.secret = secret
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.lease = lease
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.prune_interval = prune_interval
+        self.delivered = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stopping = asyncio.Event()
+
+    def claim(self) -> list[dict[str, Any]]:
+        """Réserve le prochain lot d'événements disponibles et retourne leurs corps"""
+        now = datetime.utcnow()
+        with self.session_factory() as session:
+            statement = (
+                select(OutboxEvent)
+                .where(
+                    col(OutboxEvent.delivered_at).is_(None),
+                    OutboxEvent.available_at <= now,
+                    OutboxEvent.attempts < self.max_attempts,
+                )
+                .order_by(col(OutboxEvent.id))
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = list(session.exec(statement))
+            if not events:
+                return []
+            session.execute(
+                update(OutboxEvent)
+                .where(col(OutboxEvent.id).in_([event.id for event in events]))
+                .values(available_at=now + timedelta(seconds=self.lease))
+            )
+            bodies = [
+                {
+                    "id": event.id,
+                    "table": event.table_name,
+                    "op": event.op,
+                    "record_id": str(event.record_id),
+                    "owner_id": str(event.owner_id),
+                    "data": event.payload,
+                    "created_at": event.created_at.isoformat(),
+                    "attempt": event.attempts + 1,
+                }
+                for event in events
+            ]
+            session.commit()
+        return bodies
+
+    def _retry_at(self, attempt: int, now: datetime) -> datetime:
+        # Délai exponentiel, tiré au hasard pour étaler les tentatives des événements d'un lot
+        delay = min(self.retry_delay * 2 ** (attempt - 1), self.max_retry_delay)
+        return now + timedelta(seconds=random.uniform(delay / 2, delay))
+
+    def record(self, delivered: list[int], failed: dict[int, tuple[int, str]]) -> None:
+        """Enregistre le résultat d'un lot : transmis, ou échec (tentative, erreur)"""
+        now = datetime.utcnow()
+        with self.session_factory() as session:
+            if delivered:
+                session.execute(
+                    update(OutboxEvent)
+                    .where(col(OutboxEvent.id).in_(delivered))
+                    .values(delivered_at=now)
+                )
+            for event_id, (attempt, error) in failed.items():
+                session.execute(
+                    update(OutboxEvent)
+                    .where(col(OutboxEvent.id) == event_id)
+                    .values(
+                        attempts=attempt,
+                        available_at=self._retry_at(attempt, now),
+                        last_error=error[:500],
+                    )
+                )
+            session.commit()
+
+    def prune(self) -> int:
+        """Supprime les événements transmis depuis plus de `retention` secondes"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        with self.session_factory() as session:
+            result = cast(
+                CursorResult[Any],
+                session.execute(
+                    delete(OutboxEvent).where(col(OutboxEvent.delivered_at) < cutoff)
+                ),
+            )
+            session.commit()
+        return result.rowcount
+
+    async def _deliver(
+        self, client: Any, limiter: asyncio.Semaphore, event: dict[str, Any]
+    ) -> Optional[str]:
+        """Envoie un événement, retourne l'erreur ou None s'il a été accepté (2xx)"""
+        body = json.dumps(event).encode()
+        headers = {
+            "Content-Type": "application/json",
+            EVENT_ID_HEADER: str(event["id"]),
+        }
+        if self.secret:
+            headers[SIGNATURE_HEADER] = sign(self.secret, body)
+        async with limiter:
+            try:
+                response = await client.post(self.url, content=body, headers=headers)
+            except Exception as e:
+                return f"{type(e).__name__}: {str(e)}"
+        if not response.is_success:
+            return f"HTTP {response.status_code}"
+        return None
+
+    async def dispatch(self, client: Any) -> int:
+        """Réserve un lot, le transmet et enregistre le résultat, retourne sa taille"""
+        events = await run_in_threadpool(self.claim)
+        if not events:
+            return 0
+        limiter = asyncio.Semaphore(self.concurrency)
+        errors = await asyncio.gather(
+            *(self._deliver(client, limiter, event) for event in events)
+        )
+        delivered = []
+        failed = {}
+        for event, error in zip(events, errors, strict=True):
+            if error is None:
+                delivered.append(event["id"])
+                continue
+            failed[event["id"]] = (event["attempt"], error)
+            if event["attempt"] >= self.max_attempts:
+                logger.error(
+                    f"Outbox event {event['id']} dropped after {event['attempt']} attempts: {error}"
+                )
+        await run_in_threadpool(self.record, delivered, failed)
+        self.delivered += len(delivered)
+        self.failed += len(failed)
+        return len(events)
+
+    async def _run(self) -> None:
+        import httpx
+
+        pruned_at = 0.0
+        loop = asyncio.get_running_loop()
+        async with httpx.AsyncClient(
+            timeout=self.timeout, limits=httpx.Limits(max_connections=self.concurrency)
+        ) as client:
+            while not self._stopping.is_set():
+                count = 0
+                try:
+                    count = await self.dispatch(client)
+                    if loop.time() - pruned_at >= self.prune_interval:
+                        pruned_at = loop.time()
+                        pruned = await run_in_threadpool(self.prune)
+                        if pruned:
+                            logger.info(f"Outbox: {pruned} delivered event(s) pruned")
+                except Exception as e:
+                    logger.error(f"Outbox dispatch failed: {str(e)}")
+                if count < self.batch_size:
+                    # Outbox vidée (ou base indisponible) : attendre avant de relire
+                    try:
+                        await asyncio.wait_for(
+                            self._stopping.wait(), self.poll_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+
+    async def start(self) -> None:
+        """Démarre la transmission si un webhook est configuré (depuis le lifespan)"""
+        if self.url is None or self._task is not None:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="outbox")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Laisse le lot en cours se terminer (dans la limite du délai) puis s'arrête"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            # Les événements réservés seront transmis à l'expiration de leur réservation
+            logger.warning("Outbox: dispatch interrupted at shutdown")
+        self._task = None
+
+
+outbox_dispatcher = OutboxDispatcher(
+    str(settings.OUTBOX_WEBHOOK_URL) if settings.OUTBOX_WEBHOOK_URL else None,
+    secret=settings.OUTBOX_WEBHOOK_SECRET,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    retention=settings.OUTBOX_RETENTION,
+)
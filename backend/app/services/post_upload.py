@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import posixpath
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Optional, Type
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.resilience import storage_upstream
+from app.crud.file import file_metadata
+from app.models.base import StorageBucket
+from app.models.file import FileMetadata
+from app.services.background import BackgroundQueue
+from app.utils.media import make_thumbnails, sniff_mime_type
+
+logger = logging.getLogger(__name__)
+
+
+def derivative_path(path: str, name: str) -> str:
+    """Chemin d'un fichier dérivé, à côté de l'original : dir/thumbnails/<name>/<fichier>.webp"""
+    directory, filename = posixpath.split(path)
+    return posixpath.join(directory, "thumbnails", name, f"{filename}.webp")
+
+
+def _is_compatible(declared: Optional[str], sniffed: str) -> bool:
+    """Le contenu détecté correspond-il au type déclaré ?"""
+    if declared == sniffed:
+        return True
+    # Le texte brut ne se distingue pas du CSV par son contenu
+    return (
+        sniffed == "text/plain"
+        and declared is not None
+        and declared.startswith("text/")
+    )
+
+
+class PostUploadPipeline:
+    """Traitements asynchrones après upload : détection du type MIME et miniatures
+
+    Les images sont redimensionnées dans un ProcessPoolExecutor pour ne pas
+    bloquer la boucle d'événements. Le nombre de fichiers en attente est borné :
+    au-delà, les uploads sont enregistrés sans traitement (statut "skipped").
+    Un contenu dont le type réel n'est pas accepté par le bucket est supprimé.
+    """
+
+    def __init__(
+        self,
+        queue_size: int,
+        process_workers: int,
+        session_factory: Callable[[], Session] = partial(Session, engine),
+    ):
+        self.queue = BackgroundQueue("post-upload", maxsize=queue_size)
+        self.process_workers = process_workers
+        self.session_factory = session_factory
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def has_capacity(self) -> bool:
+        """La file peut-elle accepter un nouveau fichier ?"""
+        return not self.queue.full()
+
+    def submit(
+        self,
+        client: Any,
+        bucket_class: Type[StorageBucket],
+        file_id: uuid.UUID,
+        path: str,
+        content: bytes,
+        declared_type: Optional[str],
+    ) -> bool:
+        """Planifie le traitement d'un fichier uploadé"""
+        return self.queue.submit(
+            self.process, client, bucket_class, file_id, path, content, declared_type
+        )
+
+    async def start(self) -> None:
+        await self.queue.start()
+
+    async def stop(self) -> None:
+        await self.queue.stop()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._executor
+
+    def _update(self, bucket_name: str, path: str, **values: Any) -> None:
+        """Met à jour les métadonnées d'un objet, uploads liés compris
+
+        Un upload lié (même contenu) copie le statut de l'original à son
+        enregistrement : il suit ensuite le traitement de l'objet partagé.
+        """
+        with self.session_factory() as session:
+            statement = select(FileMetadata).where(
+                FileMetadata.bucket_name == bucket_name, FileMetadata.path == path
+            )
+            # Aucune ligne si le fichier a été supprimé entre-temps
+            for file_meta in session.exec(statement):
+                file_meta.sqlmodel_update({**values, "updated_at": datetime.utcnow()})
+                session.add(file_meta)
+            session.commit()
+
+    def _reject(self, bucket_name: str, path: str) -> int:
+        """Supprime les métadonnées d'un objet refusé, uploads liés compris"""
+        with self.session_factory() as session:
+            statement = select(FileMetadata.id).where(
+                FileMetadata.bucket_name == bucket_name, FileMetadata.path == path
+            )
+            return file_metadata.remove_by_ids(
+                session, ids=list(session.exec(statement))
+            )
+
+    async def process(
+        self,
+        client: Any,
+        bucket_class: Type[StorageBucket],
+        file_id: uuid.UUID,
+        path: str,
+        content: bytes,
+        declared_type: Optional[str],
+    ) -> None:
+        """Détecte le type réel du fichier puis génère et uploade ses dérivés"""
+        update = partial(self._update, bucket_class.name, path)
+        await run_in_threadpool(update, processing_status="processing")
+        try:
+            sniffed = sniff_mime_type(content)
+            # Type corrigé seulement : un upload lié garde le type qu'il a déclaré
+            corrected: Dict[str, Any] = {}
+            if sniffed and not _is_compatible(declared_type, sniffed):
+                logger.warning(
+                    f"{path}: declared {declared_type}, content is {sniffed}"
+                )
+                corrected["content_type"] = sniffed
+                if (
+                    bucket_class.allowed_mime_types != ["*/*"]
+                    and sniffed not in bucket_class.allowed_mime_types
+                ):
+                    # Contenu non autorisé dans ce bucket malgré le type déclaré : plus
+                    # servi dès la suppression des métadonnées, puis retiré du storage
+                    # (à défaut, la réconciliation supprimera l'objet orphelin)
+                    removed = await run_in_threadpool(
+                        self._reject, bucket_class.name, path
+                    )
+                    await storage_upstream.call(
+                        client.storage.from_(bucket_class.name).remove,
+                        [path],
+                        idempotent=True,
+                    )
+                    logger.warning(
+                        f"{path}: {sniffed} not allowed, deleted ({removed} file(s))"
+                    )
+                    return
+
+            derivatives: Dict[str, str] = {}
+            if (
+                bucket_class.thumbnail_sizes
+                and sniffed
+                and sniffed.startswith("image/")
+            ):
+                try:
+                    loop = asyncio.get_running_loop()
+                    thumbnails = await loop.run_in_executor(
+                        self._get_executor(),
+                        make_thumbnails,
+                        content,
+                        bucket_class.thumbnail_sizes,
+                    )
+                except ImportError:
+                    logger.warning("Pillow is not installed, thumbnails are disabled")
+                    thumbnails = []
+                for name, data in thumbnails:
+                    thumbnail_path = derivative_path(path, name)
+                    # upsert : le renvoi d'une miniature déjà envoyée est sans effet
+                    await storage_upstream.call(
+                        client.storage.from_(bucket_class.name).upload,
+                        path=thumbnail_path,
+                        file=data,
+                        file_options={"content-type": "image/webp", "upsert": "true"},
+                        idempotent=True,
+                    )
+                    derivatives[name] = thumbnail_path
+
+            await run_in_threadpool(
+                update,
+                **corrected,
+                derivatives=derivatives or None,
+                processing_status="done",
+            )
+        except Exception as e:
+            logger.error(f"Error processing {path} (file {file_id}): {str(e)}")
+            await run_in_threadpool(update, processing_status="failed")
+
+
+post_upload_pipeline = PostUploadPipeline(
+    queue_size=settings.POST_UPLOAD_QUEUE_SIZE,
+    process_workers=settings.POST_UPLOAD_PROCESS_WORKERS,
+)
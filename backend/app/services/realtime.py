@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import json
+import logging
+from collections.abc import AsyncIterator, Callable
+from types import TracebackType
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Canal des notifications envoyées par les triggers (migration change_notifications)
+CHANNEL = "changes"
+TABLES = ("item", "filemetadata")
+# Événement demandant au client de relire ses listes : des changements ont été perdus
+RESYNC = {"op": "resync"}
+
+Listen = Callable[[], AsyncIterator[Optional[str]]]
+
+
+async def listen_postgres() -> AsyncIterator[Optional[str]]:
+    """Notifications du canal CHANNEL, précédées de None une fois l'écoute établie
+
+    LISTEN demande une connexion directe à Postgres (ou un pooler en mode
+    session) : en mode transaction, le pooler ne relaie pas les notifications.
+    """
+    import psycopg
+
+    conninfo = str(settings.SQLALCHEMY_DATABASE_URI).replace("+psycopg", "", 1)
+    async with await psycopg.AsyncConnection.connect(
+        conninfo, autocommit=True
+    ) as connection:
+        await connection.execute(f"LISTEN {CHANNEL}")
+        yield None
+        async for notify in connection.notifies():
+            yield notify.payload
+
+
+class Subscription:
+    """Changements des lignes d'un propriétaire, dans une file bornée
+
+    Un abonné trop lent ne ralentit ni l'écoute ni les autres abonnés : quand sa
+    file est pleine, les événements en attente sont remplacés par un seul
+    événement RESYNC, qui lui demande de relire ses listes.
+
+    `close` (ou la sortie d'un bloc `with`) désabonne ; les appels suivants
+    sont sans effet.
+    """
+
+    def __init__(
+        self,
+        owner_id: str,
+        tables: tuple[str, ...],
+        queue_size: int,
+        on_close: Callable[["Subscription"], None],
+    ):
+        self.owner_id = owner_id
+        self.tables = tables
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=queue_size)
+        self._on_close: Optional[Callable[[Subscription], None]] = on_close
+
+    def close(self) -> None:
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def push(self, event: dict[str, Any]) -> None:
+        if event is not RESYNC and event.get("table") not in self.tables:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float) -> Optional[dict[str, Any]]:
+        """Prochain événement, None si aucun n'arrive dans les `timeout` secondes"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeFeed:
+    """Une connexion LISTEN par worker, dont les notifications sont réparties
+    entre les abonnés du propriétaire des lignes modifiées
+
+    L'écoute démarre avec le premier abonné. Si la connexion est perdue, elle
+    est rétablie et tous les abonnés reçoivent RESYNC.
+    """
+
+    def __init__(
+        self,
+        max_subscribers: int,
+        queue_size: int,
+        listen: Listen = listen_postgres,
+        retry_delay: float = 1,
+        max_retry_delay: float = 30,
+    ):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.listen = listen
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.subscribers = 0
+        self._by_owner: dict[str, set[Subscription]] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def full(self) -> bool:
+        """Le nombre maximal d'abonnés est-il atteint ?"""
+        return self.subscribers >= self.max_subscribers
+
+    def subscribe(
+        self, owner_id: str, tables: tuple[str, ...] = TABLES
+    ) -> Optional[Subscription]:
+        """Abonne aux changements des lignes de `owner_id`, None si la limite est atteinte
+
+        La limite est vérifiée et l'abonné compté dans le même appel, sans
+        point d'attente entre les deux : des connexions simultanées ne peuvent
+        pas la dépasser. L'abonnement dure jusqu'à son `close`.
+        """
+        if self.full():
+            return None
+        if self._task is None or self._task.done():
+            # Contexte vide : l'écoute ne garde rien de la requête qui l'a lancée
+            self._task = contextvars.Context().run(
+                asyncio.create_task, self._run(), name="change-feed"
+            )
+        subscription = Subscription(
+            owner_id, tables, self.queue_size, self._unsubscribe
+        )
+        self._by_owner.setdefault(owner_id, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers -= 1
+        owner_subscriptions = self._by_owner[subscription.owner_id]
+        owner_subscriptions.discard(subscription)
+        if not owner_subscriptions:
+            del self._by_owner[subscription.owner_id]
+
+    def publish(self, payload: str) -> None:
+        """Transmet une notification aux abonnés du propriétaire concerné"""
+        try:
+            event = json.loads(payload)
+            subscriptions = self._by_owner.get(event["owner_id"], ())
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Invalid change notification: {payload[:200]}")
+            return
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def _resync_all(self) -> None:
+        for subscriptions in self._by_owner.values():
+            for subscription in subscriptions:
+                subscription.push(RESYNC)
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        listened = False
+        while True:
+            try:
+                async for payload in self.listen():
+                    if payload is not None:
+                        self.publish(payload)
+                        continue
+                    logger.info(f"Listening to {CHANNEL} notifications")
+                    delay = self.retry_delay
+                    if listened:
+                        # Notifications perdues pendant la coupure
+                        self._resync_all()
+                    listened = True
+            except Exception as e:
+                logger.error(f"Change feed connection lost: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def stop(self) -> None:
+        """Arrête l'écoute (à appeler depuis le lifespan de l'application)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+change_feed = ChangeFeed(
+    max_subscribers=settings.REALTIME_MAX_SUBSCRIBERS,
+    queue_size=settings.REALTIME_QUEUE_SIZE,
+)
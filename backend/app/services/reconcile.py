@@ -0,0 +1,205 @@
+import logging
+import tempfile
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterator
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice
+from typing import IO, Any, Dict, List, Optional, Type
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.crud.file import file_metadata
+from app.models.base import StorageBucket
+from app.services.post_upload import derivative_path
+from app.services.storage import REMOVE_CHUNK_SIZE, StorageService
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'exemples gardés dans le rapport
+REPORT_SAMPLE_SIZE = 20
+
+
+class ListingOrderError(RuntimeError):
+    """Listing du storage ou métadonnées hors de l'ordre binaire des chemins"""
+
+
+def _is_derivative(path: str) -> bool:
+    """Les miniatures (dir/thumbnails/<taille>/<fichier>.webp) n'ont pas de métadonnées propres"""
+    parts = path.split("/")
+    return len(parts) >= 3 and parts[-3] == "thumbnails"
+
+
+def _is_recent(created_at: Optional[datetime], min_age: timedelta) -> bool:
+    """Trop récent : l'objet ou ses métadonnées peuvent encore être en cours d'enregistrement"""
+    if created_at is None:
+        return False
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - created_at < min_age
+
+
+def _object_created_at(obj: Dict[str, Any]) -> Optional[datetime]:
+    created_at = obj.get("created_at")
+    if not created_at:
+        return None
+    return datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+
+
+async def _iter_metadata(
+    session_factory: Callable[[], Session], bucket_name: str, batch_size: int
+) -> AsyncIterator[tuple[str, List[tuple[uuid.UUID, datetime]]]]:
+    """Chemins des métadonnées d'un bucket, triés, avec les lignes (id, création) qui y font référence"""
+    with session_factory() as session:
+        rows: Iterator[Any] = file_metadata.stream_paths(
+            session, bucket_name=bucket_name, batch_size=batch_size
+        )
+        current: Optional[str] = None
+        refs: List[tuple[uuid.UUID, datetime]] = []
+        while batch := await run_in_threadpool(lambda: list(islice(rows, batch_size))):
+            for row in batch:
+                if row["path"] != current:
+                    if current is not None:
+                        yield current, refs
+                    current, refs = row["path"], []
+                refs.append((row["id"], row["created_at"]))
+        if current is not None:
+            yield current, refs
+
+
+async def _ensure_sorted(
+    items: AsyncIterator[Any], path: Callable[[Any], str], source: str
+) -> AsyncIterator[Any]:
+    """Vérifie que les chemins sont strictement croissants (ordre binaire)
+
+    La jointure par fusion n'est juste que si les deux côtés sont triés de la
+    même façon : un listing trié selon une autre collation (casse, "_", "-",
+    accents) ferait passer des objets vivants pour orphelins.
+    """
+    previous: Optional[str] = None
+    async for item in items:
+        current = path(item)
+        if previous is not None and current <= previous:
+            raise ListingOrderError(
+                f"{source} not in binary path order: {current!r} after {previous!r}"
+            )
+        previous = current
+        yield item
+
+
+def _read_batches(spool: IO[str], batch_size: int) -> Iterator[List[str]]:
+    spool.seek(0)
+    lines = (line.rstrip("\n") for line in spool)
+    while batch := list(islice(lines, batch_size)):
+        yield batch
+
+
+async def reconcile_bucket(
+    storage_service: StorageService,
+    bucket_class: Type[StorageBucket],
+    *,
+    delete: bool = False,
+    min_age: timedelta = timedelta(hours=24),
+    session_factory: Callable[[], Session] = partial(Session, engine),
+    batch_size: int = REMOVE_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Compare les objets d'un bucket et leurs métadonnées
+
+    Le listing du storage et les métadonnées sont parcourus en parallèle, tous
+    deux triés par chemin (jointure par fusion), sans rien charger en entier.
+    Détecte les objets sans métadonnées et les métadonnées dont l'objet n'existe
+    plus, plus anciens que `min_age` : pendant un upload, l'un peut exister sans
+    l'autre, et un objet créé après le passage du listing n'y figure pas. Les
+    anomalies sont écrites dans des fichiers temporaires puis, avec `delete`,
+    supprimées par lots une fois le parcours terminé (supprimer pendant le
+    listing décalerait la pagination). Si l'un des deux parcours n'est pas
+    trié dans l'ordre binaire des chemins, lève ListingOrderError avant toute
+    suppression.
+    """
+    bucket_name = bucket_class.name
+    report: Dict[str, Any] = {
+        "bucket": bucket_name,
+        "objects": 0,
+        "metadata": 0,
+        "orphan_objects": 0,
+        "missing_objects": 0,
+        "removed_objects": 0,
+        "removed_metadata": 0,
+        "samples": {"orphan_objects": [], "missing_objects": []},
+    }
+
+    def record(kind: str, value: str, spool: IO[str]) -> None:
+        report[kind] += 1
+        if len(report["samples"][kind]) < REPORT_SAMPLE_SIZE:
+            report["samples"][kind].append(value)
+        spool.write(f"{value}\n")
+
+    with (
+        tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+") as orphans,
+        tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+") as missing,
+    ):
+        objects = _ensure_sorted(
+            storage_service.iter_files(bucket_name, page_size=batch_size),
+            lambda obj: obj["path"],
+            "Storage listing",
+        )
+        metadata = _ensure_sorted(
+            _iter_metadata(session_factory, bucket_name, batch_size),
+            lambda meta: meta[0],
+            "Metadata",
+        )
+        obj = await anext(objects, None)
+        meta = await anext(metadata, None)
+
+        while obj is not None or meta is not None:
+            if obj is not None and (meta is None or obj["path"] < meta[0]):
+                # Objet sans métadonnées
+                report["objects"] += 1
+                created_at = _object_created_at(obj)
+                if not _is_derivative(obj["path"]) and not _is_recent(
+                    created_at, min_age
+                ):
+                    record("orphan_objects", obj["path"], orphans)
+                obj = await anext(objects, None)
+            elif meta is not None and (obj is None or meta[0] < obj["path"]):
+                # Métadonnées dont l'objet n'existe plus
+                report["metadata"] += len(meta[1])
+                for id, created_at in meta[1]:
+                    if not _is_recent(created_at, min_age):
+                        record("missing_objects", str(id), missing)
+                meta = await anext(metadata, None)
+            else:
+                # Même chemin : l'objet et ses métadonnées existent
+                assert meta is not None
+                report["objects"] += 1
+                report["metadata"] += len(meta[1])
+                obj = await anext(objects, None)
+                meta = await anext(metadata, None)
+
+        if delete:
+            for paths in _read_batches(orphans, batch_size):
+                # Supprimer aussi les miniatures des objets orphelins
+                derivatives = [
+                    derivative_path(path, f"{width}x{height}")
+                    for path in paths
+                    for width, height in bucket_class.thumbnail_sizes
+                ]
+                failed = await storage_service.remove_objects(
+                    bucket_name, paths + derivatives
+                )
+                report["removed_objects"] += len(set(paths) - set(failed))
+            for ids in _read_batches(missing, batch_size):
+                with session_factory() as session:
+                    report["removed_metadata"] += await run_in_threadpool(
+                        file_metadata.remove_by_ids,
+                        session,
+                        ids=[uuid.UUID(id) for id in ids],
+                    )
+
+    logger.info(
+        f"{bucket_name}: {report['orphan_objects']} orphan object(s), "
+        f"{report['missing_objects']} metadata row(s) without object"
+    )
+    return report
@@ -1,50 +1,121 @@
+import asyncio
+import hashlib
+import heapq
 import logging
 import os
+import posixpath
 import uuid
+from collections.abc import AsyncIterator
 from io import BytesIO
-from typing import Any, BinaryIO, List, Optional, Tuple, Type
+from typing import TYPE_CHECKING, Any, BinaryIO, List, Optional, Tuple, Type, Union
 
 from fastapi import HTTPException, UploadFile
 from sqlmodel import Session
-from supabase.client import Client as SupabaseClient
 
+from app.core.resilience import Upstream, storage_upstream
+from app.core.singleflight import single_flight
 from app.crud.file import file_metadata
 from app.models.base import StorageBucket
 from app.models.file import FileMetadata, FileMetadataCreate
 
+if TYPE_CHECKING:
+    from supabase._async.client import AsyncClient
+
+    from app.services.post_upload import PostUploadPipeline
+
 logger = logging.getLogger(__name__)
 
+# Taille des morceaux lus depuis l'upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Nombre maximal de chemins par appel à remove
+REMOVE_CHUNK_SIZE = 1000
+
+# Demandes simultanées d'une même URL signée : un seul appel au storage
+_file_url_flight = single_flight("storage.create_signed_url")
+
 
 class StorageService:
     """Service pour gérer le stockage de fichiers dans Supabase"""
 
-    def __init__(self, supabase_client: SupabaseClient):
+    def __init__(
+        self,
+        supabase_client: "AsyncClient",
+        post_upload: Optional["PostUploadPipeline"] = None,
+        upstream: Optional[Upstream] = None,
+    ):
         self.client = supabase_client
+        self.post_upload = post_upload
+        # Appels au storage : nouvelles tentatives et coupe-circuit partagés
+        self.upstream = upstream or storage_upstream
 
-    async def initialize_buckets(self, buckets: List[Type[StorageBucket]]):
+    async def initialize_buckets(self, buckets: List[Type[StorageBucket]]) -> None:
         """Initialise les buckets de stockage définis dans l'application"""
         try:
             # Récupérer la liste des buckets existants
-            existing_buckets_response = await self.client.storage.list_buckets()
-            existing_buckets = [bucket["name"] for bucket in existing_buckets_response]
+            existing_buckets_response = await self.upstream.call(
+                self.client.storage.list_buckets, idempotent=True
+            )
+            existing_buckets = [bucket.name for bucket in existing_buckets_response]
 
             for bucket_class in buckets:
                 bucket_name = bucket_class.name
                 if bucket_name not in existing_buckets:
                     logger.info(f"Creating bucket: {bucket_name}")
-                    await self.client.storage.create_bucket(
+                    await self.upstream.call(
+                        self.client.storage.create_bucket,
                         bucket_name,
-                        public=bucket_class.public
+                        options={"public": bucket_class.public}
                     )
+                    # Plusieurs classes peuvent décrire le même bucket
+                    existing_buckets.append(bucket_name)
                     # Ici, on pourrait aussi configurer les politiques RLS spécifiques au bucket
                 else:
                     logger.info(f"Bucket already exists: {bucket_name}")
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error initializing buckets: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error initializing storage buckets: {str(e)}")
 
-    async def upload_file(
+    @staticmethod
+    def _check_content_type(bucket_class: Type[StorageBucket], content_type: Optional[str]) -> None:
+        """Vérifie que le type MIME est accepté par le bucket"""
+        if bucket_class.allowed_mime_types != ["*/*"] and content_type not in bucket_class.allowed_mime_types:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type. Allowed types: {', '.join(bucket_class.allowed_mime_types)}"
+            )
+
+    @staticmethod
+    def _build_path(
+        bucket_class: Type[StorageBucket],
+        user_id: uuid.UUID,
+        record_id: Optional[uuid.UUID],
+        filename: str,
+    ) -> str:
+        """Chemin du fichier dans le bucket, d'après le pattern du bucket"""
+        return bucket_class.get_path_pattern().format(
+            user_id=str(user_id),
+            record_id=str(record_id) if record_id else "unknown",
+            filename=filename
+        )
+
+    async def _read_upload(self, file: UploadFile, max_size: int) -> Tuple[bytes, str]:
+        """Lit l'upload par morceaux : SHA-256 et taille sont vérifiés au fil de l'eau"""
+        digest = hashlib.sha256()
+        content = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            content.extend(chunk)
+            if len(content) > max_size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large. Maximum size: {max_size/1024/1024}MB"
+                )
+            digest.update(chunk)
+        return bytes(content), digest.hexdigest()
+
+    async def _store_upload(
         self,
         bucket_class: Type[StorageBucket],
         file: UploadFile,
@@ -53,62 +124,115 @@ class StorageService:
         description: Optional[str] = None,
         session: Optional[Session] = None,
         custom_path: Optional[str] = None,
-    ) -> Tuple[str, Optional[FileMetadata]]:
-        """Upload un fichier vers Supabase Storage et enregistre ses métadonnées"""
-        try:
-            # Valider le type MIME
-            if bucket_class.allowed_mime_types != ["*/*"] and file.content_type not in bucket_class.allowed_mime_types:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type. Allowed types: {', '.join(bucket_class.allowed_mime_types)}"
-                )
+    ) -> Tuple[Union[FileMetadata, FileMetadataCreate], bytes]:
+        """Valide un fichier, le lit et l'envoie dans le storage
+        
+        Retourne les métadonnées à enregistrer avec le contenu lu, ou les
+        métadonnées existantes en cas de ré-upload à l'identique.
+        """
+        # Valider le type MIME
+        self._check_content_type(bucket_class, file.content_type)
 
-            # Lire le contenu du fichier
-            file_content = await file.read()
-            
-            # Vérifier la taille du fichier
-            if len(file_content) > bucket_class.max_file_size:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File too large. Maximum size: {bucket_class.max_file_size/1024/1024}MB"
-                )
-            
+        # Lire le contenu du fichier (taille et empreinte calculées au fil de l'eau)
+        file_content, content_hash = await self._read_upload(
+            file, bucket_class.max_file_size
+        )
+        filename = file.filename or f"upload_{uuid.uuid4()}"
+        
+        # Déduplication : même contenu déjà stocké pour cet utilisateur dans ce bucket
+        duplicates = []
+        if session and not custom_path:
+            duplicates = file_metadata.get_by_content_hash(
+                session,
+                owner_id=user_id,
+                bucket_name=bucket_class.name,
+                content_hash=content_hash
+            )
+        for duplicate in duplicates:
+            # Ré-upload à l'identique : renvoyer les métadonnées existantes
+            if duplicate.item_id == record_id and duplicate.filename == filename:
+                logger.info(f"Duplicate upload, reusing {duplicate.path}")
+                return duplicate, file_content
+        
+        processing_status = None
+        derivatives = None
+        if duplicates:
+            # Même contenu, autre fichier : lier au même objet sans le ré-uploader
+            file_path = duplicates[0].path
+            processing_status = duplicates[0].processing_status
+            derivatives = duplicates[0].derivatives
+            logger.info(f"Linking upload to existing object {file_path}")
+        else:
             # Générer le chemin du fichier
-            if custom_path:
-                file_path = custom_path
-            else:
-                pattern = bucket_class.get_path_pattern()
-                
-                # Remplacer les placeholders dans le pattern
-                filename = file.filename or f"upload_{uuid.uuid4()}"
-                file_path = pattern.format(
-                    user_id=str(user_id),
-                    record_id=str(record_id) if record_id else "unknown",
-                    filename=filename
-                )
+            file_path = custom_path or self._build_path(
+                bucket_class, user_id, record_id, filename
+            )
             
-            # Upload le fichier
-            response = await self.client.storage.from_(bucket_class.name).upload(
+            # Upload le fichier (sans nouvelle tentative : un premier envoi a pu aboutir)
+            await self.upstream.call(
+                self.client.storage.from_(bucket_class.name).upload,
                 path=file_path,
                 file=file_content,
                 file_options={"content-type": file.content_type}
             )
+            if self.post_upload and session:
+                # File pleine : le fichier est conservé sans traitement
+                processing_status = "pending" if self.post_upload.has_capacity() else "skipped"
+        
+        file_meta_data = FileMetadataCreate(
+            filename=file.filename or os.path.basename(file_path),
+            content_type=file.content_type or "application/octet-stream",
+            size=len(file_content),
+            bucket_name=bucket_class.name,
+            path=file_path,
+            description=description,
+            content_hash=content_hash,
+            processing_status=processing_status,
+            derivatives=derivatives,
+            item_id=record_id
+        )
+        return file_meta_data, file_content
+
+    def _schedule_post_upload(
+        self, bucket_class: Type[StorageBucket], file_meta: FileMetadata, file_content: bytes
+    ) -> bool:
+        """Planifie le traitement post-upload d'un fichier enregistré en attente"""
+        if self.post_upload is None or file_meta.processing_status != "pending":
+            return True
+        return self.post_upload.submit(
+            self.client,
+            bucket_class,
+            file_meta.id,
+            file_meta.path,
+            file_content,
+            file_meta.content_type,
+        )
+
+    async def upload_file(
+        self,
+        bucket_class: Type[StorageBucket],
+        file: UploadFile,
+        user_id: uuid.UUID,
+        record_id: Optional[uuid.UUID] = None,
+        description: Optional[str] = None,
+        session: Optional[Session] = None,
+        custom_path: Optional[str] = None,
+    ) -> Tuple[str, Optional[FileMetadata]]:
+        """Upload un fichier vers Supabase Storage et enregistre ses métadonnées"""
+        try:
+            file_meta_data, file_content = await self._store_upload(
+                bucket_class, file, user_id, record_id, description, session, custom_path
+            )
+            if isinstance(file_meta_data, FileMetadata):
+                return file_meta_data.path, file_meta_data
             
             # Enregistrer les métadonnées si session est fournie
             file_meta = None
             if session:
-                file_meta_data = FileMetadataCreate(
-                    filename=file.filename or os.path.basename(file_path),
-                    content_type=file.content_type or "application/octet-stream",
-                    size=len(file_content),
-                    bucket_name=bucket_class.name,
-                    path=file_path,
-                    description=description,
-                    item_id=record_id
-                )
                 file_meta = file_metadata.create(session, owner_id=user_id, obj_in=file_meta_data)
+                self._schedule_post_upload(bucket_class, file_meta, file_content)
             
-            return file_path, file_meta
+            return file_meta_data.path, file_meta
         
         except HTTPException:
             # Renvoyer l'exception HTTP déjà levée
@@ -120,6 +244,204 @@ class StorageService:
             # S'assurer que le fichier est remis à zéro pour une utilisation ultérieure
             await file.seek(0)
 
+    async def upload_files(
+        self,
+        bucket_class: Type[StorageBucket],
+        files: List[UploadFile],
+        user_id: uuid.UUID,
+        session: Session,
+        record_id: Optional[uuid.UUID] = None,
+        description: Optional[str] = None,
+        concurrency: int = 4,
+    ) -> List[Tuple[str, Union[FileMetadata, str]]]:
+        """Upload plusieurs fichiers en parallèle puis enregistre leurs métadonnées
+        
+        Au plus `concurrency` fichiers sont lus et transférés en même temps.
+        Les métadonnées sont insérées en une seule requête. Retourne, dans l'ordre
+        des fichiers, (nom, métadonnées) ou (nom, message d'erreur).
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def store(
+            file: UploadFile,
+        ) -> Union[Tuple[Union[FileMetadata, FileMetadataCreate], bytes], HTTPException]:
+            async with semaphore:
+                try:
+                    return await self._store_upload(
+                        bucket_class, file, user_id, record_id, description, session
+                    )
+                except HTTPException as e:
+                    return e
+                except Exception as e:
+                    logger.error(f"Error uploading file: {str(e)}")
+                    return HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+                finally:
+                    await file.seek(0)
+
+        stored = await asyncio.gather(*(store(file) for file in files))
+
+        results: List[Tuple[str, Union[FileMetadata, str]]] = []
+        to_create: List[Tuple[int, FileMetadataCreate, bytes]] = []
+        for index, (file, item) in enumerate(zip(files, stored, strict=True)):
+            filename = file.filename or ""
+            if isinstance(item, HTTPException):
+                results.append((filename, item.detail))
+                continue
+            file_meta, file_content = item
+            if isinstance(file_meta, FileMetadataCreate):
+                # Résultat remplacé après l'insertion groupée des métadonnées
+                to_create.append((index, file_meta, file_content))
+                results.append((filename, ""))
+            else:
+                results.append((filename, file_meta))
+        if not to_create:
+            return results
+
+        try:
+            ids = file_metadata.create_multi(
+                session, owner_id=user_id, objs_in=[meta for _, meta, _ in to_create]
+            )
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving file metadata: {str(e)}")
+            # Ne pas laisser d'objets orphelins dans le storage
+            uploaded = [
+                meta.path for _, meta, _ in to_create
+                if not file_metadata.count_references(
+                    session, bucket_name=bucket_class.name, path=meta.path
+                )
+            ]
+            if uploaded:
+                await self.upstream.call(
+                    self.client.storage.from_(bucket_class.name).remove, uploaded, idempotent=True
+                )
+            for index, _, _ in to_create:
+                results[index] = (results[index][0], f"Error saving file metadata: {str(e)}")
+            return results
+
+        created = {meta.id: meta for meta in file_metadata.get_multi_by_ids(session, ids=ids)}
+        skipped = []
+        for (index, _, file_content), id in zip(to_create, ids, strict=True):
+            file_meta = created[id]
+            if not self._schedule_post_upload(bucket_class, file_meta, file_content):
+                skipped.append(id)
+            results[index] = (results[index][0], file_meta)
+        if skipped:
+            file_metadata.set_processing_status(session, ids=skipped, status="skipped")
+        return results
+
+    async def create_upload_url(
+        self,
+        bucket_class: Type[StorageBucket],
+        user_id: uuid.UUID,
+        filename: str,
+        content_type: str,
+        size: int,
+        record_id: Optional[uuid.UUID] = None,
+    ) -> dict[str, str]:
+        """Génère une URL signée pour uploader un fichier directement dans le storage
+        
+        Les règles du bucket (type MIME, taille, chemin) sont vérifiées ici ;
+        le contenu ne transite pas par l'API.
+        """
+        self._check_content_type(bucket_class, content_type)
+        if size > bucket_class.max_file_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File too large. Maximum size: {bucket_class.max_file_size/1024/1024}MB"
+            )
+        file_path = self._build_path(bucket_class, user_id, record_id, filename)
+        try:
+            signed = await self.upstream.call(
+                self.client.storage.from_(bucket_class.name).create_signed_upload_url,
+                file_path,
+                idempotent=True,
+            )
+            return {"signed_url": signed["signed_url"], "token": signed["token"], "path": file_path}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating signed upload URL: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error generating upload URL: {str(e)}")
+
+    async def get_file_info(self, bucket_name: str, file_path: str) -> Optional[dict[str, Any]]:
+        """Taille et type MIME d'un objet du storage, None s'il n'existe pas"""
+        directory, filename = posixpath.split(file_path)
+        entries = await self.upstream.call(
+            self.client.storage.from_(bucket_name).list,
+            directory,
+            {"search": filename, "limit": 100},
+            idempotent=True,
+        )
+        for entry in entries:
+            if entry.get("name") == filename and entry.get("metadata"):
+                return {
+                    "size": int(entry["metadata"].get("size", 0)),
+                    "content_type": entry["metadata"].get("mimetype"),
+                }
+        return None
+
+    async def finalize_upload(
+        self,
+        bucket_class: Type[StorageBucket],
+        user_id: uuid.UUID,
+        filename: str,
+        content_type: str,
+        size: int,
+        session: Session,
+        record_id: Optional[uuid.UUID] = None,
+        description: Optional[str] = None,
+    ) -> FileMetadata:
+        """Enregistre les métadonnées d'un fichier uploadé via une URL signée
+        
+        L'objet doit exister et correspondre à la taille et au type déclarés,
+        sinon il est supprimé du storage.
+        """
+        self._check_content_type(bucket_class, content_type)
+        file_path = self._build_path(bucket_class, user_id, record_id, filename)
+
+        # Finalisation déjà faite : renvoyer les métadonnées existantes
+        existing = file_metadata.get_by_path(
+            session, owner_id=user_id, bucket_name=bucket_class.name, path=file_path
+        )
+        if existing:
+            return existing
+
+        try:
+            info = await self.get_file_info(bucket_class.name, file_path)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading file info: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error reading file info: {str(e)}")
+        if not info:
+            raise HTTPException(status_code=404, detail=f"File not found in storage: {file_path}")
+
+        errors = []
+        if info["size"] != size:
+            errors.append(f"size is {info['size']}, expected {size}")
+        if info["size"] > bucket_class.max_file_size:
+            errors.append(f"maximum size is {bucket_class.max_file_size/1024/1024}MB")
+        if info["content_type"] != content_type:
+            errors.append(f"content type is {info['content_type']}, expected {content_type}")
+        if errors:
+            # Objet non conforme : on ne le garde pas
+            await self.upstream.call(
+                self.client.storage.from_(bucket_class.name).remove, [file_path], idempotent=True
+            )
+            raise HTTPException(status_code=400, detail=f"Uploaded file rejected: {'; '.join(errors)}")
+
+        file_meta_data = FileMetadataCreate(
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            bucket_name=bucket_class.name,
+            path=file_path,
+            description=description,
+            item_id=record_id
+        )
+        return file_metadata.create(session, owner_id=user_id, obj_in=file_meta_data)
+
     async def get_file_url(
         self,
         bucket_name: str,
@@ -128,11 +450,17 @@ class StorageService:
     ) -> str:
         """Génère une URL signée pour accéder au fichier"""
         try:
-            signed_url = await self.client.storage.from_(bucket_name).create_signed_url(
+            signed_url = await _file_url_flight.do(
+                (bucket_name, file_path, expiration),
+                self.upstream.call,
+                self.client.storage.from_(bucket_name).create_signed_url,
                 path=file_path,
-                expires_in=expiration
+                expires_in=expiration,
+                idempotent=True,
             )
             return signed_url
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating signed URL: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error generating file URL: {str(e)}")
@@ -144,8 +472,12 @@ class StorageService:
     ) -> BytesIO:
         """Télécharge un fichier depuis Supabase Storage"""
         try:
-            response = await self.client.storage.from_(bucket_name).download(file_path)
+            response = await self.upstream.call(
+                self.client.storage.from_(bucket_name).download, file_path, idempotent=True
+            )
             return BytesIO(response)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error downloading file: {str(e)}")
             raise HTTPException(status_code=404, detail=f"Error downloading file: {str(e)}")
@@ -157,29 +489,167 @@ class StorageService:
         session: Optional[Session] = None,
         metadata_id: Optional[uuid.UUID] = None
     ) -> bool:
-        """Supprime un fichier de Supabase Storage et ses métadonnées si présentes"""
+        """Supprime un fichier de Supabase Storage et ses métadonnées si présentes
+        
+        L'objet n'est supprimé du stockage, avec ses miniatures, que lorsque plus
+        aucune métadonnée n'y fait référence (uploads dédupliqués).
+        """
         try:
-            # Supprimer le fichier du stockage
-            await self.client.storage.from_(bucket_name).remove(file_path)
-            
+            paths = [file_path]
             # Supprimer les métadonnées si nécessaire
             if session and metadata_id:
-                file_metadata.remove(session, id=metadata_id)
+                removed = file_metadata.remove(session, id=metadata_id)
+                references = file_metadata.count_references(
+                    session, bucket_name=bucket_name, path=file_path
+                )
+                if references:
+                    logger.info(f"Keeping {file_path}, still referenced {references} time(s)")
+                    return True
+                if removed is not None and removed.derivatives:
+                    paths.extend(removed.derivatives.values())
+            
+            # Supprimer le fichier du stockage
+            await self.upstream.call(
+                self.client.storage.from_(bucket_name).remove, paths, idempotent=True
+            )
             
             return True
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error deleting file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
 
+    async def remove_objects(self, bucket_name: str, paths: List[str]) -> List[str]:
+        """Supprime des objets du storage par lots, retourne les chemins en échec"""
+        failed = []
+        for start in range(0, len(paths), REMOVE_CHUNK_SIZE):
+            chunk = paths[start:start + REMOVE_CHUNK_SIZE]
+            try:
+                await self.upstream.call(
+                    self.client.storage.from_(bucket_name).remove, chunk, idempotent=True
+                )
+            except Exception as e:
+                logger.error(f"Error removing {len(chunk)} file(s) from {bucket_name}: {str(e)}")
+                failed.extend(chunk)
+        return failed
+
+    async def delete_files(
+        self,
+        session: Session,
+        user_id: uuid.UUID,
+        ids: Optional[List[uuid.UUID]] = None,
+        item_id: Optional[uuid.UUID] = None,
+        bucket_name: Optional[str] = None,
+    ) -> Tuple[int, int, List[str]]:
+        """Supprime plusieurs fichiers de l'utilisateur et leurs métadonnées
+        
+        Les métadonnées sont supprimées en une requête, limitée aux fichiers de
+        l'utilisateur ; les objets qui ne sont plus référencés sont ensuite
+        supprimés du storage par lots. Retourne le nombre de métadonnées
+        supprimées, le nombre d'objets supprimés et les chemins en échec.
+        """
+        try:
+            rows = file_metadata.remove_multi(
+                session, owner_id=user_id, ids=ids, item_id=item_id, bucket_name=bucket_name
+            )
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error deleting file metadata: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error deleting files: {str(e)}")
+
+        paths_by_bucket: dict[str, set[str]] = {}
+        for row in rows:
+            paths_by_bucket.setdefault(row["bucket_name"], set()).add(row["path"])
+
+        removed = 0
+        failed: List[str] = []
+        for bucket, paths in paths_by_bucket.items():
+            # Objets partagés (uploads dédupliqués) encore référencés : on les garde
+            referenced = file_metadata.get_referenced_paths(
+                session, bucket_name=bucket, paths=list(paths)
+            )
+            to_remove = paths - referenced
+            # Miniatures des objets supprimés
+            derivatives = {
+                path
+                for row in rows
+                if row["bucket_name"] == bucket and row["path"] in to_remove and row["derivatives"]
+                for path in row["derivatives"].values()
+            }
+            bucket_failed = set(await self.remove_objects(bucket, sorted(to_remove | derivatives)))
+            failed.extend(sorted(bucket_failed))
+            removed += len(to_remove - bucket_failed)
+
+        return len(rows), removed, failed
+
     async def list_files(
         self,
         bucket_name: str,
-        path: str = ""
+        path: str = "",
+        limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[dict[str, Any]]:
-        """Liste les fichiers dans un bucket de stockage"""
+        """Liste les fichiers dans un bucket de stockage
+        
+        Avec `limit`, retourne une page de résultats triés par nom. Les
+        sous-dossiers apparaissent comme des entrées sans id.
+        """
         try:
-            response = await self.client.storage.from_(bucket_name).list(path)
+            list_objects = self.client.storage.from_(bucket_name).list
+            if limit is None:
+                response = await self.upstream.call(list_objects, path, idempotent=True)
+            else:
+                response = await self.upstream.call(
+                    list_objects,
+                    path,
+                    {"limit": limit, "offset": offset, "sortBy": {"column": "name", "order": "asc"}},
+                    idempotent=True,
+                )
             return response
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error listing files: {str(e)}")
+
+    async def iter_files(
+        self,
+        bucket_name: str,
+        path: str = "",
+        page_size: int = 1000,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Parcourt récursivement les objets d'un dossier, page par page
+        
+        Chaque objet est produit avec son chemin complet ("path"), dans l'ordre
+        binaire des chemins : un sous-dossier "a" est parcouru après "a.txt",
+        comme "a/" se trie après "a.". Seule la page courante de chaque dossier
+        est gardée en mémoire.
+        """
+        # Sous-dossiers rencontrés, à parcourir à leur place dans l'ordre des chemins
+        folders: List[str] = []
+        offset = 0
+        while True:
+            entries = await self.list_files(bucket_name, path, limit=page_size, offset=offset)
+            for entry in entries:
+                is_folder = entry.get("id") is None
+                key = f"{entry['name']}/" if is_folder else entry["name"]
+                while folders and folders[0] < key:
+                    folder = heapq.heappop(folders)
+                    async for obj in self.iter_files(
+                        bucket_name, posixpath.join(path, folder.rstrip("/")), page_size
+                    ):
+                        yield obj
+                if is_folder:
+                    heapq.heappush(folders, key)
+                else:
+                    yield {**entry, "path": posixpath.join(path, entry["name"])}
+            if len(entries) < page_size:
+                break
+            offset += page_size
+        while folders:
+            folder = heapq.heappop(folders)
+            async for obj in self.iter_files(
+                bucket_name, posixpath.join(path, folder.rstrip("/")), page_size
+            ):
+                yield obj
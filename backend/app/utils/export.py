@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import uuid
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from datetime import date, datetime
+from typing import Any, Literal
+
+DataFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Content-Type accepté en entrée -> format
+IMPORT_FORMATS: dict[str, DataFormat] = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/csv": "csv",
+}
+
+# Taille cible des morceaux envoyés au client
+CHUNK_SIZE = 64 * 1024
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    return value
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    """Regroupe les lignes en morceaux d'environ CHUNK_SIZE octets.
+
+    La première ligne est envoyée seule pour que le premier octet parte sans attendre.
+    """
+    lines = iter(lines)
+    for first in lines:
+        yield first.encode()
+        break
+    buffer: list[str] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def ndjson_lines(
+    rows: Iterable[Mapping[str, Any]], fields: Sequence[str]
+) -> Iterator[str]:
+    for row in rows:
+        record = {field: _jsonable(row[field]) for field in fields}
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, dict | list):
+        return json.dumps(value, ensure_ascii=False)
+    return _jsonable(value)
+
+
+def csv_lines(
+    rows: Iterable[Mapping[str, Any]], fields: Sequence[str]
+) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(fields)
+    yield flush()
+    for row in rows:
+        writer.writerow([_csv_cell(row[field]) for field in fields])
+        yield flush()
+
+
+def stream_export(
+    rows: Iterable[Mapping[Any, Any]], fields: Sequence[str], format: DataFormat
+) -> Iterator[bytes]:
+    """Sérialise un flux de lignes en NDJSON ou CSV, par morceaux"""
+    lines = (
+        ndjson_lines(rows, fields) if format == "ndjson" else csv_lines(rows, fields)
+    )
+    return _chunked(lines)
+
+
+def ndjson_stream(records: Iterable[Mapping[str, Any]]) -> Iterator[bytes]:
+    """Sérialise des dictionnaires déjà prêts pour JSON, une ligne chacun"""
+    return _chunked(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
@@ -0,0 +1,69 @@
+import io
+import zipfile
+from typing import Optional
+
+# Signatures (magic bytes) des formats acceptés par les buckets
+_SIGNATURES: list[tuple[bytes, str]] = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+]
+
+_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def sniff_mime_type(content: bytes) -> Optional[str]:
+    """Détermine le type MIME réel d'un fichier à partir de son contenu
+
+    Retourne None quand le format n'est pas reconnu.
+    """
+    for signature, mime_type in _SIGNATURES:
+        if content.startswith(signature):
+            return mime_type
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    if content.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return _DOCX
+        except zipfile.BadZipFile:
+            return None
+        return "application/zip"
+    head = content[:4096]
+    try:
+        text = head.decode("utf-8")
+    except UnicodeDecodeError:
+        # Un caractère multi-octets peut être coupé en fin d'échantillon
+        try:
+            text = head[:-3].decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    if "\x00" not in text:
+        return "text/plain"
+    return None
+
+
+def make_thumbnails(
+    content: bytes, sizes: list[tuple[int, int]]
+) -> list[tuple[str, bytes]]:
+    """Génère des miniatures WebP, une par taille (largeur, hauteur) maximale
+
+    Exécutée dans un ProcessPoolExecutor : fonction de module, arguments picklables.
+    Nécessite Pillow (extra "images").
+    """
+    from PIL import Image, ImageOps
+
+    thumbnails = []
+    with Image.open(io.BytesIO(content)) as original:
+        image = ImageOps.exif_transpose(original)
+        for width, height in sizes:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((width, height))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="WEBP", quality=80)
+            thumbnails.append((f"{width}x{height}", buffer.getvalue()))
+    return thumbnails
@@ -0,0 +1,25 @@
+import argparse
+import logging
+
+from app.core.openapi import OpenAPIDocument
+from app.main import app
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Write openapi.json and its precompressed variants, see OPENAPI_ARTIFACT_DIR"
+    )
+    parser.add_argument("--output", default="openapi", help="directory to write to")
+    args = parser.parse_args()
+
+    document = OpenAPIDocument.from_app(app)
+    for path in document.write(args.output):
+        logger.info(f"{path} ({path.stat().st_size} bytes)")
+    logger.info(f"ETag {document.etag}")
+
+
+if __name__ == "__main__":
+    main()
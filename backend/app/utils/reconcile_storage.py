@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import timedelta
+
+from app.core.auth import get_super_client
+from app.core.config import settings
+from app.models import STORAGE_BUCKETS
+from app.services.reconcile import ListingOrderError, reconcile_bucket
+from app.services.storage import StorageService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(bucket_names: list[str], delete: bool) -> None:
+    storage_service = StorageService(await get_super_client())
+    for bucket_class in STORAGE_BUCKETS:
+        if bucket_names and bucket_class.name not in bucket_names:
+            continue
+        report = await reconcile_bucket(
+            storage_service,
+            bucket_class,
+            delete=delete,
+            min_age=timedelta(hours=settings.RECONCILE_MIN_AGE_HOURS),
+        )
+        print(json.dumps(report))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find Storage objects without metadata and metadata without objects"
+    )
+    parser.add_argument(
+        "--bucket", action="append", default=[], help="bucket to check (default: all)"
+    )
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="delete the orphans instead of only reporting them",
+    )
+    args = parser.parse_args()
+
+    logger.info("Reconciling storage")
+    try:
+        asyncio.run(reconcile(args.bucket, args.delete))
+    except ListingOrderError as e:
+        # Nothing was deleted from this bucket: the comparison would be wrong
+        logger.error(f"Reconciliation aborted: {e}")
+        sys.exit(1)
+    logger.info("Storage reconciled")
+
+
+if __name__ == "__main__":
+    main()
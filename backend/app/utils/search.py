@@ -0,0 +1,32 @@
+import base64
+import re
+import uuid
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_prefix_tsquery(text: str) -> str | None:
+    """Transforme une saisie libre en tsquery avec correspondance par préfixe.
+
+    "rapport ann" -> "rapport:* & ann:*". Retourne None si aucun terme exploitable.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def encode_search_cursor(rank: float, id: uuid.UUID) -> str:
+    """Encode la position (rang, id) du dernier résultat renvoyé"""
+    raw = f"{rank!r}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    """Décode un curseur produit par encode_search_cursor (ValueError si invalide)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return float(rank), uuid.UUID(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor}") from e
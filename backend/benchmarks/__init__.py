@@ -0,0 +1 @@
+"""Microbenchmarks of hot paths: run with `python -m benchmarks --help` from the backend directory"""
@@ -0,0 +1,135 @@
+import argparse
+import json
+import logging
+import sys
+
+from benchmarks.runner import BENCHMARKS, compare, format_comparison, run_benchmarks
+from benchmarks.startup import (
+    STARTUP_BUDGET,
+    format_import_profile,
+    import_profile,
+    time_to_first_request,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run(args: argparse.Namespace) -> None:
+    from app.core.config import settings
+
+    if settings.SUPABASE_FAKE:
+        from app.fake_supabase import enable
+
+        enable(settings)
+    # Registers the benchmarks; imports the app
+    import benchmarks.cases  # noqa: F401
+
+    selected = [
+        bench
+        for bench in BENCHMARKS.values()
+        if (not args.filter or any(f in bench.name for f in args.filter))
+        and not (args.skip_db and bench.requires_db)
+    ]
+    logger.info(f"Running {len(selected)} benchmarks")
+    report = run_benchmarks(selected, repeat=args.repeat, min_time=args.min_time)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+def compare_reports(args: argparse.Namespace) -> None:
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    rows = compare(base, head, threshold=args.threshold)
+    print(format_comparison(rows))
+    if any(row["status"] == "slower" for row in rows):
+        sys.exit(1)
+
+
+def imports(args: argparse.Namespace) -> None:
+    profile = import_profile(args.module)
+    print(
+        json.dumps(profile, indent=2)
+        if args.json
+        else format_import_profile(profile, args.top)
+    )
+
+
+def startup(args: argparse.Namespace) -> None:
+    result = time_to_first_request(args.path, runs=args.runs)
+    print(json.dumps({**result, "budget": args.budget}, indent=2))
+    if result["median"] > args.budget:
+        logger.error(
+            f"Time to first request {result['median']:.2f}s exceeds {args.budget}s"
+        )
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Microbenchmarks of CRUD, serialization, auth and policy generation",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser(
+        "run", help="run the benchmarks, print the JSON report"
+    )
+    run_parser.add_argument(
+        "--filter", action="append", help="only names containing this"
+    )
+    run_parser.add_argument(
+        "--skip-db", action="store_true", help="skip the Postgres benchmarks"
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per repeat"
+    )
+    run_parser.add_argument("--output", help="write the JSON report to this file")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare two reports, exit 1 if a benchmark got slower"
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="relative median change to flag"
+    )
+    compare_parser.set_defaults(func=compare_reports)
+
+    imports_parser = commands.add_parser(
+        "imports", help="-X importtime of a module, self time per top-level package"
+    )
+    imports_parser.add_argument("--module", default="app.main")
+    imports_parser.add_argument("--top", type=int, default=20)
+    imports_parser.add_argument("--json", action="store_true")
+    imports_parser.set_defaults(func=imports)
+
+    startup_parser = commands.add_parser(
+        "startup", help="time to first request in fresh processes, exit 1 over budget"
+    )
+    startup_parser.add_argument("--path", default="/")
+    startup_parser.add_argument("--runs", type=int, default=3)
+    startup_parser.add_argument(
+        "--budget",
+        type=float,
+        default=STARTUP_BUDGET,
+        help="seconds (default: STARTUP_BUDGET)",
+    )
+    startup_parser.set_defaults(func=startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
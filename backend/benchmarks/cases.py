@@ -0,0 +1,233 @@
+import uuid
+from collections.abc import Coroutine, Iterator
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Any, TypeVar
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from gotrue.types import UserResponse
+from sqlmodel import Session
+
+from app import crud
+from app.core.auth import get_current_user
+from app.core.db import engine
+from app.fake_supabase.auth import FakeAuth
+from app.main import app
+from app.models import STORAGE_BUCKETS, FileMetadata, Item, Profile, User
+from app.models.item import ItemCreate, ItemUpdate
+from app.models.storage import ItemDocuments
+from benchmarks.runner import benchmark
+
+T = TypeVar("T")
+
+ROW_COUNTS = (1, 100, 1000)
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine that never suspends, without the overhead of an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value  # type: ignore[no-any-return]
+    coro.close()
+    raise RuntimeError("coroutine suspended, it needs an event loop")
+
+
+@contextmanager
+def rollback_session() -> Iterator[Session]:
+    """Session in an outer transaction rolled back at the end, as in the tests"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+def _owner(session: Session) -> uuid.UUID:
+    owner = User(id=uuid.uuid4(), email=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+    session.add(owner)
+    session.commit()
+    return owner.id
+
+
+def _seed_items(session: Session, owner_id: uuid.UUID, count: int) -> list[uuid.UUID]:
+    return crud.item.create_multi(
+        session,
+        owner_id=owner_id,
+        objs_in=[
+            ItemCreate(title=f"item {i}", description="benchmark") for i in range(count)
+        ],
+    )
+
+
+# CRUDBase against Postgres
+
+
+@benchmark("crud.get", group="crud", requires_db=True)
+def crud_get(stack: ExitStack) -> Any:
+    session = stack.enter_context(rollback_session())
+    id = _seed_items(session, _owner(session), 1)[0]
+    return lambda: crud.item.get(session, id=id)
+
+
+@benchmark("crud.get_multi[100]", group="crud", requires_db=True)
+def crud_get_multi(stack: ExitStack) -> Any:
+    session = stack.enter_context(rollback_session())
+    _seed_items(session, _owner(session), 100)
+    return lambda: crud.item.get_multi(session, limit=100)
+
+
+@benchmark("crud.create", group="crud", requires_db=True)
+def crud_create(stack: ExitStack) -> Any:
+    session = stack.enter_context(rollback_session())
+    owner_id = _owner(session)
+    obj_in = ItemCreate(title="benchmark", description="benchmark")
+    return lambda: crud.item.create(session, owner_id=owner_id, obj_in=obj_in)
+
+
+@benchmark("crud.update", group="crud", requires_db=True)
+def crud_update(stack: ExitStack) -> Any:
+    session = stack.enter_context(rollback_session())
+    id = _seed_items(session, _owner(session), 1)[0]
+    obj_in = ItemUpdate(description="updated")
+    return lambda: crud.item.update(session, id=id, obj_in=obj_in)
+
+
+@benchmark("crud.create+remove", group="crud", requires_db=True)
+def crud_remove(stack: ExitStack) -> Any:
+    # remove needs a fresh row per call: subtract crud.create to isolate it
+    session = stack.enter_context(rollback_session())
+    owner_id = _owner(session)
+    obj_in = ItemCreate(title="benchmark", description="benchmark")
+
+    def create_and_remove() -> None:
+        db_obj = crud.item.create(session, owner_id=owner_id, obj_in=obj_in)
+        crud.item.remove(session, id=db_obj.id)
+
+    return create_and_remove
+
+
+# Response serialization, through the routes' own response fields
+
+
+def _route(path: str, method: str) -> APIRoute:
+    for route in app.routes:
+        if (
+            isinstance(route, APIRoute)
+            and route.path_format.endswith(path)
+            and method in route.methods
+        ):
+            return route
+    raise LookupError(f"{method} {path}")
+
+
+def _serialize(route: APIRoute, rows: list[Any]) -> bytes:
+    content = run_sync(
+        serialize_response(field=route.response_field, response_content=rows)
+    )
+    return JSONResponse(content).body
+
+
+def _items(count: int) -> list[Item]:
+    owner_id = uuid.uuid4()
+    return [
+        Item(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            title=f"item {i}",
+            description="benchmark",
+        )
+        for i in range(count)
+    ]
+
+
+def _files(count: int) -> list[FileMetadata]:
+    owner_id, item_id, now = uuid.uuid4(), uuid.uuid4(), datetime.utcnow()
+    return [
+        FileMetadata(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            item_id=item_id,
+            filename=f"file-{i}.pdf",
+            content_type="application/pdf",
+            size=1024 * (i + 1),
+            bucket_name=ItemDocuments.name,
+            path=f"item/{item_id}/file-{i}.pdf",
+            processing_status="done",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _register_serialization(count: int) -> None:
+    @benchmark(f"serialize.items[{count}]", group="serialization")
+    def serialize_items(stack: ExitStack) -> Any:  # noqa: ARG001
+        route, rows = _route("/items/get-items", "GET"), _items(count)
+        return lambda: _serialize(route, rows)
+
+    @benchmark(f"serialize.files[{count}]", group="serialization")
+    def serialize_files(stack: ExitStack) -> Any:  # noqa: ARG001
+        route, rows = _route("/storage/files", "GET"), _files(count)
+        return lambda: _serialize(route, rows)
+
+
+for _count in ROW_COUNTS:
+    _register_serialization(_count)
+
+
+# Auth
+
+
+class _StubAuth:
+    def __init__(self, response: UserResponse) -> None:
+        self.response = response
+
+    async def get_user(self, jwt: str) -> UserResponse:  # noqa: ARG002
+        return self.response
+
+
+class _StubClient:
+    def __init__(self, response: UserResponse) -> None:
+        self.auth = _StubAuth(response)
+
+
+@benchmark("auth.get_current_user", group="auth")
+def auth_get_current_user(stack: ExitStack) -> Any:  # noqa: ARG001
+    # GoTrue answer shaped like the real one, the HTTP call itself is not measured
+    user = FakeAuth("benchmark").create_user("bench@example.com", None)
+    client = _StubClient(UserResponse(user=user))
+    return lambda: run_sync(get_current_user("token", client))  # type: ignore[arg-type]
+
+
+# Storage paths and RLS policies
+
+
+@benchmark("storage.path_pattern", group="policies")
+def storage_path_pattern(stack: ExitStack) -> Any:  # noqa: ARG001
+    user_id, record_id = uuid.uuid4(), uuid.uuid4()
+    return lambda: ItemDocuments.get_path_pattern().format(
+        user_id=user_id, record_id=record_id, filename="report.pdf"
+    )
+
+
+@benchmark("policies.generate", group="policies")
+def policies_generate(stack: ExitStack) -> Any:  # noqa: ARG001
+    # What alembic/env.py emits for a migration touching every model and bucket
+    models = [Item, Profile, FileMetadata]
+
+    def generate() -> list[str]:
+        statements = []
+        for model in models:
+            statements += model.get_policy_statements(model.__tablename__)
+        for bucket_class in STORAGE_BUCKETS:
+            statements += bucket_class.get_policy_statements()
+        return statements
+
+    return generate
@@ -0,0 +1,150 @@
+import platform
+import statistics
+import subprocess
+import timeit
+from collections.abc import Callable
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+# Builds the timed callable; setup and teardown go through the ExitStack
+Factory = Callable[[ExitStack], Callable[[], Any]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    factory: Factory
+    requires_db: bool = False
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str, group: str, requires_db: bool = False
+) -> Callable[[Factory], Factory]:
+    """Register a benchmark factory under `name`"""
+
+    def register(factory: Factory) -> Factory:
+        BENCHMARKS[name] = Benchmark(name, group, factory, requires_db)
+        return factory
+
+    return register
+
+
+def measure(
+    fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2
+) -> dict[str, Any]:
+    """Time `fn`, calibrating the loop count so that one repeat lasts `min_time` seconds"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    median = statistics.median(times)
+    return {
+        "number": number,
+        "repeat": repeat,
+        # seconds per call
+        "min": min(times),
+        "median": median,
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "ops": 1 / median if median else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    benchmarks: list[Benchmark], repeat: int = 5, min_time: float = 0.2
+) -> dict[str, Any]:
+    """Run each benchmark in its own setup/teardown and collect the timings"""
+    results = {}
+    for bench in benchmarks:
+        with ExitStack() as stack:
+            fn = bench.factory(stack)
+            results[bench.name] = {
+                "group": bench.group,
+                **measure(fn, repeat, min_time),
+            }
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def compare(
+    base: dict[str, Any], head: dict[str, Any], threshold: float = 0.10
+) -> list[dict[str, Any]]:
+    """Median change per benchmark; `status` is "slower"/"faster" beyond the threshold"""
+    rows = []
+    names = sorted(set(base["benchmarks"]) | set(head["benchmarks"]))
+    for name in names:
+        before = base["benchmarks"].get(name)
+        after = head["benchmarks"].get(name)
+        if before is None or after is None:
+            rows.append(
+                {
+                    "name": name,
+                    "base": before and before["median"],
+                    "head": after and after["median"],
+                    "change": None,
+                    "status": "new" if before is None else "missing",
+                }
+            )
+            continue
+        change = after["median"] / before["median"] - 1
+        status = "~"
+        if change > threshold:
+            status = "slower"
+        elif change < -threshold:
+            status = "faster"
+        rows.append(
+            {
+                "name": name,
+                "base": before["median"],
+                "head": after["median"],
+                "change": change,
+                "status": status,
+            }
+        )
+    return rows
+
+
+def format_comparison(rows: list[dict[str, Any]]) -> str:
+    """Plain-text table, times in microseconds"""
+
+    def us(value: float | None) -> str:
+        return "-" if value is None else f"{value * 1e6:.2f}"
+
+    width = max([len(row["name"]) for row in rows] + [9])
+    lines = [
+        f"{'benchmark':<{width}}  {'base µs':>12}  {'head µs':>12}  {'change':>8}  status"
+    ]
+    for row in rows:
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        lines.append(
+            f"{row['name']:<{width}}  {us(row['base']):>12}  {us(row['head']):>12}  "
+            f"{change:>8}  {row['status']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,78 @@
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from time import perf_counter
+from typing import Any
+
+# Seconds from interpreter start to the first response, see time_to_first_request
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "3.0"))
+
+# Imports the app, starts it (lifespan included) and serves one request
+_FIRST_REQUEST = """
+from fastapi.testclient import TestClient
+import app.main
+with TestClient(app.main.app) as client:
+    assert client.get({path!r}).status_code == 200
+"""
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ.copy(),
+    )
+
+
+def import_profile(module: str = "app.main") -> dict[str, Any]:
+    """`-X importtime` of a fresh interpreter, self time summed per top-level package (ms)"""
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    packages: dict[str, dict[str, float]] = defaultdict(
+        lambda: {"self": 0.0, "modules": 0}
+    )
+    total = 0.0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        if not self_us.isdigit():  # header line
+            continue
+        package = packages[name.split(".")[0]]
+        package["self"] += int(self_us) / 1000
+        package["modules"] += 1
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return {
+        "module": module,
+        "total": round(total, 1),
+        "packages": {
+            name: {"self": round(stats["self"], 1), "modules": int(stats["modules"])}
+            for name, stats in sorted(
+                packages.items(), key=lambda item: -item[1]["self"]
+            )
+        },
+    }
+
+
+def format_import_profile(profile: dict[str, Any], top: int = 20) -> str:
+    lines = [
+        f"import {profile['module']}: {profile['total']} ms",
+        f"{'package':<24} {'self ms':>9} {'modules':>8}",
+    ]
+    for name, stats in list(profile["packages"].items())[:top]:
+        lines.append(f"{name:<24} {stats['self']:>9.1f} {stats['modules']:>8}")
+    return "\n".join(lines)
+
+
+def time_to_first_request(path: str = "/", runs: int = 3) -> dict[str, float]:
+    """Wall time from interpreter start to the first response, in fresh processes (s)"""
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        _run(["-c", _FIRST_REQUEST.format(path=path)])
+        times.append(perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times), "max": max(times)}
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+import logging
+
+from app.core.config import settings
+from loadtest.runner import LoadTestConfig, run_load_test
+from loadtest.scenarios import SCENARIOS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest",
+        description="Run a load-test scenario against the API and print latency statistics as JSON",
+    )
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="full")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument(
+        "--ramp-up", type=float, default=0, help="seconds to start all users"
+    )
+    parser.add_argument(
+        "--upload-size", type=int, default=64 * 1024, help="bytes per upload"
+    )
+    parser.add_argument(
+        "--api-url", default=f"http://localhost:8000{settings.API_V1_STR}"
+    )
+    parser.add_argument("--supabase-url", default=settings.SUPABASE_URL)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    if settings.SUPABASE_FAKE and not args.supabase_url:
+        # The API runs in another process: an in-process fake would not be shared
+        parser.error(
+            "with SUPABASE_FAKE, start `python -m app.fake_supabase --mirror-users` "
+            "and set SUPABASE_URL and the keys it prints, for the API and the harness"
+        )
+
+    config = LoadTestConfig(
+        api_url=args.api_url,
+        supabase_url=args.supabase_url,
+        anon_key=settings.SUPABASE_KEY,
+        service_key=settings.SUPABASE_SERVICE_KEY,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        upload_size=args.upload_size,
+    )
+    logger.info(
+        f"Running '{args.scenario}' with {args.concurrency} users for {args.duration}s"
+    )
+    report = asyncio.run(run_load_test(args.scenario, SCENARIOS[args.scenario], config))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import secrets
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Any
+
+import httpx
+
+from loadtest.scenarios import ScenarioError, VirtualUser
+from loadtest.stats import Recorder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadTestConfig:
+    api_url: str
+    supabase_url: str
+    anon_key: str
+    service_key: str
+    concurrency: int = 10
+    duration: float = 60.0
+    ramp_up: float = 0.0
+    upload_size: int = 64 * 1024
+    timeout: float = 30.0
+
+
+class TestUsers:
+    """Creates throwaway auth users through the GoTrue admin API, deletes them afterwards"""
+
+    def __init__(self, admin: httpx.AsyncClient) -> None:
+        self.admin = admin
+        self.ids: list[str] = []
+
+    async def create(self, count: int) -> list[tuple[str, str]]:
+        run_id = uuid.uuid4().hex[:8]
+        credentials = []
+        for i in range(count):
+            email = f"loadtest-{run_id}-{i}@example.com"
+            password = secrets.token_urlsafe(16)
+            response = await self.admin.post(
+                "/auth/v1/admin/users",
+                json={"email": email, "password": password, "email_confirm": True},
+            )
+            response.raise_for_status()
+            self.ids.append(response.json()["id"])
+            credentials.append((email, password))
+        return credentials
+
+    async def delete(self) -> None:
+        for id in self.ids:
+            try:
+                await self.admin.delete(f"/auth/v1/admin/users/{id}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not delete test user {id}: {e!r}")
+        self.ids = []
+
+
+async def _run_user(
+    user: VirtualUser,
+    scenario: Callable[[VirtualUser], Awaitable[None]],
+    deadline: float,
+    delay: float,
+) -> int:
+    await asyncio.sleep(delay)
+    iterations = 0
+    while monotonic() < deadline:
+        try:
+            await scenario(user)
+        except ScenarioError as e:
+            logger.debug(str(e))
+        iterations += 1
+    return iterations
+
+
+async def run_load_test(
+    scenario_name: str,
+    scenario: Callable[[VirtualUser], Awaitable[None]],
+    config: LoadTestConfig,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict[str, Any]:
+    """Run `concurrency` virtual users looping over the scenario for `duration` seconds"""
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=config.concurrency * 2)
+    api = httpx.AsyncClient(
+        base_url=config.api_url,
+        timeout=config.timeout,
+        limits=limits,
+        transport=transport,
+    )
+    auth = httpx.AsyncClient(
+        base_url=config.supabase_url,
+        timeout=config.timeout,
+        limits=limits,
+        headers={"apikey": config.anon_key},
+    )
+    admin = httpx.AsyncClient(
+        base_url=config.supabase_url,
+        timeout=config.timeout,
+        headers={
+            "apikey": config.service_key,
+            "Authorization": f"Bearer {config.service_key}",
+        },
+    )
+    users = TestUsers(admin)
+    try:
+        credentials = await users.create(config.concurrency)
+        virtual_users = [
+            VirtualUser(api, auth, recorder, email, password, config.upload_size)
+            for email, password in credentials
+        ]
+        started_at = datetime.now(timezone.utc)
+        start = monotonic()
+        deadline = start + config.duration
+        step = config.ramp_up / config.concurrency if config.concurrency else 0
+        iterations = await asyncio.gather(
+            *(
+                _run_user(user, scenario, deadline, i * step)
+                for i, user in enumerate(virtual_users)
+            )
+        )
+        elapsed = monotonic() - start
+    finally:
+        await users.delete()
+        for client in (api, auth, admin):
+            await client.aclose()
+
+    return {
+        "scenario": scenario_name,
+        "started_at": started_at.isoformat(),
+        "concurrency": config.concurrency,
+        "duration": round(elapsed, 2),
+        "iterations": sum(iterations),
+        **recorder.summary(elapsed),
+    }
@@ -0,0 +1,120 @@
+import os
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+from typing import Any
+
+import httpx
+
+from loadtest.stats import Recorder
+
+
+class ScenarioError(Exception):
+    """A step failed, the rest of the iteration is skipped"""
+
+
+class VirtualUser:
+    """One simulated client: its credentials, HTTP clients and current token"""
+
+    def __init__(
+        self,
+        api: httpx.AsyncClient,
+        auth: httpx.AsyncClient,
+        recorder: Recorder,
+        email: str,
+        password: str,
+        upload_size: int,
+    ) -> None:
+        self.api = api
+        self.auth = auth
+        self.recorder = recorder
+        self.email = email
+        self.password = password
+        self.upload_size = upload_size
+        self.token: str | None = None
+
+    async def request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        client: httpx.AsyncClient | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request and record its latency under the endpoint name"""
+        client = client or self.api
+        if self.token and client is self.api:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.token}"
+        start = perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, perf_counter() - start, ok=False)
+            raise ScenarioError(f"{endpoint}: {e!r}") from e
+        self.recorder.record(endpoint, perf_counter() - start, ok=response.is_success)
+        if not response.is_success:
+            raise ScenarioError(f"{endpoint}: HTTP {response.status_code}")
+        return response
+
+    async def login(self) -> None:
+        response = await self.request(
+            "POST /auth/v1/token",
+            "POST",
+            "/auth/v1/token",
+            client=self.auth,
+            params={"grant_type": "password"},
+            json={"email": self.email, "password": self.password},
+        )
+        self.token = response.json()["access_token"]
+
+
+async def full_flow(user: VirtualUser) -> None:
+    """login → list items → create → upload → signed URL → delete"""
+    await user.login()
+    await user.request(
+        "GET /items/get-items", "GET", "/items/get-items", params={"limit": 20}
+    )
+    item = (
+        await user.request(
+            "POST /items/create-item",
+            "POST",
+            "/items/create-item",
+            json={"title": "load test", "description": "created by the load test"},
+        )
+    ).json()
+    # Unique content so deduplication does not turn uploads into no-ops
+    content = os.urandom(user.upload_size // 2).hex().encode()
+    file_meta = (
+        await user.request(
+            "POST /storage/upload/document/{item_id}",
+            "POST",
+            f"/storage/upload/document/{item['id']}",
+            files={"file": ("load-test.txt", content, "text/plain")},
+        )
+    ).json()
+    await user.request(
+        "GET /storage/file/{file_id}/url", "GET", f"/storage/file/{file_meta['id']}/url"
+    )
+    await user.request(
+        "DELETE /items/delete/{id}", "DELETE", f"/items/delete/{item['id']}"
+    )
+
+
+async def browse(user: VirtualUser) -> None:
+    """Read-only traffic: list and search items, list files"""
+    if user.token is None:
+        await user.login()
+    await user.request(
+        "GET /items/get-items", "GET", "/items/get-items", params={"limit": 20}
+    )
+    await user.request(
+        "GET /items/search", "GET", "/items/search", params={"q": "load"}
+    )
+    await user.request(
+        "GET /storage/files", "GET", "/storage/files", params={"limit": 20}
+    )
+
+
+SCENARIOS: dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "full": full_flow,
+    "browse": browse,
+}
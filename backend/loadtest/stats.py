@@ -0,0 +1,56 @@
+import math
+from collections import defaultdict
+from typing import Any
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Percentile (nearest rank) of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Collects request latencies and errors per endpoint"""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        self.latencies[endpoint].append(latency)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    @staticmethod
+    def _summarize(
+        latencies: list[float], errors: int, elapsed: float
+    ) -> dict[str, Any]:
+        values = sorted(latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+            # latencies in milliseconds
+            "mean": round(sum(values) / count * 1000, 2) if count else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p95": round(percentile(values, 95) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if count else 0.0,
+        }
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        """Per-endpoint and overall statistics, latencies in ms, throughput in req/s"""
+        endpoints = {
+            endpoint: self._summarize(latencies, self.errors[endpoint], elapsed)
+            for endpoint, latencies in sorted(self.latencies.items())
+        }
+        total = self._summarize(
+            [latency for latencies in self.latencies.values() for latency in latencies],
+            sum(self.errors.values()),
+            elapsed,
+        )
+        return {"total": total, "endpoints": endpoints}
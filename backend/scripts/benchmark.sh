@@ -0,0 +1,7 @@
+#! /usr/bin/env bash
+set -e
+set -x
+
+# Usage: bash scripts/benchmark.sh run --output head.json
+#        bash scripts/benchmark.sh compare base.json head.json
+python -m benchmarks "$@"
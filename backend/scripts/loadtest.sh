@@ -0,0 +1,6 @@
+#! /usr/bin/env bash
+set -e
+set -x
+
+# Usage: bash scripts/loadtest.sh --scenario full --concurrency 20 --duration 60 --output results.json
+python -m loadtest "$@"
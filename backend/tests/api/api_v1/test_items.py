@@ -1,3 +1,6 @@
+import uuid
+
+import pytest
 from faker import Faker
 from fastapi.testclient import TestClient
 
@@ -111,3 +114,58 @@ def test_delete_item(client: TestClient, token: Token, test_item) -> None:
     )
     assert get_response.status_code == 200
     assert get_response.json() is None
+
+
+def test_search_items_pages(client: TestClient, token: Token) -> None:
+    """Test that following next_cursor visits every match exactly once"""
+    headers = get_auth_header(token.access_token)
+    marker = f"zq{uuid.uuid4().hex[:8]}"
+    # Identical titles: every match has the same rank, the id breaks ties
+    for _ in range(5):
+        response = client.post(
+            f"{settings.API_V1_STR}/items/create-item",
+            headers=headers,
+            json=ItemCreate(title=f"{marker} report").model_dump(),
+        )
+        assert response.status_code == 200
+
+    ids: list[str] = []
+    params = {"q": marker, "limit": 2}
+    for _ in range(5):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/search", headers=headers, params=params
+        )
+        assert response.status_code == 200
+        data = response.json()
+        ids += [obj["id"] for obj in data["data"]]
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert len(ids) == len(set(ids)) == 5
+
+
+def test_import_items_too_large(
+    client: TestClient, token: Token, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that an import body over IMPORT_MAX_BYTES is refused with 413"""
+    monkeypatch.setattr(settings, "IMPORT_MAX_BYTES", 100)
+    headers = {
+        **get_auth_header(token.access_token),
+        "Content-Type": "application/x-ndjson",
+    }
+    body = b'{"title": "too large"}\n' * 10
+
+    # Declared size
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import", headers=headers, content=body
+    )
+    assert response.status_code == 413
+
+    # Streamed body without Content-Length
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        headers=headers,
+        content=iter([body[:60], body[60:]]),
+    )
+    assert response.status_code == 413
@@ -1,45 +1,19 @@
 import io
 import uuid
-from typing import Dict, Generator
-from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from fastapi import UploadFile
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
 
 from app.core.auth import get_current_user, get_super_client
 from app.core.config import settings
+from app.core.db import get_db
 from app.main import app
 from app.models.file import FileMetadata
 from app.models.storage import ItemDocuments, ProfilePictures
 from app.schemas.auth import UserIn
 
-# Créer un moteur de base de données en mémoire pour les tests
-engine = create_engine(
-    "sqlite://",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-
-
-def get_test_db() -> Generator[Session, None, None]:
-    """Générateur de session de base de données pour les tests"""
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
-
-
-async def get_test_superuser() -> UserIn:
-    """Utilisateur superuser pour les tests d'authentification"""
-    return UserIn(
-        id="11111111-1111-1111-1111-111111111111",  # ID fictif mais constant
-        email=settings.FIRST_SUPERUSER,
-        access_token="test_superuser_token",
-    )
-
 
 # Mock pour le service de stockage Supabase
 class MockStorageService:
@@ -52,7 +26,7 @@ class MockStorageService:
         if session:
             file_meta = FileMetadata(
                 id=uuid.uuid4(),
-                owner_id=uuid.UUID("11111111-1111-1111-1111-111111111111"),  # ID du superuser
+                owner_id=kwargs.get("user_id"),
                 filename=kwargs.get("file").filename or "test.txt",
                 content_type=kwargs.get("file").content_type or "text/plain",
                 size=100,
@@ -108,20 +82,32 @@ async def get_test_super_client():
 
 
 @pytest.fixture
-def client(superuser_auth):
-    """Client de test avec authentification superuser"""
+def client(db, superuser_id):
+    """Client de test authentifié, sur la session de la base de test"""
+    async def get_test_superuser() -> UserIn:
+        return UserIn(
+            id=str(superuser_id),
+            email=settings.FIRST_SUPERUSER,
+            app_metadata={},
+            user_metadata={},
+            aud="authenticated",
+            created_at=datetime.now(),
+            access_token="test_superuser_token",
+        )
+
+    def get_test_db():
+        yield db
+
     # Remplacer les dépendances
     app.dependency_overrides[get_current_user] = get_test_superuser
     app.dependency_overrides[get_super_client] = get_test_super_client
-    app.dependency_overrides["get_db"] = get_test_db
+    app.dependency_overrides[get_db] = get_test_db
     
     # Remplacer le service de stockage par notre mock
     from app.api.deps import get_storage_service_dep
     app.dependency_overrides[get_storage_service_dep] = get_test_storage_service
     
     with TestClient(app) as c:
-        # Ajouter l'en-tête d'authentification du superuser
-        c.headers.update(superuser_auth)
         yield c
 
     # Nettoyer les remplacements après les tests
@@ -129,18 +115,15 @@ def client(superuser_auth):
 
 
 @pytest.fixture
-def test_db():
-    """Base de données SQLite en mémoire pour les tests"""
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+def test_db(db):
+    """Session de la base de test, partagée avec l'application"""
+    return db
 
 
 @pytest.fixture
-def superuser_id():
-    """ID du superuser pour les tests"""
-    return uuid.UUID("11111111-1111-1111-1111-111111111111")
+def superuser_id(owner_id):
+    """ID de l'utilisateur authentifié pour les tests"""
+    return owner_id
 
 
 def test_upload_profile_picture(client):
@@ -19,13 +19,14 @@ load_dotenv(test_env_path)
 # Vérifier les variables requises
 required_vars = [
     "PROJECT_NAME",
-    "SUPABASE_URL",
-    "SUPABASE_KEY",
     "POSTGRES_SERVER",
     "POSTGRES_USER",
     "FIRST_SUPERUSER",
     "FIRST_SUPERUSER_PASSWORD"
 ]
+# Avec SUPABASE_FAKE, Auth et Storage sont simulés en mémoire (app.fake_supabase)
+if os.getenv("SUPABASE_FAKE", "").lower() not in ("1", "true", "yes"):
+    required_vars += ["SUPABASE_URL", "SUPABASE_KEY"]
 
 missing_vars = [var for var in required_vars if not os.getenv(var)]
 if missing_vars:
@@ -33,53 +34,154 @@ if missing_vars:
         f"Missing required environment variables in {test_env_path.name}: {', '.join(missing_vars)}"
     )
 
+
+def _create_worker_database(worker: str) -> str | None:
+    """Copie la base de test pour un worker pytest-xdist (CREATE DATABASE ... TEMPLATE)
+
+    Retourne None si la base ne peut pas servir de modèle (connexions actives,
+    comme avec les services de `supabase start`) ou si le serveur est injoignable :
+    les workers partagent alors la base, isolés par les transactions annulées de
+    la fixture `db`.
+    """
+    import time
+
+    import psycopg
+    from psycopg import sql
+
+    base = os.getenv("POSTGRES_DB") or "postgres"
+    name = f"{base}_test_{worker}"
+    conninfo = psycopg.conninfo.make_conninfo(
+        host=os.getenv("POSTGRES_SERVER"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD", ""),
+        dbname="template1",
+    )
+    try:
+        with psycopg.connect(conninfo, autocommit=True) as conn:
+            conn.execute(
+                sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name))
+            )
+            # Les workers copient le modèle en même temps : réessayer brièvement
+            for attempt in range(10):
+                try:
+                    conn.execute(
+                        sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                            sql.Identifier(name), sql.Identifier(base)
+                        )
+                    )
+                    return name
+                except psycopg.errors.ObjectInUse:
+                    time.sleep(0.2 * (attempt + 1))
+    except psycopg.OperationalError as e:
+        print(f"Could not create a database for worker {worker}: {e}")
+        return None
+    print(f"Database {base} is in use, worker {worker} shares it")
+    return None
+
+
+# Une base par worker pytest-xdist (`pytest -n auto`), avant le chargement des settings
+_worker = os.getenv("PYTEST_XDIST_WORKER")
+if _worker and (_worker_db := _create_worker_database(_worker)):
+    os.environ["POSTGRES_DB"] = _worker_db
+
 # Maintenant on peut importer le reste
 import uuid
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from functools import partial
 
 import pytest
 from faker import Faker
 from fastapi.testclient import TestClient
 from gotrue import User
-from sqlmodel import Session, delete
+from sqlalchemy import Connection
+from sqlmodel import Session
 from supabase import Client, create_client
 from supabase._async.client import AsyncClient, create_client as create_async_client
 from app.core.config import settings
-from app.core.db import engine, init_db
+from app.core.db import engine, get_db, init_db
 from app.main import app
 from app.models.item import Item, ItemCreate
 from app.schemas.auth import Token
+from tests.utils import create_user
 
 from app import crud
 
+if settings.SUPABASE_FAKE:
+    # Auth et Storage en mémoire, dans le processus des tests
+    from app.fake_supabase import enable
+
+    enable(settings)
+
 # Configuration de Faker
 fake = Faker()
 
-@pytest.fixture(scope="module")
-def db() -> Generator[Session, None]:
+# Utilisateurs créés par les fixtures, supprimés en fin de session
+_created_user_ids: list[str] = []
+
+
+@pytest.fixture(scope="session")
+def _initialized_db() -> None:
     with Session(engine) as session:
         init_db(session)
+
+
+@pytest.fixture
+def connection(_initialized_db: None) -> Generator[Connection, None]:
+    """Connexion dans une transaction annulée à la fin du test"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def session_factory(connection: Connection) -> Callable[[], Session]:
+    """Sessions sur la connexion du test, pour le code qui ouvre les siennes
+
+    Les commit du code testé ne libèrent que des savepoints : rien n'est écrit
+    en base, il n'y a rien à nettoyer et les tests restent isolés entre eux.
+    """
+    return partial(Session, bind=connection, join_transaction_mode="create_savepoint")
+
+
+@pytest.fixture
+def db(session_factory: Callable[[], Session]) -> Generator[Session, None]:
+    """Session dans une transaction annulée à la fin du test"""
+    session = session_factory()
+    try:
         yield session
-        statement = delete(Item)
-        session.exec(statement)  # type: ignore
-        session.commit()
+    finally:
+        session.close()
+
 
+@pytest.fixture
+def owner_id(db: Session) -> uuid.UUID:
+    """Utilisateur de auth.users (clé étrangère des lignes RLS), créé dans la transaction du test"""
+    return create_user(db)
 
-@pytest.fixture(scope="module")
-def client() -> Generator[TestClient, None, None]:
+
+@pytest.fixture
+def client(db: Session) -> Generator[TestClient, None, None]:
+    """Client de test dont les requêtes utilisent la session du test"""
+    app.dependency_overrides[get_db] = lambda: db
     with TestClient(app) as c:
         yield c
+    app.dependency_overrides.pop(get_db, None)
 
 
 @pytest.fixture(scope="session", autouse=True)
 def global_cleanup() -> Generator[None, None]:
     yield
-    # Nettoyage uniquement des utilisateurs de test, pas du superuser
+    if not _created_user_ids:
+        return
+    # Nettoyage uniquement des utilisateurs créés par les tests
     super_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-    users = super_client.auth.admin.list_users()
-    for user in users:
-        if user.email != settings.FIRST_SUPERUSER:  # Ne pas supprimer le superuser
-            super_client.auth.admin.delete_user(user.id)
+    for user_id in _created_user_ids:
+        super_client.auth.admin.delete_user(user_id)
 
 
 @pytest.fixture(scope="function")
@@ -157,50 +259,33 @@ async def async_superuser_client() -> AsyncClient:
 
 
 @pytest.fixture
-async def test_user(supabase):
-    """Crée un utilisateur de test"""
-    user_data = {
-        "email": fake.email(),
-        "password": fake.password(length=12)
-    }
-    
-    user = await supabase.auth.sign_up(user_data)
-    
-    yield user
-    
-    # Cleanup: supprimer l'utilisateur et ses données
-    await supabase.table("profiles").delete().eq("user_id", user.user.id).execute()
+def test_user(supabase: Client) -> User:
+    """Crée un utilisateur de test (supprimé en fin de session, avec ses données)"""
+    response = supabase.auth.sign_up(
+        {"email": fake.email(), "password": fake.password(length=12)}
+    )
+    _created_user_ids.append(response.user.id)
+    return response.user
 
 
 @pytest.fixture
-async def test_users(supabase):
+def test_users(supabase: Client) -> dict[str, list]:
     """Crée deux utilisateurs de test avec leurs clients"""
     users = []
     clients = []
-    
+
     for _ in range(2):
-        user_data = {
-            "email": fake.email(),
-            "password": fake.password(length=12)
-        }
-        user = await supabase.auth.sign_up(user_data)
-        users.append(user)
-        
-        client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY,
-            headers={"Authorization": f"Bearer {user.session.access_token}"}
+        response = supabase.auth.sign_up(
+            {"email": fake.email(), "password": fake.password(length=12)}
         )
+        _created_user_ids.append(response.user.id)
+        users.append(response.user)
+
+        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        client.postgrest.auth(response.session.access_token)
         clients.append(client)
-    
-    yield {
-        "users": users,
-        "clients": clients
-    }
-    
-    # Cleanup
-    for user in users:
-        await supabase.table("profiles").delete().eq("user_id", user.user.id).execute()
+
+    return {"users": users, "clients": clients}
 
 
 @pytest.fixture(scope="function")
@@ -208,7 +293,7 @@ def test_item(db: Session, test_user: User) -> Generator[Item, None]:
     item_in = ItemCreate(
         title=fake.sentence(nb_words=3), description=fake.text(max_nb_chars=200)
     )
-    yield crud.item.create(db, owner_id=uuid.UUID(test_user.user.id), obj_in=item_in)
+    yield crud.item.create(db, owner_id=uuid.UUID(test_user.id), obj_in=item_in)
 
 
 @pytest.fixture(scope="function")
@@ -216,4 +301,5 @@ def token(super_client: Client) -> Generator[Token, None]:
     response = super_client.auth.sign_up(
         {"email": fake.email(), "password": "testpassword123"}
     )
+    _created_user_ids.append(response.user.id)
     yield Token(access_token=response.session.access_token)
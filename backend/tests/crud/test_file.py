@@ -1,34 +1,15 @@
 import uuid
 from datetime import datetime, timedelta
 
-import pytest
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
-
 from app.crud.file import file_metadata
 from app.models.file import FileMetadata, FileMetadataCreate, FileMetadataUpdate
+from tests.utils import create_item, create_user
 
-# Créer un moteur de base de données en mémoire pour les tests
-engine = create_engine(
-    "sqlite://",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-
-
-@pytest.fixture
-def db():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
 
-
-def test_create_file_metadata(db):
+def test_create_file_metadata(db, owner_id):
     """Test de création de métadonnées de fichier"""
     # Données pour la création
-    owner_id = uuid.uuid4()
-    item_id = uuid.uuid4()
+    item_id = create_item(db, owner_id)
     file_data = FileMetadataCreate(
         filename="test.txt",
         content_type="text/plain",
@@ -56,11 +37,10 @@ def test_create_file_metadata(db):
     assert isinstance(file_meta.updated_at, datetime)
 
 
-def test_get_file_metadata(db):
+def test_get_file_metadata(db, owner_id):
     """Test de récupération de métadonnées de fichier"""
     # Créer un fichier de test
     file_id = uuid.uuid4()
-    owner_id = uuid.uuid4()
     file_meta = FileMetadata(
         id=file_id,
         owner_id=owner_id,
@@ -84,11 +64,10 @@ def test_get_file_metadata(db):
     assert retrieved_meta.filename == "test.txt"
 
 
-def test_update_file_metadata(db):
+def test_update_file_metadata(db, owner_id):
     """Test de mise à jour de métadonnées de fichier"""
     # Créer un fichier de test
     file_id = uuid.uuid4()
-    owner_id = uuid.uuid4()
     created_at = datetime.utcnow() - timedelta(days=1)  # Date antérieure pour tester updated_at
     file_meta = FileMetadata(
         id=file_id,
@@ -124,11 +103,10 @@ def test_update_file_metadata(db):
     assert updated_meta.updated_at > created_at  # Mis à jour
 
 
-def test_delete_file_metadata(db):
+def test_delete_file_metadata(db, owner_id):
     """Test de suppression de métadonnées de fichier"""
     # Créer un fichier de test
     file_id = uuid.uuid4()
-    owner_id = uuid.uuid4()
     file_meta = FileMetadata(
         id=file_id,
         owner_id=owner_id,
@@ -153,11 +131,10 @@ def test_delete_file_metadata(db):
     assert retrieved_meta is None
 
 
-def test_get_by_item_id(db):
+def test_get_by_item_id(db, owner_id):
     """Test de récupération des fichiers par item_id"""
-    # Créer un ID d'item
-    item_id = uuid.uuid4()
-    owner_id = uuid.uuid4()
+    # Créer un item
+    item_id = create_item(db, owner_id)
     
     # Créer plusieurs fichiers associés à cet item
     files = [
@@ -183,7 +160,7 @@ def test_get_by_item_id(db):
         size=100,
         bucket_name="test-bucket",
         path="test/path/other.txt",
-        item_id=uuid.uuid4()  # ID différent
+        item_id=create_item(db, owner_id)  # Item différent
     )
     
     # Ajouter tous les fichiers à la base de données
@@ -201,10 +178,10 @@ def test_get_by_item_id(db):
         assert file.item_id == item_id
 
 
-def test_get_by_user_id(db):
+def test_get_by_user_id(db, owner_id):
     """Test de récupération des fichiers par user_id (owner_id)"""
     # Créer un ID d'utilisateur
-    user_id = uuid.uuid4()
+    user_id = owner_id
     
     # Créer plusieurs fichiers appartenant à cet utilisateur
     files = [
@@ -223,7 +200,7 @@ def test_get_by_user_id(db):
     # Créer un fichier appartenant à un autre utilisateur
     other_file = FileMetadata(
         id=uuid.uuid4(),
-        owner_id=uuid.uuid4(),  # ID différent
+        owner_id=create_user(db),  # ID différent
         filename="other.txt",
         content_type="text/plain",
         size=100,
@@ -246,11 +223,10 @@ def test_get_by_user_id(db):
         assert file.owner_id == user_id
 
 
-def test_get_by_bucket(db):
+def test_get_by_bucket(db, owner_id):
     """Test de récupération des fichiers par bucket_name"""
     # Créer un nom de bucket
     bucket_name = "test-bucket"
-    owner_id = uuid.uuid4()
     
     # Créer plusieurs fichiers dans ce bucket
     files = [
@@ -290,3 +266,72 @@ def test_get_by_bucket(db):
     for i, file in enumerate(retrieved_files):
         assert file.filename == f"test{i}.txt"
         assert file.bucket_name == bucket_name
+
+
+def test_stream(db, owner_id):
+    """Test du parcours en flux des fichiers d'un utilisateur"""
+    
+    # Créer des fichiers dans deux buckets et un fichier d'un autre utilisateur
+    files = [
+        FileMetadata(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            filename=f"test{i}.txt",
+            content_type="text/plain",
+            size=100,
+            bucket_name="test-bucket" if i < 3 else "other-bucket",
+            path=f"test/path/test{i}.txt"
+        )
+        for i in range(5)
+    ]
+    other_file = FileMetadata(
+        id=uuid.uuid4(),
+        owner_id=create_user(db),
+        filename="other.txt",
+        content_type="text/plain",
+        size=100,
+        bucket_name="test-bucket",
+        path="test/path/other.txt"
+    )
+    for file in files + [other_file]:
+        db.add(file)
+    db.commit()
+    
+    # Parcourir avec des lots plus petits que le nombre de lignes
+    rows = list(file_metadata.stream(db, owner_id=owner_id, batch_size=2))
+    assert len(rows) == 5
+    assert all(row["owner_id"] == owner_id for row in rows)
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    
+    # Filtrer par bucket
+    rows = list(file_metadata.stream(db, owner_id=owner_id, bucket_name="test-bucket"))
+    assert {row["filename"] for row in rows} == {"test0.txt", "test1.txt", "test2.txt"}
+
+
+def test_search(db, owner_id):
+    """Test de la recherche plein texte, page après page"""
+    marker = f"zq{uuid.uuid4().hex[:8]}"
+    for i in range(4):
+        db.add(FileMetadata(
+            owner_id=owner_id,
+            filename=f"{marker} {i}.txt",
+            content_type="text/plain",
+            size=100,
+            bucket_name="test-bucket" if i < 3 else "other-bucket",
+            path=f"test/path/{marker}{i}.txt"
+        ))
+    db.commit()
+    
+    # Parcourir les résultats une ligne à la fois : aucun doublon
+    ids = []
+    after = None
+    while page := file_metadata.search(db, query=marker, owner_id=owner_id, limit=1, after=after):
+        ids += [obj.id for obj, _ in page]
+        assert len(ids) <= 4
+        last, rank = page[-1]
+        after = (rank, last.id)
+    assert len(set(ids)) == 4
+    
+    # Filtrer par bucket
+    results = file_metadata.search(db, query=marker, owner_id=owner_id, bucket_name="other-bucket")
+    assert [obj.filename for obj, _ in results] == [f"{marker} 3.txt"]
@@ -1,11 +1,13 @@
 import uuid
 
+import pytest
 from faker import Faker
 from gotrue import User
 from sqlmodel import Session
 
 from app import crud
 from app.models.item import Item, ItemCreate, ItemUpdate
+from app.utils.search import decode_search_cursor, encode_search_cursor
 
 fake = Faker()
 
@@ -84,3 +86,50 @@ def test_delete_item(db: Session, test_item: Item) -> None:
     # delete empty items
     deleted_item = crud.item.remove(db, id=test_item.id)
     assert deleted_item is None
+
+
+def test_search_items(db: Session, test_user: User) -> None:
+    """Test full-text search with prefix matching and keyset pagination"""
+    owner_id = uuid.UUID(test_user.id)
+    marker = f"zq{uuid.uuid4().hex[:8]}"
+    for i in range(3):
+        crud.item.create(
+            db,
+            owner_id=owner_id,
+            obj_in=ItemCreate(title=f"{marker} report {i}", description="quarterly"),
+        )
+    crud.item.create(
+        db,
+        owner_id=owner_id,
+        obj_in=ItemCreate(title="unrelated", description=f"{marker} in description"),
+    )
+
+    # Prefix matching: a truncated term finds every item
+    results = crud.item.search(db, query=marker[:-2], owner_id=owner_id)
+    assert len(results) == 4
+    # Title matches (weight A) rank above description matches (weight B)
+    assert results[-1][0].title == "unrelated"
+
+    # Keyset pagination walks the same ordering without duplicates, page after page
+    ids = []
+    after = None
+    while page := crud.item.search(
+        db, query=marker, owner_id=owner_id, limit=1, after=after
+    ):
+        ids += [obj.id for obj, _ in page]
+        assert len(ids) <= 4
+        last, rank = page[-1]
+        after = (rank, last.id)
+    assert ids == [obj.id for obj, _ in results]
+
+    # Results are scoped to the owner
+    assert crud.item.search(db, query=marker, owner_id=uuid.uuid4()) == []
+
+
+def test_search_cursor_roundtrip() -> None:
+    """Test search cursor encoding"""
+    item_id = uuid.uuid4()
+    cursor = encode_search_cursor(0.0607927, item_id)
+    assert decode_search_cursor(cursor) == (0.0607927, item_id)
+    with pytest.raises(ValueError):
+        decode_search_cursor("not-a-cursor")
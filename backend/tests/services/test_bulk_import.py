@@ -0,0 +1,106 @@
+import io
+
+from sqlmodel import select
+
+from app.crud import item
+from app.models.item import Item, ItemCreate
+from app.services.bulk_import import import_records, iter_records
+
+
+def test_iter_records_ndjson():
+    """Test de lecture NDJSON avec lignes invalides et lignes trop longues"""
+    stream = io.BytesIO(
+        b'{"title": "a"}\n\nnot json\n[1, 2]\n' + b"x" * 100 + b'\n{"title": "b"}'
+    )
+    records = list(iter_records(stream, "ndjson", max_line_bytes=50))
+
+    assert records[0] == (1, {"title": "a"})
+    assert records[1][0] == 3 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (4, "Each line must be a JSON object")
+    assert records[3] == (5, "Line exceeds 50 bytes")
+    assert records[4] == (6, {"title": "b"})
+
+
+def test_iter_records_csv():
+    """Test de lecture CSV : en-tête, guillemets et cellules vides"""
+    stream = io.BytesIO(b'title,description\na,\n"b, c",d\n')
+    records = list(iter_records(stream, "csv"))
+
+    assert records == [
+        (2, {"title": "a", "description": None}),
+        (3, {"title": "b, c", "description": "d"}),
+    ]
+
+
+def test_iter_records_csv_errors():
+    """Test de lecture CSV : chaque ligne invalide est rapportée, la lecture continue"""
+    stream = io.BytesIO(
+        b"title,description\n"
+        b"a,b,c\n" + b"x" * 100 + b"\n"
+        b'"multi\n' + b"y" * 100 + b'",z\n'
+        b"\xff\n"
+        b"g\rh\n"
+        b"d\n"
+        b'"e\x00",f\n'
+    )
+    records = list(iter_records(stream, "csv", max_line_bytes=50))
+
+    assert records[:3] == [
+        (2, "Expected 2 columns, got 3"),
+        (3, "Line exceeds 50 bytes"),
+        # Enregistrement sur deux lignes dont la seconde est trop longue : abandonné
+        (5, "Line exceeds 50 bytes"),
+    ]
+    assert records[3][0] == 6 and records[3][1].startswith("Invalid UTF-8")
+    assert records[4][0] == 7 and records[4][1].startswith("Invalid CSV")
+    assert records[5:] == [
+        (8, {"title": "d", "description": None}),
+        (9, {"title": "e\x00", "description": "f"}),
+    ]
+
+
+def test_import_records(db, owner_id, session_factory):
+    """Test d'import par lots avec rapport par ligne"""
+    records = iter(
+        [
+            (1, {"title": "first"}),
+            (2, {"title": ""}),
+            (3, "Invalid JSON"),
+            (4, {"title": "second", "description": "desc"}),
+            (5, {"title": "third"}),
+        ]
+    )
+
+    report = list(
+        import_records(
+            item,
+            ItemCreate,
+            records,
+            session_factory=session_factory,
+            owner_id=owner_id,
+            batch_size=2,
+        )
+    )
+
+    # Une entrée par ligne lue, puis le résumé
+    by_line = {entry["line"]: entry for entry in report[:-1]}
+    assert sorted(by_line) == [1, 2, 3, 4, 5]
+    assert by_line[2]["status"] == "error"
+    assert by_line[2]["errors"][0].startswith("title")
+    assert by_line[3] == {"line": 3, "status": "error", "errors": ["Invalid JSON"]}
+    assert report[-1] == {"summary": {"created": 3, "failed": 2}}
+
+    # Les lignes valides sont en base, avec les ids rapportés
+    items = db.exec(select(Item).where(Item.owner_id == owner_id)).all()
+    assert {str(i.id) for i in items} == {by_line[line]["id"] for line in (1, 4, 5)}
+
+
+def test_create_multi(db, owner_id):
+    """Test de l'insertion groupée"""
+    ids = item.create_multi(
+        db, owner_id=owner_id, objs_in=[ItemCreate(title=f"item {i}") for i in range(3)]
+    )
+
+    assert len(ids) == 3
+    assert {i.id for i in item.get_multi(db)} == set(ids)
+    assert item.create_multi(db, owner_id=owner_id, objs_in=[]) == []
@@ -0,0 +1,190 @@
+import posixpath
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models.file import FileMetadata
+from app.models.storage import ItemDocuments
+from app.services.cleanup import cleanup_item_documents, purge_prefix
+from app.services.reconcile import ListingOrderError, reconcile_bucket
+from app.services.storage import StorageService
+
+# Métadonnées plus anciennes que le min_age du rapprochement
+LONG_AGO = datetime.utcnow() - timedelta(days=7)
+
+
+class FakeBucket:
+    """Bucket en mémoire : listing paginé par dossier, comme storage3"""
+
+    def __init__(self, paths, created_at=None, sort_key=None):
+        self.paths = set(paths)
+        self.remove_calls = []
+        self.created_at = created_at or {}
+        # Collation du serveur (par défaut l'ordre binaire, comme COLLATE "C")
+        self.sort_key = sort_key
+
+    async def list(self, path, options):
+        names = set()
+        folder = f"{path}/" if path else ""
+        for full_path in self.paths:
+            if posixpath.dirname(full_path) == path:
+                names.add((posixpath.basename(full_path), True))
+            elif full_path.startswith(folder):
+                names.add((full_path[len(folder) :].split("/")[0], False))
+        entries = [
+            {"name": name, "id": None}
+            if not is_file
+            else {
+                "name": name,
+                "id": str(uuid.uuid4()),
+                "created_at": self.created_at.get(
+                    posixpath.join(path, name), "2024-01-01T00:00:00Z"
+                ),
+            }
+            for name, is_file in sorted(
+                names, key=lambda e: (self.sort_key or str)(e[0])
+            )
+        ]
+        return entries[options["offset"] : options["offset"] + options["limit"]]
+
+    async def remove(self, paths):
+        self.remove_calls.append(paths)
+        self.paths -= set(paths)
+
+
+def make_file(
+    db: Session, owner_id: uuid.UUID, path: str, created_at: datetime | None = None
+) -> FileMetadata:
+    file_meta = FileMetadata(
+        owner_id=owner_id,
+        filename=posixpath.basename(path),
+        content_type="text/plain",
+        size=10,
+        bucket_name=ItemDocuments.name,
+        path=path,
+        created_at=created_at or datetime.utcnow(),
+    )
+    db.add(file_meta)
+    db.commit()
+    db.refresh(file_meta)
+    return file_meta
+
+
+@pytest.fixture
+def storage_service():
+    client = AsyncMock()
+    client.storage.from_ = MagicMock()
+    return StorageService(client)
+
+
+async def test_purge_prefix(storage_service, db, owner_id, session_factory):
+    """Les pages sont supprimées au fil de l'eau, les objets référencés conservés"""
+    prefix = "items/1/documents"
+    bucket = FakeBucket(
+        [f"{prefix}/doc{i:02}.txt" for i in range(7)]
+        + [f"{prefix}/thumbnails/64x64/doc00.txt.webp", "items/2/documents/other.txt"]
+    )
+    storage_service.client.storage.from_.return_value = bucket
+    # Objet partagé avec un fichier d'un autre item
+    make_file(db, owner_id, f"{prefix}/doc03.txt")
+
+    removed, kept = await purge_prefix(
+        storage_service, ItemDocuments.name, prefix, session_factory, page_size=3
+    )
+
+    assert (removed, kept) == (7, 1)
+    assert bucket.paths == {f"{prefix}/doc03.txt", "items/2/documents/other.txt"}
+    assert all(len(paths) <= 3 for paths in bucket.remove_calls)
+
+
+async def test_cleanup_item_documents(storage_service, session_factory):
+    item_id = uuid.uuid4()
+    bucket = FakeBucket(
+        [f"items/{item_id}/documents/a.pdf", f"items/{item_id}/documents/b.pdf"]
+    )
+    storage_service.client.storage.from_.return_value = bucket
+
+    await cleanup_item_documents(storage_service, item_id, session_factory)
+
+    storage_service.client.storage.from_.assert_called_with(ItemDocuments.name)
+    assert bucket.paths == set()
+
+
+async def test_iter_files_order(storage_service):
+    """Les objets sont produits dans l'ordre binaire des chemins complets"""
+    paths = ["a.txt", "a/b.txt", "a/c/d.txt", "a-b.txt", "b.txt", "ab.txt"]
+    storage_service.client.storage.from_.return_value = FakeBucket(paths)
+
+    listed = [
+        obj["path"] async for obj in storage_service.iter_files("bucket", page_size=2)
+    ]
+
+    assert listed == sorted(paths)
+
+
+async def test_reconcile_bucket(storage_service, db, owner_id, session_factory):
+    recent = datetime.now(timezone.utc).isoformat()
+    bucket = FakeBucket(
+        [
+            "docs/kept.txt",
+            "docs/orphan.txt",
+            "docs/recent.txt",
+            "docs/thumbnails/64x64/kept.txt.webp",
+        ],
+        created_at={"docs/recent.txt": recent},
+    )
+    storage_service.client.storage.from_.return_value = bucket
+    kept = make_file(db, owner_id, "docs/kept.txt", LONG_AGO)
+    shared = make_file(db, owner_id, "docs/kept.txt", LONG_AGO)
+    missing = make_file(db, owner_id, "docs/missing.txt", LONG_AGO)
+    # Upload en cours : l'objet arrive après le passage du listing sur son chemin
+    uploading = make_file(db, owner_id, "docs/uploading.txt")
+    ids = {kept.id, shared.id, uploading.id}
+    missing_id = missing.id
+
+    report = await reconcile_bucket(
+        storage_service, ItemDocuments, session_factory=session_factory, batch_size=2
+    )
+
+    assert report["objects"] == 4
+    assert report["metadata"] == 4
+    assert report["samples"] == {
+        "orphan_objects": ["docs/orphan.txt"],
+        "missing_objects": [str(missing_id)],
+    }
+    assert bucket.remove_calls == []
+
+    report = await reconcile_bucket(
+        storage_service,
+        ItemDocuments,
+        delete=True,
+        min_age=timedelta(hours=1),
+        session_factory=session_factory,
+    )
+
+    assert (report["removed_objects"], report["removed_metadata"]) == (1, 1)
+    assert "docs/orphan.txt" not in bucket.paths
+    assert {f.id for f in db.exec(select(FileMetadata)).all()} == ids
+
+
+async def test_reconcile_bucket_listing_order(
+    storage_service, db, owner_id, session_factory
+):
+    """Un listing trié selon une autre collation interrompt tout, sans rien supprimer"""
+    paths = ["docs/B.txt", "docs/_c.txt", "docs/a.txt"]
+    # Collation d'une locale : casse et "_" ignorés (a, B, _c au lieu de B, _c, a)
+    bucket = FakeBucket(paths, sort_key=lambda name: name.lower().lstrip("_"))
+    storage_service.client.storage.from_.return_value = bucket
+    ids = {make_file(db, owner_id, path, LONG_AGO).id for path in paths}
+
+    with pytest.raises(ListingOrderError):
+        await reconcile_bucket(
+            storage_service, ItemDocuments, delete=True, session_factory=session_factory
+        )
+
+    assert bucket.remove_calls == []
+    assert bucket.paths == set(paths)
+    assert {f.id for f in db.exec(select(FileMetadata)).all()} == ids
@@ -0,0 +1,190 @@
+import json
+import threading
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.crud import item
+from app.models.file import FileMetadata
+from app.models.item import ItemCreate, ItemUpdate
+from app.models.outbox import OutboxEvent
+from app.services.outbox import SIGNATURE_HEADER, OutboxDispatcher, sign
+
+
+class Sink(ThreadingHTTPServer):
+    """Webhook local : enregistre les événements reçus, refuse les `failures` premiers"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.failures = 0
+        self.events: list[dict] = []
+        self.signatures: list[str] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    server: Sink
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            self.send_response(503)
+        else:
+            self.server.events.append(json.loads(body))
+            self.server.signatures.append(
+                self.headers[SIGNATURE_HEADER] == sign("secret", body)
+            )
+            self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def sink() -> Iterator[Sink]:
+    server = Sink()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def db(db: Session, sink: Sink, monkeypatch: pytest.MonkeyPatch) -> Session:
+    """Session du test, avec le webhook configuré : les événements sont enregistrés"""
+    monkeypatch.setattr(settings, "OUTBOX_WEBHOOK_URL", sink.url)
+    return db
+
+
+def test_changes_recorded_in_transaction(
+    db: Session, owner_id: uuid.UUID, monkeypatch: pytest.MonkeyPatch
+):
+    """Les événements sont écrits avec le changement, et seulement s'il est validé"""
+    obj = item.create(db, owner_id=owner_id, obj_in=ItemCreate(title="a"))
+    item.update(db, id=obj.id, obj_in=ItemUpdate(title="b"))
+    item.create_multi(
+        db, owner_id=owner_id, objs_in=[ItemCreate(title="c")], commit=False
+    )
+    db.rollback()
+    item.remove(db, id=obj.id)
+
+    events = db.exec(select(OutboxEvent).order_by(OutboxEvent.id)).all()
+    assert [(event.op, event.record_id) for event in events] == [
+        ("insert", obj.id),
+        ("update", obj.id),
+        ("delete", obj.id),
+    ]
+    assert events[1].table_name == "item"
+    assert events[1].owner_id == owner_id
+    assert events[1].payload["title"] == "b"
+
+    # Sans webhook, rien n'est enregistré
+    monkeypatch.setattr(settings, "OUTBOX_WEBHOOK_URL", None)
+    item.create(db, owner_id=owner_id, obj_in=ItemCreate(title="d"))
+    assert len(db.exec(select(OutboxEvent)).all()) == 3
+
+
+def test_cascade_recorded(db: Session, owner_id: uuid.UUID):
+    """Les fichiers supprimés en cascade avec leur item ont leur événement"""
+    obj = item.create(db, owner_id=owner_id, obj_in=ItemCreate(title="a"))
+    file = FileMetadata(
+        owner_id=owner_id,
+        filename="a.txt",
+        content_type="text/plain",
+        size=1,
+        bucket_name="item-documents",
+        path="a.txt",
+        item_id=obj.id,
+    )
+    db.add(file)
+    db.commit()
+    file_id = file.id
+    item.remove(db, id=obj.id)
+
+    events = db.exec(select(OutboxEvent).where(OutboxEvent.op == "delete")).all()
+    by_table = {event.table_name: event for event in events}
+    assert len(events) == len(by_table) == 2
+    assert by_table["item"].record_id == obj.id
+    assert by_table["filemetadata"].record_id == file_id
+    assert by_table["filemetadata"].payload["item_id"] == str(obj.id)
+    db.expire_all()
+    assert db.get(FileMetadata, file_id) is None
+
+
+async def test_dispatch(db: Session, owner_id: uuid.UUID, sink: Sink, session_factory):
+    item.create_multi(
+        db, owner_id=owner_id, objs_in=[ItemCreate(title=str(i)) for i in range(5)]
+    )
+    dispatcher = OutboxDispatcher(
+        sink.url,
+        secret="secret",
+        session_factory=session_factory,
+        batch_size=3,
+        concurrency=2,
+        max_attempts=2,
+        retention=0,
+        retry_delay=0,
+    )
+    sink.failures = 1
+
+    async with httpx.AsyncClient() as client:
+        # Lots de 3 : le premier événement envoyé échoue et sera retenté
+        assert await dispatcher.dispatch(client) == 3
+        assert await dispatcher.dispatch(client) == 3
+        assert await dispatcher.dispatch(client) == 0
+
+    assert sorted(event["data"]["title"] for event in sink.events) == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+    assert all(sink.signatures)
+    assert len({event["id"] for event in sink.events}) == 5
+    assert max(event["attempt"] for event in sink.events) == 2
+    assert (dispatcher.delivered, dispatcher.failed) == (5, 1)
+
+    # Événements transmis purgés ; un événement refusé trop souvent est abandonné
+    assert dispatcher.prune() == 5
+    item.create(db, owner_id=owner_id, obj_in=ItemCreate(title="lost"))
+    sink.failures = 2
+    async with httpx.AsyncClient() as client:
+        assert await dispatcher.dispatch(client) == 1
+        assert await dispatcher.dispatch(client) == 1
+        assert await dispatcher.dispatch(client) == 0
+    (event,) = db.exec(select(OutboxEvent)).all()
+    assert (event.attempts, event.delivered_at, event.last_error) == (
+        2,
+        None,
+        "HTTP 503",
+    )
+    assert dispatcher.prune() == 0
+
+
+async def test_claim_lease(
+    db: Session, owner_id: uuid.UUID, sink: Sink, session_factory
+):
+    """Un lot réservé n'est pas relu avant l'expiration de sa réservation"""
+    item.create(db, owner_id=owner_id, obj_in=ItemCreate(title="a"))
+    dispatcher = OutboxDispatcher(sink.url, session_factory=session_factory)
+    (event,) = dispatcher.claim()
+    assert dispatcher.claim() == []
+
+    db.exec(select(OutboxEvent)).one().available_at = datetime.utcnow() - timedelta(
+        seconds=1
+    )
+    db.commit()
+    assert [claimed["id"] for claimed in dispatcher.claim()] == [event["id"]]
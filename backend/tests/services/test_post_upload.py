@@ -0,0 +1,186 @@
+import asyncio
+import io
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlmodel import Session
+
+from app.models.file import FileMetadata
+from app.models.storage import ItemDocuments, ProfilePictures
+from app.services.background import BackgroundQueue
+from app.services.post_upload import PostUploadPipeline, derivative_path
+from app.utils.media import sniff_mime_type
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n" + b"\x00" * 16
+
+
+@pytest.fixture
+def pipeline(session_factory):
+    return PostUploadPipeline(
+        queue_size=2, process_workers=1, session_factory=session_factory
+    )
+
+
+@pytest.fixture
+def client():
+    client = AsyncMock()
+    client.storage.from_ = MagicMock(return_value=AsyncMock())
+    return client
+
+
+def create_file(
+    db: Session,
+    owner_id: uuid.UUID,
+    content_type: str,
+    bucket_name: str,
+    path: str | None = None,
+) -> FileMetadata:
+    file_meta = FileMetadata(
+        filename="file",
+        content_type=content_type,
+        size=10,
+        bucket_name=bucket_name,
+        path=path or f"{uuid.uuid4()}/file",
+        owner_id=owner_id,
+        processing_status="pending",
+    )
+    db.add(file_meta)
+    db.commit()
+    db.refresh(file_meta)
+    return file_meta
+
+
+def test_sniff_mime_type():
+    assert sniff_mime_type(PNG_HEADER) == "image/png"
+    assert sniff_mime_type(b"%PDF-1.7\n") == "application/pdf"
+    assert sniff_mime_type("héllo".encode()) == "text/plain"
+    assert sniff_mime_type(b"\x00\x01\x02\xff") is None
+
+
+def test_derivative_path():
+    assert (
+        derivative_path("u/profile/a.png", "64x64")
+        == "u/profile/thumbnails/64x64/a.png.webp"
+    )
+
+
+async def test_process_text_file(
+    db: Session, owner_id, pipeline: PostUploadPipeline, client
+):
+    file_meta = create_file(db, owner_id, "text/plain", ItemDocuments.name)
+
+    await pipeline.process(
+        client, ItemDocuments, file_meta.id, file_meta.path, b"hello", "text/plain"
+    )
+
+    db.refresh(file_meta)
+    assert file_meta.processing_status == "done"
+    assert file_meta.derivatives is None
+    client.storage.from_.assert_not_called()
+
+
+async def test_process_linked_files(
+    db: Session, owner_id, pipeline: PostUploadPipeline, client
+):
+    """Les uploads liés au même objet suivent son traitement, avec leur propre type"""
+    file_meta = create_file(db, owner_id, "text/plain", ItemDocuments.name)
+    # Enregistré pendant le traitement de l'original : statut copié "pending"
+    linked = create_file(db, owner_id, "text/csv", ItemDocuments.name, file_meta.path)
+    other = create_file(db, owner_id, "text/plain", ItemDocuments.name)
+
+    await pipeline.process(
+        client, ItemDocuments, file_meta.id, file_meta.path, b"a,b", "text/plain"
+    )
+
+    db.expire_all()
+    assert [(f.processing_status, f.content_type) for f in (file_meta, linked)] == [
+        ("done", "text/plain"),
+        ("done", "text/csv"),
+    ]
+    assert other.processing_status == "pending"
+
+
+async def test_process_mime_mismatch(
+    db: Session, owner_id, pipeline: PostUploadPipeline, client
+):
+    """Un PNG déclaré comme PDF n'a rien à faire dans ItemDocuments : il est supprimé"""
+    file_meta = create_file(db, owner_id, "application/pdf", ItemDocuments.name)
+    # Upload lié (même contenu) et fichier sans rapport
+    linked = create_file(
+        db, owner_id, "application/pdf", ItemDocuments.name, file_meta.path
+    )
+    other = create_file(db, owner_id, "application/pdf", ItemDocuments.name)
+    ids = [file_meta.id, linked.id, other.id]
+    path = file_meta.path
+
+    await pipeline.process(
+        client, ItemDocuments, file_meta.id, path, PNG_HEADER, "application/pdf"
+    )
+
+    db.expire_all()
+    assert [db.get(FileMetadata, id) is not None for id in ids] == [False, False, True]
+    client.storage.from_.return_value.remove.assert_awaited_once_with([path])
+
+
+async def test_process_thumbnails(
+    db: Session, owner_id, pipeline: PostUploadPipeline, client
+):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (512, 512), "red").save(buffer, format="PNG")
+    file_meta = create_file(db, owner_id, "image/png", ProfilePictures.name)
+
+    try:
+        await pipeline.process(
+            client,
+            ProfilePictures,
+            file_meta.id,
+            file_meta.path,
+            buffer.getvalue(),
+            "image/png",
+        )
+    finally:
+        await pipeline.stop()
+
+    db.refresh(file_meta)
+    assert file_meta.processing_status == "done"
+    assert set(file_meta.derivatives) == {"64x64", "256x256"}
+    assert client.storage.from_.return_value.upload.await_count == 2
+
+
+async def test_background_queue_bounded():
+    queue = BackgroundQueue("test", maxsize=1)
+    done = asyncio.Event()
+
+    async def job():
+        done.set()
+
+    assert queue.submit(job)
+    assert not queue.submit(job)
+    assert queue.full()
+
+    await queue.start()
+    await asyncio.wait_for(done.wait(), timeout=1)
+    await queue.stop()
+    assert queue.pending == 0
+
+
+def test_background_queue_restarted():
+    """Chaque démarrage de l'application (un TestClient par test) a sa propre boucle"""
+    queue = BackgroundQueue("test", maxsize=10)
+    done: list[int] = []
+
+    async def job(n: int):
+        done.append(n)
+
+    async def run(n: int):
+        await queue.start()
+        # Le worker attend la tâche, comme dans l'application
+        await asyncio.sleep(0)
+        assert queue.submit(job, n)
+        await queue.stop(timeout=1)
+
+    asyncio.run(run(1))
+    asyncio.run(run(2))
+    assert done == [1, 2]
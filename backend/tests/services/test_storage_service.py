@@ -1,30 +1,17 @@
+import asyncio
+import hashlib
 import io
 import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException, UploadFile
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel import select
 
 from app.models.file import FileMetadata
-from app.models.storage import ProfilePictures
+from app.models.storage import ItemDocuments, ProfilePictures
 from app.services.storage import StorageService
-
-# Créer un moteur de base de données en mémoire pour les tests
-engine = create_engine(
-    "sqlite://",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-
-
-@pytest.fixture
-def db():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+from tests.utils import create_item, create_user
 
 
 @pytest.fixture
@@ -43,11 +30,13 @@ def mock_supabase_client():
         {"name": "test2.txt", "id": "456", "metadata": {}}
     ]
     
-    # Configurer client.storage.from_()
-    client.storage.from_.return_value = storage_from
+    # Configurer client.storage.from_() (appel synchrone dans storage3)
+    client.storage.from_ = MagicMock(return_value=storage_from)
     
-    # Configurer client.storage.list_buckets()
-    client.storage.list_buckets.return_value = [{"name": "existing-bucket"}]
+    # Configurer client.storage.list_buckets() (objets AsyncBucket dans storage3)
+    existing_bucket = MagicMock()
+    existing_bucket.name = "existing-bucket"
+    client.storage.list_buckets.return_value = [existing_bucket]
     
     # Configurer client.storage.create_bucket()
     client.storage.create_bucket.return_value = {"name": "new-bucket"}
@@ -61,15 +50,21 @@ def storage_service(mock_supabase_client):
     return StorageService(mock_supabase_client)
 
 
+def make_upload_file(content=b"test content", filename="test.txt", content_type="text/plain"):
+    """Mock pour UploadFile, lisible par morceaux comme un vrai flux"""
+    buffer = io.BytesIO(content)
+    file = MagicMock(spec=UploadFile)
+    file.filename = filename
+    file.content_type = content_type
+    file.read = AsyncMock(side_effect=lambda size=-1: buffer.read(size))
+    file.seek = AsyncMock(side_effect=buffer.seek)
+    return file
+
+
 @pytest.fixture
 def mock_upload_file():
     """Mock pour UploadFile"""
-    file = MagicMock(spec=UploadFile)
-    file.filename = "test.txt"
-    file.content_type = "text/plain"
-    file.read = AsyncMock(return_value=b"test content")
-    file.seek = AsyncMock()
-    return file
+    return make_upload_file()
 
 
 @pytest.mark.asyncio
@@ -93,21 +88,21 @@ async def test_initialize_buckets(storage_service, mock_supabase_client):
     # Vérifier que create_bucket a été appelé une seule fois pour le nouveau bucket
     assert mock_supabase_client.storage.create_bucket.call_count == 1
     mock_supabase_client.storage.create_bucket.assert_called_with(
-        "new-bucket", public=False
+        "new-bucket", options={"public": False}
     )
 
 
 @pytest.mark.asyncio
-async def test_upload_file(storage_service, mock_supabase_client, mock_upload_file, db):
+async def test_upload_file(storage_service, mock_supabase_client, mock_upload_file, db, owner_id):
     """Test d'upload de fichier"""
     # Données pour le test
-    user_id = uuid.uuid4()
-    record_id = uuid.uuid4()
+    user_id = owner_id
+    record_id = create_item(db, owner_id)
     description = "Test description"
     
     # Exécuter l'upload
     path, file_meta = await storage_service.upload_file(
-        bucket_class=ProfilePictures,
+        bucket_class=ItemDocuments,
         file=mock_upload_file,
         user_id=user_id,
         record_id=record_id,
@@ -116,11 +111,11 @@ async def test_upload_file(storage_service, mock_supabase_client, mock_upload_fi
     )
     
     # Vérifier que from_ et upload ont été appelés
-    mock_supabase_client.storage.from_.assert_called_with(ProfilePictures.name)
+    mock_supabase_client.storage.from_.assert_called_with(ItemDocuments.name)
     mock_supabase_client.storage.from_.return_value.upload.assert_called_once()
     
     # Vérifier que le fichier a été lu
-    mock_upload_file.read.assert_called_once()
+    mock_upload_file.read.assert_awaited()
     
     # Vérifier les métadonnées
     assert isinstance(file_meta, FileMetadata)
@@ -128,8 +123,88 @@ async def test_upload_file(storage_service, mock_supabase_client, mock_upload_fi
     assert file_meta.item_id == record_id
     assert file_meta.filename == "test.txt"
     assert file_meta.content_type == "text/plain"
-    assert file_meta.bucket_name == ProfilePictures.name
+    assert file_meta.bucket_name == ItemDocuments.name
     assert file_meta.description == description
+    assert file_meta.content_hash == hashlib.sha256(b"test content").hexdigest()
+    assert file_meta.processing_status is None
+
+
+@pytest.mark.asyncio
+async def test_upload_file_post_upload(mock_supabase_client, mock_upload_file, db, owner_id):
+    """Test de planification du traitement post-upload"""
+    post_upload = MagicMock()
+    post_upload.has_capacity.return_value = True
+    service = StorageService(mock_supabase_client, post_upload=post_upload)
+
+    path, file_meta = await service.upload_file(
+        bucket_class=ItemDocuments,
+        file=mock_upload_file,
+        user_id=owner_id,
+        session=db
+    )
+
+    assert file_meta.processing_status == "pending"
+    post_upload.submit.assert_called_once_with(
+        mock_supabase_client, ItemDocuments, file_meta.id, path, b"test content", "text/plain"
+    )
+
+    # File pleine : enregistré sans traitement
+    post_upload.reset_mock()
+    post_upload.has_capacity.return_value = False
+    _, file_meta = await service.upload_file(
+        bucket_class=ItemDocuments,
+        file=make_upload_file(b"other content", "other.txt"),
+        user_id=owner_id,
+        session=db
+    )
+    assert file_meta.processing_status == "skipped"
+    post_upload.submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_deduplicated(storage_service, mock_supabase_client, db, owner_id):
+    """Test de déduplication : un même contenu n'est stocké qu'une fois"""
+    user_id = owner_id
+    upload = mock_supabase_client.storage.from_.return_value.upload
+    
+    # Premier upload : l'objet est envoyé au stockage
+    path, first = await storage_service.upload_file(
+        bucket_class=ProfilePictures,
+        file=make_upload_file(b"same", "a.jpg", "image/jpeg"),
+        user_id=user_id,
+        session=db
+    )
+    assert upload.call_count == 1
+    
+    # Même contenu, autre nom : nouvelles métadonnées liées au même objet
+    linked_path, linked = await storage_service.upload_file(
+        bucket_class=ProfilePictures,
+        file=make_upload_file(b"same", "b.jpg", "image/jpeg"),
+        user_id=user_id,
+        session=db
+    )
+    assert upload.call_count == 1
+    assert linked_path == path
+    assert linked.id != first.id
+    assert linked.filename == "b.jpg"
+    
+    # Ré-upload identique : les métadonnées existantes sont renvoyées
+    _, again = await storage_service.upload_file(
+        bucket_class=ProfilePictures,
+        file=make_upload_file(b"same", "a.jpg", "image/jpeg"),
+        user_id=user_id,
+        session=db
+    )
+    assert again.id == first.id
+    
+    # Un autre utilisateur ne partage pas les objets
+    await storage_service.upload_file(
+        bucket_class=ProfilePictures,
+        file=make_upload_file(b"same", "a.jpg", "image/jpeg"),
+        user_id=create_user(db),
+        session=db
+    )
+    assert upload.call_count == 2
 
 
 @pytest.mark.asyncio
@@ -217,7 +292,7 @@ async def test_download_file(storage_service, mock_supabase_client):
 
 
 @pytest.mark.asyncio
-async def test_delete_file(storage_service, mock_supabase_client, db):
+async def test_delete_file(storage_service, mock_supabase_client, db, owner_id):
     """Test de suppression de fichier"""
     # Paramètres
     bucket_name = "test-bucket"
@@ -227,7 +302,7 @@ async def test_delete_file(storage_service, mock_supabase_client, db):
     file_id = uuid.uuid4()
     file_meta = FileMetadata(
         id=file_id,
-        owner_id=uuid.uuid4(),
+        owner_id=owner_id,
         filename="test.txt",
         content_type="text/plain",
         size=100,
@@ -247,7 +322,7 @@ async def test_delete_file(storage_service, mock_supabase_client, db):
     
     # Vérifier l'appel
     mock_supabase_client.storage.from_.assert_called_with(bucket_name)
-    mock_supabase_client.storage.from_.return_value.remove.assert_called_with(file_path)
+    mock_supabase_client.storage.from_.return_value.remove.assert_called_with([file_path])
     
     # Vérifier la valeur de retour
     assert result is True
@@ -274,3 +349,229 @@ async def test_list_files(storage_service, mock_supabase_client):
     assert len(result) == 2
     assert result[0]["name"] == "test1.txt"
     assert result[1]["name"] == "test2.txt"
+
+
+@pytest.mark.asyncio
+async def test_delete_file_still_referenced(storage_service, mock_supabase_client, db, owner_id):
+    """Test de suppression d'un fichier dont l'objet est partagé"""
+    bucket_name = "test-bucket"
+    file_path = "test/path/shared.txt"
+    
+    # Deux métadonnées pointant vers le même objet
+    files = [
+        FileMetadata(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            filename=f"copy{i}.txt",
+            content_type="text/plain",
+            size=100,
+            bucket_name=bucket_name,
+            path=file_path,
+            derivatives={"64x64": "test/path/thumbnails/64x64/shared.txt.webp"}
+        )
+        for i in range(2)
+    ]
+    for file in files:
+        db.add(file)
+    db.commit()
+    remove = mock_supabase_client.storage.from_.return_value.remove
+    
+    # La première suppression conserve l'objet
+    await storage_service.delete_file(
+        bucket_name=bucket_name, file_path=file_path, session=db, metadata_id=files[0].id
+    )
+    remove.assert_not_called()
+    
+    # La dernière référence supprime l'objet et ses miniatures
+    await storage_service.delete_file(
+        bucket_name=bucket_name, file_path=file_path, session=db, metadata_id=files[1].id
+    )
+    remove.assert_called_once_with([file_path, "test/path/thumbnails/64x64/shared.txt.webp"])
+
+
+@pytest.mark.asyncio
+async def test_create_upload_url(storage_service, mock_supabase_client):
+    """Test de génération d'une URL d'upload signée"""
+    user_id = uuid.uuid4()
+    storage_from = mock_supabase_client.storage.from_.return_value
+    storage_from.create_signed_upload_url.return_value = {
+        "signed_url": "https://example.com/upload?token=abc",
+        "token": "abc",
+        "path": "ignored",
+    }
+    
+    signed = await storage_service.create_upload_url(
+        bucket_class=ProfilePictures,
+        user_id=user_id,
+        filename="avatar.png",
+        content_type="image/png",
+        size=1024,
+    )
+    
+    assert signed["path"] == f"{user_id}/profile/avatar.png"
+    assert signed["token"] == "abc"
+    storage_from.create_signed_upload_url.assert_awaited_once_with(signed["path"])
+    
+    # Les règles du bucket sont vérifiées avant de signer
+    for content_type, size in [("text/plain", 1024), ("image/png", ProfilePictures.max_file_size + 1)]:
+        with pytest.raises(HTTPException) as excinfo:
+            await storage_service.create_upload_url(
+                bucket_class=ProfilePictures,
+                user_id=user_id,
+                filename="avatar.png",
+                content_type=content_type,
+                size=size,
+            )
+        assert excinfo.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_finalize_upload(storage_service, mock_supabase_client, db, owner_id):
+    """Test de finalisation d'un upload direct"""
+    user_id = owner_id
+    storage_from = mock_supabase_client.storage.from_.return_value
+    storage_from.list.return_value = [
+        {"name": "avatar.png", "metadata": {"size": 1024, "mimetype": "image/png"}}
+    ]
+    
+    file_meta = await storage_service.finalize_upload(
+        bucket_class=ProfilePictures,
+        user_id=user_id,
+        filename="avatar.png",
+        content_type="image/png",
+        size=1024,
+        session=db,
+    )
+    
+    storage_from.list.assert_awaited_once()
+    assert storage_from.list.await_args.args[0] == f"{user_id}/profile"
+    assert file_meta.path == f"{user_id}/profile/avatar.png"
+    assert file_meta.owner_id == user_id
+    assert file_meta.size == 1024
+    
+    # Une seconde finalisation renvoie les mêmes métadonnées
+    again = await storage_service.finalize_upload(
+        bucket_class=ProfilePictures,
+        user_id=user_id,
+        filename="avatar.png",
+        content_type="image/png",
+        size=1024,
+        session=db,
+    )
+    assert again.id == file_meta.id
+
+
+@pytest.mark.asyncio
+async def test_finalize_upload_rejected(storage_service, mock_supabase_client, db, owner_id):
+    """Test de finalisation d'un objet absent ou non conforme"""
+    user_id = owner_id
+    storage_from = mock_supabase_client.storage.from_.return_value
+    
+    # Objet absent
+    storage_from.list.return_value = []
+    with pytest.raises(HTTPException) as excinfo:
+        await storage_service.finalize_upload(
+            bucket_class=ProfilePictures,
+            user_id=user_id,
+            filename="avatar.png",
+            content_type="image/png",
+            size=1024,
+            session=db,
+        )
+    assert excinfo.value.status_code == 404
+    
+    # Taille différente de celle déclarée : l'objet est supprimé
+    storage_from.list.return_value = [
+        {"name": "avatar.png", "metadata": {"size": 4096, "mimetype": "image/png"}}
+    ]
+    with pytest.raises(HTTPException) as excinfo:
+        await storage_service.finalize_upload(
+            bucket_class=ProfilePictures,
+            user_id=user_id,
+            filename="avatar.png",
+            content_type="image/png",
+            size=1024,
+            session=db,
+        )
+    assert excinfo.value.status_code == 400
+    storage_from.remove.assert_awaited_once_with([f"{user_id}/profile/avatar.png"])
+    assert db.exec(select(FileMetadata)).first() is None
+
+
+@pytest.mark.asyncio
+async def test_upload_files(storage_service, mock_supabase_client, db, owner_id):
+    """Test d'upload multiple : transferts bornés et échecs partiels"""
+    user_id = owner_id
+    record_id = create_item(db, owner_id)
+    in_flight = max_in_flight = 0
+    
+    async def slow_upload(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"Key": kwargs["path"]}
+    
+    mock_supabase_client.storage.from_.return_value.upload.side_effect = slow_upload
+    files = [make_upload_file(f"content {i}".encode(), f"doc{i}.txt") for i in range(5)]
+    files.insert(2, make_upload_file(b"image", "image.png", "image/png"))
+    
+    results = await storage_service.upload_files(
+        bucket_class=ItemDocuments,
+        files=files,
+        user_id=user_id,
+        session=db,
+        record_id=record_id,
+        concurrency=2,
+    )
+    
+    assert max_in_flight == 2
+    assert [filename for filename, _ in results] == [file.filename for file in files]
+    assert "Unsupported file type" in results[2][1]
+    created = [result for _, result in results if isinstance(result, FileMetadata)]
+    assert len(created) == 5
+    assert all(f.item_id == record_id and f.owner_id == user_id for f in created)
+    assert len(db.exec(select(FileMetadata)).all()) == 5
+
+
+@pytest.mark.asyncio
+async def test_delete_files(storage_service, mock_supabase_client, db, owner_id):
+    """Test de suppression multiple : une requête SQL, suppressions groupées"""
+    other_id = create_user(db)
+    bucket_name = ItemDocuments.name
+    
+    def make_file(owner, path, **kwargs):
+        file = FileMetadata(
+            owner_id=owner,
+            filename=path.rsplit("/", 1)[-1],
+            content_type="text/plain",
+            size=100,
+            bucket_name=bucket_name,
+            path=path,
+            **kwargs
+        )
+        db.add(file)
+        return file
+    
+    files = [make_file(owner_id, f"docs/file{i}.txt") for i in range(3)]
+    files.append(make_file(owner_id, "docs/image.png", derivatives={"64x64": "docs/thumbnails/64x64/image.png.webp"}))
+    # Objet partagé avec un fichier conservé
+    shared = make_file(owner_id, "docs/shared.txt")
+    kept = make_file(owner_id, "docs/shared.txt")
+    # Fichier d'un autre utilisateur : ignoré
+    foreign = make_file(other_id, "docs/foreign.txt")
+    db.commit()
+    
+    ids = [f.id for f in files] + [shared.id, foreign.id]
+    paths = [f.path for f in files]
+    remaining_ids = {kept.id, foreign.id}
+    deleted, removed, failed = await storage_service.delete_files(db, user_id=owner_id, ids=ids)
+    
+    assert (deleted, removed, failed) == (5, 4, [])
+    remove = mock_supabase_client.storage.from_.return_value.remove
+    remove.assert_awaited_once_with(sorted(
+        paths + ["docs/thumbnails/64x64/image.png.webp"]
+    ))
+    remaining = {f.id for f in db.exec(select(FileMetadata)).all()}
+    assert remaining == remaining_ids
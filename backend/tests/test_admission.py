@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import create_engine
+
+from app.api import deps
+from app.core.admission import AdmissionMiddleware, RateLimiter, admission
+from app.core.db import TimedQueuePool
+from app.fake_supabase.auth import FakeAuth
+from app.schemas.auth import UserIn
+
+
+def make_app(pool_wait: float = 0.0) -> tuple[FastAPI, asyncio.Event]:
+    release = asyncio.Event()
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware,
+        router=app.router,
+        limits={"read": 2, "upload": 1},
+        max_pool_wait=1.0,
+        pool_wait=lambda: pool_wait,
+        retry_after=3,
+    )
+
+    @app.get("/read")
+    async def read() -> dict:
+        await release.wait()
+        return {}
+
+    @app.post("/upload")
+    @admission("upload")
+    async def upload() -> dict:
+        await release.wait()
+        return {}
+
+    @app.get("/health")
+    @admission(exempt=True)
+    async def health() -> bool:
+        return True
+
+    return app, release
+
+
+async def test_admission_budgets():
+    app, release = make_app()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        upload = asyncio.create_task(client.post("/upload"))
+        reads = [asyncio.create_task(client.get("/read")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        # Budgets pleins : refus immédiat, sans attendre les requêtes en cours
+        shed = await client.post("/upload")
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "3"
+        assert (await client.get("/read")).status_code == 503
+        # Les écritures ont leur propre budget (illimité ici), le health check n'en a pas
+        assert (await client.post("/read")).status_code == 405
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert (await upload).status_code == 200
+        assert [r.status_code for r in await asyncio.gather(*reads)] == [200, 200]
+        assert (await client.post("/upload")).status_code == 200
+
+    middleware = app.middleware_stack
+    while not isinstance(middleware, AdmissionMiddleware):
+        middleware = middleware.app
+    assert middleware.in_flight == {"upload": 0, "read": 0, "write": 0}
+    assert middleware.rejected == {"upload": 1, "read": 1}
+
+
+async def test_admission_pool_wait():
+    app, release = make_app(pool_wait=2.0)
+    release.set()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/read")
+        assert response.status_code == 503
+        assert "database" in response.json()["detail"]
+        assert (await client.get("/health")).status_code == 200
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=2, burst=3, max_keys=2)
+
+    assert [limiter.acquire("a", now=0) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a", now=0) == 0.5
+    # Un jeton toutes les 0,5 s
+    assert limiter.acquire("a", now=0.5) == 0
+    assert limiter.acquire("a", now=0.5) == 0.5
+    assert limiter.acquire("b", now=0.5) == 0
+
+    # Seules les max_keys clés les plus récentes sont gardées : "a" repart plein
+    limiter.acquire("c", now=0.5)
+    assert [limiter.acquire("a", now=0.5) for _ in range(3)] == [0, 0, 0]
+
+    assert RateLimiter(rate=0, burst=1).acquire("a") == 0
+
+
+async def test_rate_limited_user(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(deps, "user_rate_limiter", RateLimiter(rate=0.5, burst=1))
+    auth = FakeAuth("test-secret")
+    alice, bob = (
+        UserIn(**auth.create_user(email, None), access_token="token")
+        for email in ("alice@example.com", "bob@example.com")
+    )
+
+    assert await deps.get_rate_limited_user(alice) is alice
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_rate_limited_user(alice)
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "2"}
+    # Un seau par utilisateur
+    assert await deps.get_rate_limited_user(bob) is bob
+
+
+def test_timed_queue_pool():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    assert engine.pool.longest_wait() == 0
+
+    held = engine.connect()
+    waiter = threading.Thread(target=lambda: engine.connect().close())
+    waiter.start()
+    time.sleep(0.2)
+    assert engine.pool.longest_wait() >= 0.15
+    held.close()
+    waiter.join()
+    assert engine.pool.longest_wait() == 0
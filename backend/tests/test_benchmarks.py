@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from benchmarks.runner import BENCHMARKS, compare, run_benchmarks
+from benchmarks.startup import STARTUP_BUDGET, import_profile, time_to_first_request
+
+
+def test_compare():
+    def report(**medians):
+        return {"benchmarks": {name: {"median": m} for name, m in medians.items()}}
+
+    rows = compare(
+        report(same=1.0, slower=1.0, faster=1.0, gone=1.0),
+        report(same=1.05, slower=1.5, faster=0.5, added=1.0),
+        threshold=0.10,
+    )
+
+    assert {row["name"]: row["status"] for row in rows} == {
+        "added": "new",
+        "faster": "faster",
+        "gone": "missing",
+        "same": "~",
+        "slower": "slower",
+    }
+
+
+def test_run_benchmarks_without_db():
+    import benchmarks.cases  # noqa: F401
+
+    selected = [bench for bench in BENCHMARKS.values() if not bench.requires_db]
+    report = run_benchmarks(selected, repeat=2, min_time=0.001)
+
+    assert set(report["benchmarks"]) == {bench.name for bench in selected}
+    assert "serialize.files[1000]" in report["benchmarks"]
+    for result in report["benchmarks"].values():
+        assert result["number"] >= 1
+        assert 0 < result["min"] <= result["median"]
+
+
+def test_import_profile():
+    profile = import_profile("app.main")
+
+    assert profile["total"] > 0
+    # Les clients Supabase sont chargés au premier usage, pas au démarrage
+    assert "supabase" not in profile["packages"]
+    assert "storage3" not in profile["packages"]
+    # Le faux Supabase (uvicorn) n'est lancé que par les points d'entrée des tests
+    assert "uvicorn" not in profile["packages"]
+
+
+@pytest.mark.skipif(
+    int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1")) > (os.cpu_count() or 1),
+    reason="more pytest-xdist workers than cores: the wall time measures contention",
+)
+def test_time_to_first_request_budget():
+    result = time_to_first_request(runs=1)
+
+    assert result["median"] < STARTUP_BUDGET
@@ -0,0 +1,107 @@
+from collections.abc import Iterator
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import (
+    CompressionMiddleware,
+    compression,
+    parse_accept_encoding,
+)
+
+LARGE = [
+    {"id": i, "title": f"item {i}", "description": "compressible"} for i in range(200)
+]
+
+
+def make_client(threadpool_size: int = 64 * 1024) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=500,
+        threadpool_size=threadpool_size,
+        encodings=("gzip",),
+    )
+
+    @app.get("/large")
+    async def large() -> list[dict]:
+        return LARGE
+
+    @app.get("/small")
+    async def small() -> dict:
+        return {"ok": True}
+
+    @app.get("/opt-out")
+    @compression(enabled=False)
+    async def opt_out() -> list[dict]:
+        return LARGE
+
+    @app.get("/threshold")
+    @compression(minimum_size=10)
+    async def threshold() -> dict:
+        return {"ok": "a bit more than ten bytes"}
+
+    @app.get("/image")
+    async def image() -> Response:
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/etag")
+    async def etag() -> Response:
+        return Response(b"x" * 1000, headers={"ETag": '"abc"'})
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        def lines() -> Iterator[str]:
+            for i in range(100):
+                yield f'{{"line": {i}}}\n'
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, zstd;q=0") == {"gzip", "br"}
+    assert parse_accept_encoding("") == {""}
+
+
+def test_compression_negotiation():
+    client = make_client()
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == LARGE
+
+    # Codage non accepté, corps trop petit, route exclue, contenu déjà compressé
+    for path, encoding in [
+        ("/large", "identity"),
+        ("/large", "gzip;q=0"),
+        ("/small", "gzip"),
+        ("/opt-out", "gzip"),
+        ("/image", "gzip"),
+    ]:
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        assert "content-encoding" not in response.headers, path
+
+    response = client.get("/threshold", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+    # Les octets changent : l'ETag devient faible
+    response = client.get("/etag", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["etag"] == 'W/"abc"'
+
+
+def test_compression_streaming_and_threadpool():
+    # threadpool_size=0 : toute compression passe par le pool de threads
+    client = make_client(threadpool_size=0)
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f'{{"line": {i}}}\n' for i in range(100))
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.json() == LARGE
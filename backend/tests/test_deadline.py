@@ -0,0 +1,154 @@
+import time
+from collections.abc import Iterator
+
+import anyio
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import OperationalError
+
+from app.core.deadline import (
+    DeadlineMiddleware,
+    deadline,
+    remaining,
+    set_statement_timeout,
+)
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+def make_app() -> tuple[FastAPI, dict]:
+    state: dict = {}
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware, router=app.router, default=0.2)
+
+    @app.get("/slow")
+    async def slow() -> dict:
+        await anyio.sleep(5)
+        return {}
+
+    @app.get("/unbounded")
+    @deadline(None)
+    async def unbounded() -> dict:
+        await anyio.sleep(0.3)
+        return {"remaining": remaining()}
+
+    @app.get("/sync")
+    def sync() -> dict:
+        # Exécutée dans le pool de threads : le contexte de la requête est copié
+        return {"remaining": remaining()}
+
+    @app.get("/stream")
+    @deadline(0.2)
+    async def stream() -> StreamingResponse:
+        def lines() -> Iterator[str]:
+            time.sleep(0.3)
+            # La réponse a commencé : plus de délai pour les requêtes SQL du flux
+            yield f"{remaining()}\n"
+
+        return StreamingResponse(lines())
+
+    @app.get("/query-canceled")
+    async def query_canceled() -> dict:
+        raise OperationalError("SELECT pg_sleep(60)", {}, QueryCanceled())
+
+    @app.post("/wait")
+    async def wait(request: Request) -> dict:
+        state["body"] = await request.json()
+        try:
+            await anyio.sleep(5)
+        except anyio.get_cancelled_exc_class():
+            state["cancelled"] = True
+            raise
+        return {}
+
+    return app, state
+
+
+async def test_deadline_exceeded():
+    app, _ = make_app()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        start = time.monotonic()
+        response = await client.get("/slow")
+        assert response.status_code == 504
+        assert time.monotonic() - start < 1
+
+        response = await client.get("/unbounded")
+        assert response.json() == {"remaining": None}
+
+        remaining_in_thread = (await client.get("/sync")).json()["remaining"]
+        assert 0 < remaining_in_thread <= 0.2
+
+        response = await client.get("/stream")
+        assert response.status_code == 200
+        assert response.text == "None\n"
+
+        assert (await client.get("/query-canceled")).status_code == 504
+
+
+async def test_cancelled_on_disconnect():
+    app, state = make_app()
+    messages = [
+        {"type": "http.request", "body": b'{"a": 1}', "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        message = messages.pop(0)
+        if message["type"] == "http.disconnect":
+            await anyio.sleep(0.05)
+        return message
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/wait",
+        "raw_path": b"/wait",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", b"8")],
+        "server": ("test", 80),
+        "client": ("test", 1234),
+    }
+    start = time.monotonic()
+    await app(scope, receive, send)
+
+    assert time.monotonic() - start < 1
+    assert state == {"body": {"a": 1}, "cancelled": True}
+    assert sent == []
+
+
+def test_set_statement_timeout(monkeypatch):
+    class Dialect:
+        name = "postgresql"
+
+    class Connection:
+        dialect = Dialect()
+        statements: list[str] = []
+
+        def exec_driver_sql(self, statement: str) -> None:
+            self.statements.append(statement)
+
+    connection = Connection()
+    set_statement_timeout(None, None, connection)
+    assert connection.statements == []
+
+    monkeypatch.setattr("app.core.deadline.remaining", lambda: 1.5)
+    set_statement_timeout(None, None, connection)
+    monkeypatch.setattr("app.core.deadline.remaining", lambda: -3)
+    set_statement_timeout(None, None, connection)
+    assert connection.statements == [
+        "SET LOCAL statement_timeout = 1500",
+        "SET LOCAL statement_timeout = 1",
+    ]
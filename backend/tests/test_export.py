@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+from app.utils import export
+from app.utils.export import stream_export
+
+FIELDS = ["id", "title", "description", "created_at"]
+
+
+def make_rows(count: int) -> list[dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "title": f"title, {i}",
+            "description": None,
+            "created_at": datetime(2024, 1, 1, 12, 0, i % 60),
+        }
+        for i in range(count)
+    ]
+
+
+def test_ndjson_export() -> None:
+    """Each row becomes one JSON line with serialized UUIDs and dates"""
+    rows = make_rows(3)
+    body = b"".join(stream_export(rows, FIELDS, "ndjson")).decode()
+    lines = [json.loads(line) for line in body.splitlines()]
+
+    assert len(lines) == 3
+    assert lines[0] == {
+        "id": str(rows[0]["id"]),
+        "title": "title, 0",
+        "description": None,
+        "created_at": "2024-01-01T12:00:00",
+    }
+
+
+def test_csv_export() -> None:
+    """CSV output has a header, quotes separators and writes NULL as empty"""
+    rows = make_rows(2)
+    body = b"".join(stream_export(rows, FIELDS, "csv")).decode()
+    records = list(csv.reader(io.StringIO(body)))
+
+    assert records[0] == FIELDS
+    assert records[1] == [str(rows[0]["id"]), "title, 0", "", "2024-01-01T12:00:00"]
+    assert len(records) == 3
+
+
+def test_export_is_chunked(monkeypatch) -> None:
+    """The first line is sent alone, the rest is grouped in bounded chunks"""
+    monkeypatch.setattr(export, "CHUNK_SIZE", 512)
+    chunks = list(stream_export(make_rows(100), FIELDS, "csv"))
+
+    assert chunks[0] == b"id,title,description,created_at\r\n"
+    assert len(chunks) > 2
+    assert all(len(chunk) < 1024 for chunk in chunks)
@@ -0,0 +1,105 @@
+import uuid
+from collections.abc import Generator
+
+import httpx
+import pytest
+from gotrue.errors import AuthApiError
+from pydantic import ValidationError
+from supabase._async.client import AsyncClient, create_client
+
+from app.core.auth import get_current_user
+from app.core.config import Settings
+from app.fake_supabase import FakeSupabase, FakeSupabaseServer
+from app.models.storage import ItemDocuments
+from app.services.storage import StorageService
+
+
+@pytest.fixture(scope="module")
+def fake_server() -> Generator[FakeSupabaseServer, None, None]:
+    with FakeSupabaseServer(FakeSupabase("test-secret")) as server:
+        yield server
+
+
+@pytest.fixture
+async def fake_client(fake_server: FakeSupabaseServer) -> AsyncClient:
+    return await create_client(fake_server.url, fake_server.fake.service_key)
+
+
+def test_refused_outside_local():
+    """Le faux Supabase accepte tout jeton signé avec SECRET_KEY : jamais en déploiement"""
+    secrets = {name: "not-default" for name in ("SECRET_KEY", "POSTGRES_PASSWORD")}
+    with pytest.raises(ValidationError, match="SUPABASE_FAKE"):
+        Settings(
+            ENVIRONMENT="staging",
+            SUPABASE_FAKE=True,
+            FIRST_SUPERUSER_PASSWORD="not-default",
+            **secrets,
+        )
+
+
+async def test_auth(fake_client: AsyncClient):
+    email = f"{uuid.uuid4().hex[:8]}@example.com"
+    signed_up = await fake_client.auth.sign_up(
+        {"email": email, "password": "secret123"}
+    )
+    assert signed_up.user.email == email
+    assert signed_up.session.access_token
+
+    signed_in = await fake_client.auth.sign_in_with_password(
+        {"email": email, "password": "secret123"}
+    )
+    user = await get_current_user(signed_in.session.access_token, fake_client)
+    assert user.id == signed_up.user.id
+    assert user.access_token == signed_in.session.access_token
+
+    with pytest.raises(AuthApiError):
+        await fake_client.auth.sign_in_with_password(
+            {"email": email, "password": "wrong"}
+        )
+
+    admin_client = await create_client(
+        fake_client.supabase_url, fake_client.supabase_key
+    )
+    users = await admin_client.auth.admin.list_users()
+    assert email in [u.email for u in users]
+    await admin_client.auth.admin.delete_user(signed_up.user.id)
+    users = await admin_client.auth.admin.list_users()
+    assert email not in [u.email for u in users]
+
+
+async def test_storage_service(fake_client: AsyncClient):
+    service = StorageService(fake_client)
+    await service.initialize_buckets([ItemDocuments])
+    # Idempotent : le bucket existe déjà
+    await service.initialize_buckets([ItemDocuments])
+
+    bucket = fake_client.storage.from_(ItemDocuments.name)
+    for path in ("u1/b.txt", "u1/a/1.txt", "u1/a.txt", "u2/c.txt"):
+        await bucket.upload(path, path.encode(), {"content-type": "text/plain"})
+
+    paths = [
+        obj["path"] async for obj in service.iter_files(ItemDocuments.name, page_size=1)
+    ]
+    assert paths == ["u1/a.txt", "u1/a/1.txt", "u1/b.txt", "u2/c.txt"]
+    assert await service.get_file_info(ItemDocuments.name, "u1/b.txt") == {
+        "size": len(b"u1/b.txt"),
+        "content_type": "text/plain",
+    }
+
+    content = await service.download_file(ItemDocuments.name, "u1/b.txt")
+    assert content.read() == b"u1/b.txt"
+    signed = await service.get_file_url(ItemDocuments.name, "u1/b.txt")
+    async with httpx.AsyncClient() as http:
+        assert (await http.get(signed["signedURL"])).content == b"u1/b.txt"
+
+    upload = await service.create_upload_url(
+        ItemDocuments, uuid.uuid4(), "direct.txt", "text/plain", 6
+    )
+    await bucket.upload_to_signed_url(upload["path"], upload["token"], b"direct")
+    assert (await service.get_file_info(ItemDocuments.name, upload["path"]))[
+        "size"
+    ] == 6
+
+    failed = await service.remove_objects(ItemDocuments.name, ["u1/a.txt", "u1/b.txt"])
+    assert failed == []
+    assert await service.get_file_info(ItemDocuments.name, "u1/a.txt") is None
@@ -0,0 +1,66 @@
+import uuid
+
+import httpx
+
+from loadtest.scenarios import VirtualUser, full_flow
+from loadtest.stats import Recorder, percentile
+
+
+def test_percentile():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0
+
+
+def test_recorder_summary():
+    recorder = Recorder()
+    for latency in (0.01, 0.02, 0.03, 0.04):
+        recorder.record("GET /items", latency, ok=True)
+    recorder.record("POST /items", 0.1, ok=False)
+
+    summary = recorder.summary(elapsed=2.0)
+
+    assert summary["endpoints"]["GET /items"]["p50"] == 20.0
+    assert summary["endpoints"]["GET /items"]["throughput"] == 2.0
+    assert summary["endpoints"]["POST /items"]["error_rate"] == 1.0
+    assert summary["total"]["requests"] == 5
+    assert summary["total"]["errors"] == 1
+
+
+async def test_full_flow():
+    item_id, file_id = str(uuid.uuid4()), str(uuid.uuid4())
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, request.url.path))
+        if request.url.path == "/auth/v1/token":
+            return httpx.Response(200, json={"access_token": "token"})
+        assert request.headers["Authorization"] == "Bearer token"
+        if request.url.path == "/items/create-item":
+            return httpx.Response(200, json={"id": item_id})
+        if request.url.path.startswith("/storage/upload/document/"):
+            return httpx.Response(200, json={"id": file_id})
+        return httpx.Response(200, json={})
+
+    transport = httpx.MockTransport(handler)
+    recorder = Recorder()
+    async with (
+        httpx.AsyncClient(base_url="http://api", transport=transport) as api,
+        httpx.AsyncClient(base_url="http://auth", transport=transport) as auth,
+    ):
+        user = VirtualUser(
+            api, auth, recorder, "user@example.com", "secret", upload_size=64
+        )
+        await full_flow(user)
+
+    assert seen == [
+        ("POST", "/auth/v1/token"),
+        ("GET", "/items/get-items"),
+        ("POST", "/items/create-item"),
+        ("POST", f"/storage/upload/document/{item_id}"),
+        ("GET", f"/storage/file/{file_id}/url"),
+        ("DELETE", f"/items/delete/{item_id}"),
+    ]
+    assert recorder.summary(1.0)["total"]["errors"] == 0
@@ -0,0 +1,54 @@
+import gzip
+import json
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.openapi import OpenAPICache, OpenAPIDocument
+from app.main import app
+
+OPENAPI_URL = f"{settings.API_V1_STR}/openapi.json"
+
+
+def test_openapi_precompressed() -> None:
+    client = TestClient(app)
+    # httpx décompresse : on demande l'identité puis gzip séparément
+    plain = client.get(OPENAPI_URL, headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == app.openapi()
+    etag = plain.headers["etag"]
+
+    compressed = client.get(OPENAPI_URL, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == etag
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.content == plain.content
+
+    not_modified = client.get(OPENAPI_URL, headers={"If-None-Match": f"W/{etag}"})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Une seule route pour le schéma, absente du schéma lui-même
+    assert [route.path for route in app.routes].count(OPENAPI_URL) == 1
+    assert OPENAPI_URL not in app.openapi()["paths"]
+
+
+def test_openapi_artifact(tmp_path: Path) -> None:
+    written = OpenAPIDocument.from_app(app).write(tmp_path)
+    assert {path.name for path in written} >= {"openapi.json", "openapi.json.gz"}
+    assert (
+        gzip.decompress((tmp_path / "openapi.json.gz").read_bytes())
+        == (tmp_path / "openapi.json").read_bytes()
+    )
+
+    # Le schéma servi est celui de l'artefact, pas celui de l'application
+    other_app = FastAPI()
+    cache = OpenAPICache(str(tmp_path))
+    cache.install(other_app)
+    with TestClient(other_app) as client:
+        response = client.get("/openapi.json")
+    assert json.loads(response.content) == app.openapi()
+    assert response.headers["etag"] == cache.prepare().etag
@@ -0,0 +1,84 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Optional
+
+from app.services.realtime import RESYNC, ChangeFeed
+
+
+class FakeListen:
+    """Connexions LISTEN simulées, alimentées par une file"""
+
+    def __init__(self):
+        self.connections = 0
+        self.notifications: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    async def __call__(self) -> AsyncIterator[Optional[str]]:
+        self.connections += 1
+        yield None
+        while True:
+            payload = await self.notifications.get()
+            if payload is None:
+                raise ConnectionError("connection lost")
+            yield payload
+
+    def notify(self, table: str, op: str, owner_id: str, ids: list[str]) -> None:
+        self.notifications.put_nowait(
+            json.dumps({"table": table, "op": op, "owner_id": owner_id, "ids": ids})
+        )
+
+
+async def test_change_feed():
+    listen = FakeListen()
+    feed = ChangeFeed(max_subscribers=3, queue_size=2, listen=listen, retry_delay=0.01)
+    try:
+        with (
+            feed.subscribe("alice") as alice,
+            feed.subscribe("alice", ("filemetadata",)) as alice_files,
+            feed.subscribe("bob") as bob,
+        ):
+            # Limite atteinte : l'abonnement est refusé, sans être compté
+            assert feed.full()
+            assert feed.subscribe("carol") is None
+            assert feed.subscribers == 3
+            await asyncio.sleep(0.01)
+            assert listen.connections == 1
+
+            # Chaque abonné ne reçoit que les changements de ses lignes et de ses tables
+            listen.notify("item", "insert", "alice", ["1"])
+            listen.notify("filemetadata", "delete", "alice", ["2"])
+            listen.notifications.put_nowait("not json")
+            await asyncio.sleep(0.01)
+            assert (await alice.get(0.1))["ids"] == ["1"]
+            assert (await alice.get(0.1))["op"] == "delete"
+            assert (await alice_files.get(0.1))["table"] == "filemetadata"
+            assert await alice_files.get(0.01) is None
+            assert await bob.get(0.01) is None
+
+            # Abonné trop lent : les événements en attente sont remplacés par RESYNC
+            for i in range(3):
+                listen.notify("item", "update", "bob", [str(i)])
+            await asyncio.sleep(0.01)
+            assert await bob.get(0.1) == RESYNC
+            assert bob.dropped == 2
+            assert await bob.get(0.01) is None
+
+            # Connexion perdue puis rétablie : tous les abonnés relisent leurs listes
+            listen.notifications.put_nowait(None)
+            await asyncio.sleep(0.05)
+            assert listen.connections == 2
+            for subscription in (alice, alice_files, bob):
+                assert await subscription.get(0.1) == RESYNC
+
+        assert feed.subscribers == 0
+        assert not feed.full()
+        # Désabonnement idempotent
+        subscription = feed.subscribe("carol")
+        subscription.close()
+        subscription.close()
+        assert feed.subscribers == 0
+        # Sans abonné, les notifications sont ignorées
+        listen.notify("item", "insert", "alice", ["3"])
+        await asyncio.sleep(0.01)
+    finally:
+        await feed.stop()
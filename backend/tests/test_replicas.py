@@ -0,0 +1,75 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.api import deps
+from app.api.deps import ReadSessionDep, get_db
+from app.core.db import ReplicaSet, engine, replication_lag
+
+
+def test_replica_set(caplog: pytest.LogCaptureFixture):
+    first, second = create_engine("sqlite:///first"), create_engine("sqlite:///second")
+    lags = {first: 0.5, second: 0.0}
+    probes: list[Engine] = []
+
+    def probe(replica: Engine) -> float:
+        probes.append(replica)
+        if lags[replica] is None:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        return lags[replica]
+
+    replicas = ReplicaSet([first, second], max_lag=1, check_interval=3600, probe=probe)
+    # Les réplicas sains servent à tour de rôle
+    assert [replicas.choose() for _ in range(4)] == [first, second, first, second]
+    # Un seul contrôle par intervalle
+    assert probes == [first, second]
+
+    # Réplica en retard ou injoignable : écarté au contrôle suivant
+    lags.update({first: 2.0, second: None})
+    replicas.check()
+    assert replicas.choose() is None
+    assert "2.0s behind" in caplog.text
+    assert "unreachable" in caplog.text
+
+    lags[first] = 0.0
+    replicas.check()
+    assert [replicas.choose() for _ in range(2)] == [first, first]
+
+    assert ReplicaSet([], max_lag=1, check_interval=1).choose() is None
+
+
+async def test_read_session(monkeypatch: pytest.MonkeyPatch):
+    primary, replica = (
+        create_engine("sqlite:///primary"),
+        create_engine("sqlite:///replica"),
+    )
+    replicas = ReplicaSet(
+        [replica], max_lag=1, check_interval=3600, probe=lambda _: 0.0
+    )
+    monkeypatch.setattr(deps, "replicas", replicas)
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = lambda: Session(primary)
+
+    @app.get("/read")
+    def read(session: ReadSessionDep) -> str:
+        return session.get_bind().url.database
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        assert (await client.get("/read")).json() == "replica"
+        # Le client lit ses propres écritures sur la base principale
+        response = await client.get("/read", headers={"X-Read-Your-Writes": "1"})
+        assert response.json() == "primary"
+
+        replicas.healthy = []
+        assert (await client.get("/read")).json() == "primary"
+
+
+def test_replication_lag(db: Session):  # noqa: ARG001
+    # La base principale n'est le réplica de personne : pas de retard
+    assert replication_lag(engine) == 0
@@ -0,0 +1,112 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.resilience import CircuitOpenError, Upstream, is_transient
+from app.services.storage import StorageService
+
+
+class UpstreamError(Exception):
+    def __init__(self, status: int | str) -> None:
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def make_upstream() -> Upstream:
+    return Upstream(
+        "Storage",
+        attempts=3,
+        initial_wait=0,
+        max_wait=0,
+        failure_threshold=3,
+        reset_timeout=60,
+    )
+
+
+def test_is_transient():
+    assert is_transient(UpstreamError(503))
+    assert is_transient(UpstreamError("429"))
+    # gotrue : erreur sans réponse HTTP
+    assert is_transient(UpstreamError(0))
+    assert is_transient(httpx.ConnectError("connection refused"))
+    assert not is_transient(UpstreamError("404"))
+    assert not is_transient(ValueError("bad value"))
+
+
+async def test_retries():
+    upstream = make_upstream()
+    operation = AsyncMock(side_effect=[UpstreamError(502), "ok"])
+    assert await upstream.call(operation, "a", idempotent=True) == "ok"
+    assert operation.await_count == 2
+    assert upstream.breaker.failures == 0
+
+    # Sans idempotence, une seule tentative
+    operation = AsyncMock(side_effect=[UpstreamError(502), "ok"])
+    with pytest.raises(UpstreamError):
+        await upstream.call(operation)
+    assert operation.await_count == 1
+
+    # Erreur du client : ni nouvelle tentative, ni échec du service
+    operation = AsyncMock(side_effect=UpstreamError(404))
+    with pytest.raises(UpstreamError):
+        await upstream.call(operation, idempotent=True)
+    assert operation.await_count == 1
+    assert upstream.breaker.failures == 0
+
+
+async def test_circuit_breaker(monkeypatch: pytest.MonkeyPatch):
+    upstream = make_upstream()
+    operation = AsyncMock(side_effect=UpstreamError(503))
+
+    # Trois échecs consécutifs ouvrent le circuit pendant la troisième tentative
+    with pytest.raises(UpstreamError):
+        await upstream.call(operation, idempotent=True)
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await upstream.call(operation, idempotent=True)
+    assert operation.await_count == 3
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "60"}
+
+    # Ouvert : échec immédiat, sans appel
+    with pytest.raises(CircuitOpenError):
+        await upstream.call(operation, idempotent=True)
+    assert operation.await_count == 3
+    assert upstream.breaker.metrics() == {
+        "state": "open",
+        "failures": 3,
+        "opened": 1,
+        "rejected": 2,
+    }
+
+    # Après reset_timeout, un appel d'essai referme le circuit
+    now = time.monotonic() + 61
+    monkeypatch.setattr("app.core.resilience.time.monotonic", lambda: now)
+    operation.side_effect = None
+    operation.return_value = "ok"
+    assert await upstream.call(operation) == "ok"
+    assert upstream.breaker.metrics() == {
+        "state": "closed",
+        "failures": 0,
+        "opened": 1,
+        "rejected": 2,
+    }
+
+
+async def test_storage_service_circuit_open():
+    upstream = make_upstream()
+    client = MagicMock()
+    client.storage.from_.return_value.create_signed_url = AsyncMock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+    service = StorageService(client, upstream=upstream)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await service.get_file_url("bucket", "path")
+    assert exc_info.value.status_code == 500
+    # Le circuit ouvert n'est pas masqué en erreur 500
+    with pytest.raises(HTTPException) as exc_info:
+        await service.get_file_url("bucket", "path")
+    assert exc_info.value.status_code == 503
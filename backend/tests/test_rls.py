@@ -5,12 +5,18 @@ from dotenv import load_dotenv
 from faker import Faker
 from app.core.config import settings
 import uuid
+import pytest
 
 # Charger les variables d'environnement de test
 load_dotenv(".env.test")
 
 fake = Faker()
 
+# Les politiques RLS sont appliquées par PostgREST, que SUPABASE_FAKE ne simule pas
+pytestmark = pytest.mark.skipif(
+    settings.SUPABASE_FAKE, reason="requires a Supabase project (PostgREST)"
+)
+
 # Client Supabase avec service_role
 supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
 
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+async def test_single_flight():
+    flight = SingleFlight("test")
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def fetch(key: str) -> str:
+        calls.append(key)
+        await release.wait()
+        if key == "bad":
+            raise ValueError(key)
+        return key.upper()
+
+    waiting = [
+        asyncio.create_task(flight.do(key, fetch, key)) for key in ("a", "a", "b", "a")
+    ]
+    failing = [asyncio.create_task(flight.do("bad", fetch, "bad")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    assert flight.metrics() == {"calls": 6, "collapsed": 3, "in_flight": 3}
+
+    # Un appelant annulé n'annule pas l'appel partagé
+    waiting.pop(1).cancel()
+    release.set()
+    assert await asyncio.gather(*waiting) == ["A", "B", "A"]
+    for task in failing:
+        with pytest.raises(ValueError):
+            await task
+    assert calls == ["a", "b", "bad"]
+    assert flight.metrics()["in_flight"] == 0
+
+    # Appel terminé : le suivant en refait un
+    assert await flight.do("a", fetch, "a") == "A"
+    assert calls == ["a", "b", "bad", "a"]
+
+    # Premier appelant annulé : un appelant en attente refait l'appel pour les autres
+    release.clear()
+    waiting = [asyncio.create_task(flight.do("c", fetch, "c")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    waiting.pop(0).cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await asyncio.gather(*waiting) == ["C", "C"]
+    assert calls == ["a", "b", "bad", "a", "c", "c"]
+    assert flight.metrics() == {"calls": 10, "collapsed": 4, "in_flight": 0}
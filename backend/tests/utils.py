@@ -1,7 +1,32 @@
+import uuid
+
+from faker import Faker
 from fastapi import HTTPException
+from sqlmodel import Session
+
+from app.models.item import Item
+from app.models.user import User
+
+fake = Faker()
 
 
 def get_auth_header(access_token: str | None) -> dict[str, str]:
     if not access_token:
         raise HTTPException(status_code=401, detail="No access token")
     return {"Authorization": f"Bearer {access_token}"}
+
+
+def create_user(session: Session) -> uuid.UUID:
+    """Add a row to auth.users, the foreign key of every RLS model, without Supabase"""
+    user = User(email=fake.email())
+    session.add(user)
+    session.commit()
+    return user.id
+
+
+def create_item(session: Session, owner_id: uuid.UUID) -> uuid.UUID:
+    """Add an item to attach files to (foreign key of FileMetadata.item_id)"""
+    item = Item(title="Test item", owner_id=owner_id)
+    session.add(item)
+    session.commit()
+    return item.id